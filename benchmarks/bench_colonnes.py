@@ -0,0 +1,157 @@
+##########################################################################
+#
+# Banc d'essai : construction du tableau d'une page Crossref
+# ---------------------------------------------------------
+#
+# Compare, sur des pages de notices Crossref synthétiques (déjà décodées) :
+#   1. l'ancienne boucle : un dictionnaire par notice (`extraire_ligne` des
+#      scripts v100 / v101 / v102), puis `pd.DataFrame(liste_de_dicts)` ;
+#   2. `commun.colonnes.ConstructeurColonnes` : une liste par colonne du
+#      schéma, DataFrame assemblé à partir des colonnes ;
+#   3. la même construction vers une table Arrow (si pyarrow est présent),
+#      forme utilisée par les scripts pour écrire leurs segments.
+# Mesure aussi la chaîne complète jusqu'au segment Parquet (en mémoire) :
+# `DataFrame.to_parquet` contre `pyarrow.parquet.write_table`.
+# Vérifie que les tableaux obtenus sont identiques, puis affiche le temps
+# par page et le débit en notices par seconde.
+#
+# Exemple :
+#   python benchmarks/bench_colonnes.py -p 200 --rows 500
+#
+##########################################################################
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commun.colonnes import ConstructeurColonnes, pa
+from commun.schemas import CROSSREF_V100, CROSSREF_V101, CROSSREF_V102
+
+if pa is not None:
+    import pyarrow.parquet as pq
+
+
+# === ANCIENNES FONCTIONS `extraire_ligne` (copie des scripts) ===
+def ligne_v100(item):
+    title = item.get('title', [''])[0]
+    authors = ", ".join(
+        [f"{a.get('given', '')} {a.get('family', '')}" for a in item.get('author', [])]
+    )
+    date_parts = item.get('issued', {}).get('date-parts', [[None]])
+    year = date_parts[0][0] if date_parts else None
+    return {
+        "Titre": title,
+        "Auteurs": authors,
+        "Année": year,
+        "DOI": item.get('DOI', ''),
+        "URL": item.get('URL', ''),
+        "Résumé": item.get('abstract', ''),
+        "Mots-clés": ", ".join(item.get('subject', [])),
+    }
+
+
+def ligne_v101(item):
+    return {
+        "titre": item.get("title", [""])[0],
+        "auteurs": "; ".join([f"{a.get('given', '')} {a.get('family', '')}" for a in item.get("author", [])]) if item.get("author") else "",
+        "date": "-".join(map(str, item.get("issued", {}).get("date-parts", [[None]])[0])),
+        "DOI": item.get("DOI", ""),
+        "URL": item.get("URL", ""),
+        "abstract": item.get("abstract", ""),
+        "mots_cles": "; ".join(item.get("subject", [])) if item.get("subject") else ""
+    }
+
+
+def ligne_v102(item):
+    title = item.get("title", [""])[0]
+    authors = ", ".join([f"{a.get('given', '')} {a.get('family', '')}".strip() for a in item.get("author", [])]) if "author" in item else ""
+    date_parts = item.get("issued", {}).get("date-parts", [[None]])
+    return {
+        "Titre": title,
+        "Auteurs": authors,
+        "Année": date_parts[0][0],
+        "DOI": item.get("DOI", ""),
+        "URL": item.get("URL", ""),
+        "Résumé": item.get("abstract", ""),
+    }
+
+
+CAS = (("v100", ligne_v100, CROSSREF_V100), ("v101", ligne_v101, CROSSREF_V101), ("v102", ligne_v102, CROSSREF_V102))
+
+
+# === NOTICES SYNTHÉTIQUES ===
+def notice(i, alea):
+    item = {
+        "title": [f"Titre de la publication {i}"],
+        "DOI": f"10.{1000 + i % 500}/exemple.{i}",
+        "URL": f"https://doi.org/10.{1000 + i % 500}/exemple.{i}",
+        "issued": {"date-parts": [[1950 + i % 75, 1 + i % 12, 1 + i % 28]]},
+    }
+    if alea.random() < 0.9:
+        item["author"] = [{"given": f"Prénom{j}", "family": f"Nom{i}-{j}"} for j in range(alea.randint(1, 6))]
+    if alea.random() < 0.4:
+        item["abstract"] = "<jats:p>" + "Résumé de la publication. " * alea.randint(5, 40) + "</jats:p>"
+    if alea.random() < 0.6:
+        item["subject"] = [f"Discipline {k}" for k in range(alea.randint(1, 3))]
+    return item
+
+
+def chronometrer(fonction, pages):
+    debut = time.perf_counter()
+    for items in pages:
+        fonction(items)
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-p", "--pages", type=int, default=200, help="nombre de pages")
+    parser.add_argument("--rows", type=int, default=500, help="notices par page")
+    args = parser.parse_args()
+
+    alea = random.Random(42)
+    pages = [[notice(p * args.rows + i, alea) for i in range(args.rows)] for p in range(args.pages)]
+    nb = args.pages * args.rows
+    print(f"{args.pages} pages de {args.rows} notices ({nb} notices)\n")
+    print(f"{'script':<6} {'méthode':<22} {'ms/page':>9} {'notices/s':>12} {'gain':>6}")
+
+    for nom, extraire_ligne, schema in CAS:
+        constructeur = ConstructeurColonnes(schema)
+
+        # Les deux constructions doivent donner exactement le même tableau
+        attendu = pd.DataFrame([extraire_ligne(i) for i in pages[0]])
+        pd.testing.assert_frame_equal(attendu, constructeur.tableau(pages[0]))
+        if pa is not None:
+            pd.testing.assert_frame_equal(attendu, constructeur.table_arrow(pages[0]).to_pandas())
+
+        methodes = [
+            ("dicts + DataFrame", lambda items: pd.DataFrame([extraire_ligne(i) for i in items])),
+            ("colonnes → DataFrame", constructeur.tableau),
+        ]
+        if pa is not None:
+            methodes += [
+                ("colonnes → Arrow", constructeur.table_arrow),
+                ("dicts → Parquet", lambda items: pd.DataFrame([extraire_ligne(i) for i in items])
+                 .to_parquet(io.BytesIO(), index=False)),
+                ("colonnes → Parquet", lambda items: pq.write_table(constructeur.table_arrow(items), io.BytesIO())),
+            ]
+
+        reference = None
+        for methode, fonction in methodes:
+            duree = chronometrer(fonction, pages)
+            if methode.startswith("dicts"):
+                reference = duree   # gain mesuré contre l'ancienne boucle équivalente
+            print(f"{nom:<6} {methode:<22} {duree / args.pages * 1000:>9.2f} {nb / duree:>12,.0f} "
+                  f"{reference / duree:>5.1f}×")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+##########################################################################
+#
+# Banc d'essai : connexions ouvertes avec et sans le client HTTP commun
+# ---------------------------------------------------------------------
+#
+# Envoie N requêtes GET de deux façons :
+#   1. `requests.get` à chaque fois (ancienne méthode des scripts) ;
+#   2. `commun.client_http` (session partagée, connexions persistantes).
+# Compte les connexions TCP (+ TLS en https) réellement ouvertes et le temps
+# total. Par défaut, la cible est un petit serveur HTTP/1.1 local ; l'option
+# --url permet de mesurer sur un vrai hôte https (handshake TLS compris).
+#
+# Exemple :
+#   python benchmarks/bench_connexions.py -n 200
+#   python benchmarks/bench_connexions.py -n 20 --url "https://api.crossref.org/works?rows=0"
+#
+##########################################################################
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import urllib3.connection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commun import client_http
+
+# === COMPTAGE DES CONNEXIONS ===
+_connexions = 0
+_connect_origine = urllib3.connection.HTTPConnection.connect
+
+
+def _connect_compte(self):
+    global _connexions
+    _connexions += 1
+    return _connect_origine(self)
+
+
+urllib3.connection.HTTPConnection.connect = _connect_compte   # HTTPSConnection en hérite
+
+
+# === SERVEUR LOCAL ===
+class _Gestionnaire(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        corps = b'{"status":"ok","message":{"total-results":0,"items":[]}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+def demarrer_serveur():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), _Gestionnaire)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur, f"http://127.0.0.1:{serveur.server_address[1]}/works"
+
+
+# === MESURES ===
+def mesurer(nom, envoyer, url, n):
+    global _connexions
+    _connexions = 0
+    debut = time.perf_counter()
+    for _ in range(n):
+        r = envoyer(url)
+        r.raise_for_status()
+        r.content
+    duree = time.perf_counter() - debut
+    print(f"{nom:<28} {duree:8.3f} s   {duree / n * 1000:7.2f} ms/req   {_connexions:5d} connexions")
+    return duree, _connexions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connexions ouvertes : requests.get vs client commun")
+    parser.add_argument("-n", type=int, default=200, help="nombre de requêtes par méthode")
+    parser.add_argument("--url", help="URL réelle à interroger (sinon serveur local)")
+    args = parser.parse_args()
+
+    serveur = None
+    url = args.url
+    if url is None:
+        serveur, url = demarrer_serveur()
+    # Sur un vrai hôte, le limiteur règle le rythme ; en local il est inutile
+    limiter = args.url is not None
+
+    print(f"🔬 {args.n} requêtes vers {url}\n")
+    t1, c1 = mesurer("requests.get (par appel)",
+                     lambda u: requests.get(u, timeout=client_http.DELAIS, headers={"User-Agent": client_http.USER_AGENT}),
+                     url, args.n)
+    t2, c2 = mesurer("client_http (partagé)",
+                     lambda u: client_http.get(u, limiter=limiter), url, args.n)
+
+    print(f"\n✅ Handshakes évités : {c1 - c2} ({(c1 - c2) / max(c1, 1):.0%})")
+    print(f"⏱️ Gain de temps : {t1 - t2:.3f} s ({(t1 - t2) / t1:.0%})")
+    if serveur:
+        serveur.shutdown()
+
+
+if __name__ == "__main__":
+    main()
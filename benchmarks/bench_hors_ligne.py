@@ -0,0 +1,160 @@
+##########################################################################
+#
+# Banc d'essai hors ligne : récolteurs et compteurs face au serveur local
+# ----------------------------------------------------------------------
+#
+# Lance chaque fonction de récolte ou de comptage contre le serveur de
+# substitution (benchmarks/serveur_local.py), sans aucun accès aux vraies API :
+#   fetch_crossref_data   crossref_scraper_v102 (curseur, segments, parquet)
+#   get_dois              get_doi.py, mode par ISSN (/journals/{issn}/works)
+#   get_dois_rapide       get_doi.py, mode rapide (flux unique, select)
+#   query_openalex        keyword_occurrences_openalex, une requête par année
+#   get_publication_count keyword_occurrences_ss_multi_v3, une requête par année
+#   get_num_results       keyword_occurrences_google_scholar, une page par année
+#
+# Chaque cas tourne dans un processus neuf (mesure de mémoire indépendante),
+# cache des comptes désactivé. Par défaut, les limiteurs de débit sont
+# relevés et la gigue de Scholar supprimée : on mesure le code, pas la
+# politesse envers les API (--limiteurs-reels pour les garder).
+# Affiche, par cas : durée, notices servies par seconde, requêtes par
+# seconde, 429 reçus et pic de mémoire résidente (RSS) du processus.
+#
+# Exemple :
+#   python benchmarks/bench_hors_ligne.py
+#   python benchmarks/bench_hors_ligne.py -n 50000 --latence 0.02 --taux-429 0.05 --cas fetch_crossref_data
+#
+##########################################################################
+
+import argparse
+import builtins
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RACINE, os.path.join(RACINE, "keyword_occurrences")]
+
+from serveur_local import REVUES, ServeurLocal  # noqa: E402
+
+HOTES = ("api.crossref.org", "api.openalex.org", "api.semanticscholar.org", "scholar.google.com")
+DEBUT, FIN = 1990, 2024
+MOT_CLE = "bench"
+
+
+# === CAS (exécutés dans le processus enfant) ===
+# Chaque cas importe ce dont il a besoin, puis renvoie la fonction à chronométrer :
+# les imports (pandas, pyarrow...) restent hors de la mesure.
+def _script_get_doi(mode_rapide):
+    import commun.sortie, commun.tri_externe  # noqa: F401  (imports du script, hors mesure)
+    issn_imprime, issn_en_ligne = REVUES[0][2:]
+    reponses = iter([issn_imprime, issn_en_ligne, "o" if mode_rapide else "n", "csv"])
+    builtins.input = lambda *args: next(reponses)
+    return lambda: runpy.run_path(os.path.join(RACINE, "get_doi.py"), run_name="__main__")
+
+
+def cas_fetch_crossref_data():
+    from crossref_scraper_v102 import fetch_crossref_data
+    return lambda: fetch_crossref_data(MOT_CLE, format_sortie="parquet")
+
+
+def cas_get_dois():
+    return _script_get_doi(mode_rapide=False)
+
+
+def cas_get_dois_rapide():
+    return _script_get_doi(mode_rapide=True)
+
+
+def cas_query_openalex():
+    from keyword_occurrences_openalex import query_openalex
+    return lambda: query_openalex(MOT_CLE, DEBUT, FIN, group_by=False)
+
+
+def cas_get_publication_count():
+    from keyword_occurrences_ss_multi_v3 import get_publication_count
+    return lambda: [get_publication_count(MOT_CLE, annee) for annee in range(DEBUT, FIN + 1)]
+
+
+def cas_get_num_results():
+    from keyword_occurrences_google_scholar import get_num_results
+    return lambda: [get_num_results(f'"{MOT_CLE}"', annee) for annee in range(DEBUT, FIN + 1)]
+
+
+CAS = {nom[len("cas_"):]: fonction for nom, fonction in list(globals().items()) if nom.startswith("cas_")}
+
+
+def executer_enfant(nom, sortie, limiteurs_reels):
+    """Processus enfant : règle les limiteurs, exécute le cas, écrit sa durée dans `sortie`."""
+    from commun.limiteur import limiteur_pour
+    if not limiteurs_reels:
+        for hote in HOTES:
+            limiteur = limiteur_pour(hote)
+            limiteur.debit = limiteur.debit_initial = limiteur.capacite = 1000.0
+            limiteur.gigue = 0.0
+    fonction = CAS[nom]()
+    debut = time.perf_counter()
+    fonction()
+    with open(sortie, "w", encoding="utf-8") as fichier:
+        json.dump({"duree": time.perf_counter() - debut}, fichier)
+
+
+# === PROCESSUS PRINCIPAL ===
+def mesurer(nom, serveur, args, dossier):
+    """Lance le cas dans un processus neuf ; renvoie (durée, stats du serveur, pic RSS en Mo)."""
+    serveur.remettre_a_zero()
+    sortie = os.path.join(dossier, f"{nom}.json")
+    commande = [sys.executable, os.path.abspath(__file__), "--enfant", nom, "--sortie", sortie]
+    if args.limiteurs_reels:
+        commande.append("--limiteurs-reels")
+    env = dict(os.environ, SCRIPTORIUM_SERVEUR_LOCAL=serveur.url, SCRIPTORIUM_CACHE="0")
+    travail = os.path.join(dossier, nom)
+    os.makedirs(travail, exist_ok=True)
+    sortie_console = None if args.verbeux else subprocess.DEVNULL
+    processus = subprocess.Popen(commande, cwd=travail, env=env, stdout=sortie_console, stderr=subprocess.STDOUT)
+    _, statut, ressources = os.wait4(processus.pid, 0)
+    processus.returncode = os.waitstatus_to_exitcode(statut)
+    if processus.returncode != 0 or not os.path.exists(sortie):
+        raise RuntimeError(f"le cas {nom} a échoué (code {processus.returncode}) ; relancer avec -v")
+    with open(sortie, encoding="utf-8") as fichier:
+        duree = json.load(fichier)["duree"]
+    return duree, dict(serveur.stats), ressources.ru_maxrss / 1024   # ru_maxrss en Ko sous Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne contre le serveur local de substitution")
+    parser.add_argument("-n", "--notices", type=int, default=20_000, help="taille du corpus Crossref")
+    parser.add_argument("--cas", nargs="+", choices=sorted(CAS), help="cas à lancer (tous par défaut)")
+    parser.add_argument("--latence", type=float, default=0.0, help="secondes ajoutées à chaque réponse")
+    parser.add_argument("--taux-429", type=float, default=0.0, help="proportion de 429 injectés")
+    parser.add_argument("--expiration", type=float, default=300.0, help="durée de vie des curseurs (s)")
+    parser.add_argument("--limiteurs-reels", action="store_true", help="garder les débits et la gigue par défaut")
+    parser.add_argument("-v", "--verbeux", action="store_true", help="afficher la sortie des scripts")
+    parser.add_argument("--enfant", help=argparse.SUPPRESS)
+    parser.add_argument("--sortie", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.enfant:
+        executer_enfant(args.enfant, args.sortie, args.limiteurs_reels)
+        return
+
+    serveur = ServeurLocal(notices=args.notices, latence=args.latence, taux_429=args.taux_429,
+                           expiration=args.expiration)
+    serveur.demarrer()
+    print(f"🧪 Serveur local {serveur.url} : {args.notices} notices, latence {args.latence * 1000:.0f} ms, "
+          f"{args.taux_429:.0%} de 429\n")
+    print(f"{'cas':<22} {'durée s':>8} {'notices':>8} {'notices/s':>10} {'requêtes':>9} {'req/s':>7} "
+          f"{'429':>4} {'RSS Mo':>7}")
+    with tempfile.TemporaryDirectory(prefix="bench_hors_ligne_") as dossier:
+        for nom in args.cas or CAS:
+            duree, stats, rss = mesurer(nom, serveur, args, dossier)
+            print(f"{nom:<22} {duree:>8.2f} {stats['notices']:>8} {stats['notices'] / duree:>10,.0f} "
+                  f"{stats['requetes']:>9} {stats['requetes'] / duree:>7.1f} {stats['429']:>4} {rss:>7.0f}")
+    serveur.arreter()
+
+
+if __name__ == "__main__":
+    main()
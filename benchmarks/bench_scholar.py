@@ -0,0 +1,103 @@
+##########################################################################
+#
+# Banc d'essai : nombre de résultats d'une page Google Scholar
+# ------------------------------------------------------------
+#
+# Compare, sur des pages Scholar enregistrées (benchmarks/fixtures/scholar) :
+#   1. l'ancienne méthode : page entière, arbre BeautifulSoup complet, puis
+#      l'ancienne expression régulière sur `div#gs_ab_md` ;
+#   2. `commun.scholar` : lecture par morceaux arrêtée dès que le bloc du
+#      compteur est complet, analyse de ce bloc seulement.
+# Affiche le nombre trouvé par chaque méthode, le nombre attendu, les octets
+# lus et le temps moyen par page.
+#
+# Exemple :
+#   python benchmarks/bench_scholar.py -n 200
+#
+##########################################################################
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commun.scholar import TAILLE_MORCEAU, lire_jusqua_compteur
+
+DOSSIER_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scholar")
+
+# Nombre attendu par page (None = bloc absent, page de blocage)
+ATTENDUS = {
+    "en_about.html": 1230000,
+    "en_page2.html": 18400,
+    "en_annee.html": 150,
+    "en_single.html": 1,
+    "en_zero.html": 0,
+    "fr_espaces.html": 12300,
+    "de_points.html": 1230000,
+    "blocage_captcha.html": None,
+}
+
+
+def ancien_extracteur(page):
+    """Méthode d'origine de `get_num_results` (avant commun/scholar.py)."""
+    soup = BeautifulSoup(page, 'html.parser')
+    div_results = soup.find("div", {"id": "gs_ab_md"})
+    if div_results is None:
+        return None
+    res = re.findall(r'(\d+).?(\d+)?\.?(\d+)?\s', div_results.text)
+    if not res:
+        return 0
+    return int(''.join(res[0]))
+
+
+def morceaux(page, taille=TAILLE_MORCEAU):
+    for i in range(0, len(page), taille):
+        yield page[i:i + taille]
+
+
+def nouvel_extracteur(page):
+    return lire_jusqua_compteur(morceaux(page))
+
+
+def chronometrer(fonction, page, n):
+    debut = time.perf_counter()
+    for _ in range(n):
+        fonction(page)
+    return (time.perf_counter() - debut) / n * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction du nombre de résultats Scholar : ancien vs nouveau")
+    parser.add_argument("-n", type=int, default=100, help="répétitions par page")
+    args = parser.parse_args()
+
+    print(f"{'page':<22} {'attendu':>9} {'ancien':>9} {'nouveau':>9} {'lus / total':>17} {'ancien ms':>10} {'nouveau ms':>11}")
+    total_ancien = total_nouveau = 0.0
+    erreurs_ancien = erreurs_nouveau = 0
+    for nom in sorted(ATTENDUS):
+        with open(os.path.join(DOSSIER_FIXTURES, nom), "rb") as f:
+            page = f.read()
+        attendu = ATTENDUS[nom]
+        ancien = ancien_extracteur(page)
+        nouveau, lus = nouvel_extracteur(page)
+        erreurs_ancien += ancien != attendu
+        erreurs_nouveau += nouveau != attendu
+        t_ancien = chronometrer(ancien_extracteur, page, args.n)
+        t_nouveau = chronometrer(nouvel_extracteur, page, args.n)
+        total_ancien += t_ancien
+        total_nouveau += t_nouveau
+        print(f"{nom:<22} {str(attendu):>9} {str(ancien):>9} {str(nouveau):>9} "
+              f"{lus:>8}/{len(page):<8} {t_ancien:10.3f} {t_nouveau:11.3f}")
+
+    print(f"\n⏱️ Temps total par série : ancien {total_ancien:.2f} ms, nouveau {total_nouveau:.2f} ms "
+          f"(×{total_ancien / total_nouveau:.0f})")
+    print(f"✅ Résultats faux : ancien {erreurs_ancien}/{len(ATTENDUS)}, nouveau {erreurs_nouveau}/{len(ATTENDUS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+##########################################################################
+#
+# Serveur local de substitution : Crossref, OpenAlex, Semantic Scholar, Scholar
+# ----------------------------------------------------------------------------
+#
+# Aucun script ne pouvait être lancé ni chronométré sans interroger les vraies
+# API : impossible de mesurer un changement de performance de façon
+# reproductible. Ce serveur HTTP/1.1 (keep-alive, gzip) répond à leur place.
+# Avec SCRIPTORIUM_SERVEUR_LOCAL=http://127.0.0.1:8765, le client commun
+# (commun/client_http.py) lui envoie toutes les requêtes, l'hôte d'origine
+# devenant le premier segment du chemin (/api.crossref.org/works...).
+#
+# Réponses rejouées :
+#   - api.crossref.org /works et /journals/{issn}/works : corpus de notices
+#     déterministe (graine fixe), pagination par curseur, filtres issn,
+#     from/until-pub-date et from-index-date, select, facette published,
+#     rows=0 ; /journals/{issn} : métadonnées de la revue ;
+#   - api.openalex.org /works : meta.count et group_by=publication_year ;
+#   - api.semanticscholar.org /graph/v1/paper/search : total ;
+#   - scholar.google.com /scholar : pages enregistrées de
+#     benchmarks/fixtures/scholar.
+# Les comptes par mot-clé × année sont déterministes : deux exécutions
+# reçoivent exactement les mêmes réponses.
+#
+# Réglages : latence ajoutée à chaque réponse, proportion de 429 injectés
+# (avec Retry-After), durée de vie des curseurs Crossref (un curseur inactif
+# plus longtemps renvoie 400, comme l'API réelle).
+#
+# Exemple (serveur seul, puis un script dans un autre terminal) :
+#   python benchmarks/serveur_local.py --port 8765 --latence 0.05 --taux-429 0.02
+#   SCRIPTORIUM_SERVEUR_LOCAL=http://127.0.0.1:8765 SCRIPTORIUM_CACHE=0 python get_doi.py
+#
+##########################################################################
+
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DOSSIER_SCHOLAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scholar")
+PAGES_SCHOLAR = ("en_about.html", "en_page2.html", "en_single.html", "en_zero.html",
+                 "fr_espaces.html", "de_points.html")
+
+# Revues du corpus : (titre, éditeur, ISSN imprimé, ISSN en ligne)
+REVUES = (
+    ("Journal of Development Studies", "Informa UK Limited", "0022-0388", "1743-9140"),
+    ("Revue de démonstration", "Éditions locales", "1234-5679", "2345-678X"),
+)
+NOTICES_PAR_DEFAUT = 20_000
+ROWS_PAR_DEFAUT = 20
+EXPIRATION_CURSEUR = 300.0   # secondes d'inactivité (Crossref : 5 minutes)
+
+
+# === CORPUS CROSSREF ===
+def generer_corpus(nb, graine=42):
+    """Notices Crossref synthétiques, toujours les mêmes pour une graine donnée."""
+    alea = random.Random(graine)
+    origine = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    notices = []
+    for i in range(nb):
+        titre, editeur, issn_p, issn_e = REVUES[i % len(REVUES)]
+        publie = date(1950, 1, 1) + timedelta(days=alea.randrange(75 * 365))
+        cree = origine + timedelta(seconds=alea.randrange(25 * 365 * 86400))
+        item = {
+            "DOI": f"10.5555/bench.{i}",
+            "URL": f"https://doi.org/10.5555/bench.{i}",
+            "title": [f"Titre de la publication {i}"],
+            "issued": {"date-parts": [[publie.year, publie.month, publie.day]]},
+            "created": {"date-time": cree.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "indexed": {"date-time": (cree + timedelta(days=alea.randrange(30))).strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "container-title": [titre],
+            "publisher": editeur,
+            "ISSN": [issn_p, issn_e],
+            "type": "journal-article",
+            # Champs lourds, que `select` permet d'éviter
+            "reference": [{"key": f"ref{j}", "unstructured": f"Référence {j} de la notice {i}."}
+                          for j in range(alea.randint(5, 40))],
+            "license": [{"URL": "https://creativecommons.org/licenses/by/4.0/", "content-version": "vor"}],
+        }
+        if alea.random() < 0.9:
+            item["author"] = [{"given": f"Prénom{j}", "family": f"Nom{i}-{j}"} for j in range(alea.randint(1, 6))]
+        if alea.random() < 0.4:
+            item["abstract"] = "<jats:p>" + "Résumé de la publication. " * alea.randint(5, 40) + "</jats:p>"
+        if alea.random() < 0.6:
+            item["subject"] = [f"Discipline {k}" for k in range(alea.randint(1, 3))]
+        notices.append(item)
+    return notices
+
+
+def compte_deterministe(requete, annee):
+    """Nombre de publications « attendu » pour (requête, année), stable d'une exécution à l'autre."""
+    return zlib.crc32(f"{requete.lower()}|{annee}".encode("utf-8")) % 5000
+
+
+def _date_filtre(valeur, fin=False):
+    """« AAAA », « AAAA-MM » ou « AAAA-MM-JJ » → date (début ou fin de la période)."""
+    parties = [int(p) for p in valeur.split("-")]
+    if len(parties) == 3:
+        return date(*parties)
+    if len(parties) == 2:
+        mois = date(parties[0], parties[1], 1)
+        return (mois.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1) if fin else mois
+    return date(parties[0], 12, 31) if fin else date(parties[0], 1, 1)
+
+
+def _date_issued(item):
+    a, m, j = (item["issued"]["date-parts"][0] + [1, 1])[:3]
+    return date(a, m, j)
+
+
+# === SERVEUR ===
+class ServeurLocal:
+    """Serveur de substitution dans un thread ; `stats` compte ce qui a été servi."""
+
+    def __init__(self, port=0, notices=NOTICES_PAR_DEFAUT, latence=0.0, taux_429=0.0, retry_after=0,
+                 expiration=EXPIRATION_CURSEUR, gzip_actif=True, graine=42):
+        self.corpus = generer_corpus(notices, graine)
+        self.latence = latence
+        self.taux_429 = taux_429
+        self.retry_after = retry_after
+        self.expiration = expiration
+        self.gzip_actif = gzip_actif
+        self._alea = random.Random(graine)
+        self._curseurs = {}
+        self._verrou = threading.Lock()
+        self._pages_scholar = {}
+        for nom in PAGES_SCHOLAR:
+            with open(os.path.join(DOSSIER_SCHOLAR, nom), "rb") as fichier:
+                self._pages_scholar[nom] = fichier.read()
+        self.remettre_a_zero()
+        self._serveur = ThreadingHTTPServer(("127.0.0.1", port), self._gestionnaire())
+        self._serveur.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._serveur.server_address[1]}"
+
+    def demarrer(self):
+        threading.Thread(target=self._serveur.serve_forever, name="serveur-local", daemon=True).start()
+        return self.url
+
+    def arreter(self):
+        self._serveur.shutdown()
+        self._serveur.server_close()
+
+    def remettre_a_zero(self):
+        with self._verrou:
+            self.stats = {"requetes": 0, "notices": 0, "octets": 0, "429": 0, "curseurs_expires": 0}
+
+    def _compter(self, **valeurs):
+        with self._verrou:
+            for cle, valeur in valeurs.items():
+                self.stats[cle] += valeur
+
+    # --- Crossref ---
+    def _filtrer(self, filtre, issn_chemin=None):
+        conditions = {}
+        for morceau in filter(None, (filtre or "").split(",")):
+            nom, _, valeur = morceau.partition(":")
+            conditions.setdefault(nom.strip(), []).append(valeur.strip())
+        issns = {v.replace("-", "").upper() for v in conditions.get("issn", [])}
+        if issn_chemin:
+            issns.add(issn_chemin.replace("-", "").upper())
+        debut = _date_filtre(conditions["from-pub-date"][0]) if "from-pub-date" in conditions else None
+        fin = _date_filtre(conditions["until-pub-date"][0], fin=True) if "until-pub-date" in conditions else None
+        indexe = conditions.get("from-index-date", [None])[0]
+        resultat = []
+        for item in self.corpus:
+            if issns and not issns.intersection(i.replace("-", "") for i in item["ISSN"]):
+                continue
+            if debut or fin:
+                publie = _date_issued(item)
+                if (debut and publie < debut) or (fin and publie > fin):
+                    continue
+            if indexe and item["indexed"]["date-time"][:10] < indexe:
+                continue
+            resultat.append(item)
+        return resultat
+
+    def crossref_works(self, params, issn_chemin=None):
+        resultats = self._filtrer(params.get("filter"), issn_chemin)
+        message = {"total-results": len(resultats), "items-per-page": 0, "items": []}
+        if "facet" in params:
+            valeurs = {}
+            for item in resultats:
+                annee = str(item["issued"]["date-parts"][0][0])
+                valeurs[annee] = valeurs.get(annee, 0) + 1
+            message["facets"] = {"published": {"value-count": len(valeurs), "values": valeurs}}
+        rows = int(params.get("rows", ROWS_PAR_DEFAUT))
+        curseur = params.get("cursor")
+        debut = int(params.get("offset", 0))
+        if curseur is not None:
+            maintenant = time.monotonic()
+            with self._verrou:
+                if curseur == "*":
+                    debut = 0
+                else:
+                    # Un curseur reste réutilisable tant qu'il sert (reprise après un arrêt)
+                    etat = self._curseurs.get(curseur)
+                    if etat is None or maintenant - etat[1] > self.expiration:
+                        self.stats["curseurs_expires"] += 1
+                        return 400, {"status": "failed", "message-type": "validation-failure",
+                                     "message": [{"type": "cursor-expired", "message": "Cursor expired or unknown"}]}
+                    debut = etat[0]
+                    self._curseurs[curseur] = (debut, maintenant)
+                suivant = uuid.uuid4().hex
+                self._curseurs[suivant] = (debut + rows, maintenant)
+            message["next-cursor"] = suivant
+        items = resultats[debut:debut + rows]
+        champs = params.get("select")
+        if champs:
+            garder = champs.split(",")
+            items = [{c: item[c] for c in garder if c in item} for item in items]
+        message["items"] = items
+        message["items-per-page"] = rows
+        self._compter(notices=len(items))
+        return 200, {"status": "ok", "message-type": "work-list", "message-version": "1.0.0", "message": message}
+
+    def crossref_revue(self, issn):
+        issn = issn.replace("-", "").upper()
+        for titre, editeur, issn_p, issn_e in REVUES:
+            if issn in (issn_p.replace("-", ""), issn_e.replace("-", "")):
+                self._compter(notices=1)
+                return 200, {"status": "ok", "message-type": "journal",
+                             "message": {"title": titre, "publisher": editeur, "ISSN": [issn_p, issn_e]}}
+        return 404, {"status": "error", "message": "Resource not found."}
+
+    # --- OpenAlex / Semantic Scholar ---
+    def openalex_works(self, params):
+        requete = params.get("search", "")
+        conditions = dict(c.partition(":")[::2] for c in params.get("filter", "").split(",") if c)
+        debut = _date_filtre(conditions.get("from_publication_date", "1900")).year
+        fin = _date_filtre(conditions.get("to_publication_date", str(date.today().year)), fin=True).year
+        comptes = {annee: compte_deterministe(requete, annee) for annee in range(debut, fin + 1)}
+        reponse = {"meta": {"count": sum(comptes.values()), "per_page": int(params.get("per-page", 25))},
+                   "results": []}
+        if params.get("group_by") == "publication_year":
+            reponse["group_by"] = [{"key": str(a), "key_display_name": str(a), "count": n}
+                                   for a, n in comptes.items() if n]
+            self._compter(notices=len(reponse["group_by"]))
+        else:
+            self._compter(notices=1)
+        return 200, reponse
+
+    def semantic_scholar(self, params):
+        self._compter(notices=1)
+        return 200, {"total": compte_deterministe(params.get("query", ""), params.get("year", "")),
+                     "offset": 0, "data": []}
+
+    def scholar(self, params):
+        cle = zlib.crc32(f"{params.get('q', '')}|{params.get('as_ylo', '')}".encode("utf-8"))
+        self._compter(notices=1)
+        return 200, self._pages_scholar[PAGES_SCHOLAR[cle % len(PAGES_SCHOLAR)]]
+
+    def repondre(self, chemin, params):
+        """(statut, corps JSON ou octets HTML) pour un chemin /hôte/ressource."""
+        hote, _, ressource = chemin.lstrip("/").partition("/")
+        segments = ressource.strip("/").split("/")
+        if hote == "api.crossref.org":
+            if segments == ["works"]:
+                return self.crossref_works(params)
+            if len(segments) == 3 and segments[0] == "journals" and segments[2] == "works":
+                return self.crossref_works(params, issn_chemin=segments[1])
+            if len(segments) == 2 and segments[0] == "journals":
+                return self.crossref_revue(segments[1])
+        elif hote == "api.openalex.org" and segments == ["works"]:
+            return self.openalex_works(params)
+        elif hote == "api.semanticscholar.org" and segments[-2:] == ["paper", "search"]:
+            return self.semantic_scholar(params)
+        elif hote == "scholar.google.com" and segments == ["scholar"]:
+            return self.scholar(params)
+        return 404, {"status": "error", "message": f"Ressource inconnue : {chemin}"}
+
+    def _gestionnaire(self):
+        serveur = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                morceaux = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(morceaux.query, keep_blank_values=True).items()}
+                if serveur.latence:
+                    time.sleep(serveur.latence)
+                with serveur._verrou:
+                    serveur.stats["requetes"] += 1
+                    refus = serveur.taux_429 and serveur._alea.random() < serveur.taux_429
+                en_tetes = {}
+                if refus:
+                    serveur._compter(**{"429": 1})
+                    statut, corps = 429, {"status": "error", "message": "Too Many Requests"}
+                    en_tetes["Retry-After"] = str(serveur.retry_after)
+                else:
+                    statut, corps = serveur.repondre(morceaux.path, params)
+                if morceaux.path.startswith("/api.crossref.org/"):
+                    # Débit annoncé comme l'API publique (le limiteur s'y règle)
+                    en_tetes.update({"X-Rate-Limit-Limit": "1000", "X-Rate-Limit-Interval": "1s"})
+                if isinstance(corps, bytes):
+                    type_contenu = "text/html; charset=UTF-8"
+                else:
+                    corps = json.dumps(corps, ensure_ascii=False).encode("utf-8")
+                    type_contenu = "application/json;charset=UTF-8"
+                if serveur.gzip_actif and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    corps = gzip.compress(corps, compresslevel=5)
+                    en_tetes["Content-Encoding"] = "gzip"
+                serveur._compter(octets=len(corps))
+                self.send_response(statut)
+                self.send_header("Content-Type", type_contenu)
+                self.send_header("Content-Length", str(len(corps)))
+                for nom, valeur in en_tetes.items():
+                    self.send_header(nom, valeur)
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        return Gestionnaire
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local de substitution des API (Crossref, OpenAlex, S2, Scholar)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--notices", type=int, default=NOTICES_PAR_DEFAUT, help="taille du corpus Crossref")
+    parser.add_argument("--latence", type=float, default=0.0, help="secondes ajoutées à chaque réponse")
+    parser.add_argument("--taux-429", type=float, default=0.0, help="proportion de réponses 429 injectées")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After des 429 (secondes)")
+    parser.add_argument("--expiration", type=float, default=EXPIRATION_CURSEUR,
+                        help="durée de vie d'un curseur inactif (secondes)")
+    args = parser.parse_args()
+
+    serveur = ServeurLocal(args.port, args.notices, args.latence, args.taux_429, args.retry_after, args.expiration)
+    print(f"🧪 Serveur local : {serveur.url} ({len(serveur.corpus)} notices Crossref)")
+    print(f"   export SCRIPTORIUM_SERVEUR_LOCAL={serveur.url} SCRIPTORIUM_CACHE=0")
+    try:
+        serveur._serveur.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {serveur.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Outils communs aux scripts d'extraction (Crossref, OpenAlex, Semantic Scholar, Google Scholar).
@@ -0,0 +1,178 @@
+##########################################################################
+#
+# Cache SQLite des comptages mot-clé × année
+# ------------------------------------------
+#
+# Les scripts `keyword_occurrences_*` relancent les mêmes grilles (dizaines de
+# mots-clés × dizaines d'années) d'une semaine à l'autre. Chaque cellule est
+# ici gardée sur disque, sous la clé (source, requête normalisée, année, filtre).
+#
+# La durée de validité dépend de l'âge de l'année interrogée : le compte d'une
+# année ancienne ne bouge presque plus, celui de l'année en cours change
+# chaque jour. Une relance n'interroge donc que les cellules encore vivantes.
+#
+# Emplacement : variable d'environnement SCRIPTORIUM_CACHE, sinon
+# ~/.scriptorium/comptes.sqlite (SCRIPTORIUM_CACHE=0 désactive le cache).
+#
+##########################################################################
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import date
+
+CHEMIN_CACHE = os.environ.get(
+    "SCRIPTORIUM_CACHE",
+    os.path.join(os.path.expanduser("~"), ".scriptorium", "comptes.sqlite"),
+)
+
+JOUR = 86400
+
+# Durée de validité selon l'âge de l'année (année courante - année interrogée).
+# Lue dans l'ordre : la première ligne dont l'âge maximum convient s'applique.
+DUREES_PAR_AGE = (
+    (0, 1 * JOUR),        # année en cours (ou future) : un jour
+    (1, 7 * JOUR),        # année précédente : indexation encore active
+    (4, 30 * JOUR),
+    (9, 180 * JOUR),
+    (None, 365 * JOUR),   # années anciennes : quasi figées
+)
+
+
+def normaliser(requete):
+    """Forme canonique d'une requête : Unicode NFKC, minuscules, espaces réduits."""
+    requete = unicodedata.normalize("NFKC", str(requete)).casefold()
+    return re.sub(r"\s+", " ", requete).strip()
+
+
+def duree_de_vie(annee, aujourd_hui=None):
+    """Durée de validité (secondes) d'un compte pour `annee`."""
+    age = (aujourd_hui or date.today()).year - int(annee)
+    for age_max, duree in DUREES_PAR_AGE:
+        if age_max is None or age <= age_max:
+            return duree
+
+
+class CacheComptes:
+    """
+    Cache persistant des comptes (source, requête, année, filtre) → nombre.
+    Partageable entre threads ; les statistiques portent sur le processus.
+    """
+
+    def __init__(self, chemin=CHEMIN_CACHE):
+        self.chemin = chemin
+        if chemin != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute(
+            "CREATE TABLE IF NOT EXISTS comptes ("
+            " source TEXT NOT NULL, requete TEXT NOT NULL, annee INTEGER NOT NULL,"
+            " filtre TEXT NOT NULL, valeur INTEGER NOT NULL, obtenu REAL NOT NULL,"
+            " PRIMARY KEY (source, requete, annee, filtre))"
+        )
+        self._connexion.commit()
+        self.stats = {"trouves": 0, "absents": 0, "expires": 0, "ecrits": 0}
+
+    def lire(self, source, requete, annee, filtre=""):
+        """Compte en cache encore valide, sinon None."""
+        with self._verrou:
+            ligne = self._connexion.execute(
+                "SELECT valeur, obtenu FROM comptes"
+                " WHERE source = ? AND requete = ? AND annee = ? AND filtre = ?",
+                (source, normaliser(requete), int(annee), filtre),
+            ).fetchone()
+            if ligne is None:
+                self.stats["absents"] += 1
+                return None
+            valeur, obtenu = ligne
+            if time.time() - obtenu > duree_de_vie(annee):
+                self.stats["expires"] += 1
+                return None
+            self.stats["trouves"] += 1
+            return valeur
+
+    def ecrire(self, source, requete, annee, valeur, filtre=""):
+        """Enregistre un compte (les échecs, None, ne sont jamais mis en cache)."""
+        if valeur is None:
+            return
+        with self._verrou:
+            self._connexion.execute(
+                "INSERT OR REPLACE INTO comptes VALUES (?, ?, ?, ?, ?, ?)",
+                (source, normaliser(requete), int(annee), filtre, int(valeur), time.time()),
+            )
+            self._connexion.commit()
+            self.stats["ecrits"] += 1
+
+    def obtenir(self, source, requete, annee, calculer, filtre=""):
+        """Renvoie le compte en cache, ou appelle `calculer()` et garde son résultat."""
+        valeur = self.lire(source, requete, annee, filtre)
+        if valeur is None:
+            valeur = calculer()
+            self.ecrire(source, requete, annee, valeur, filtre)
+        return valeur
+
+    def purger(self):
+        """Supprime les entrées expirées ; renvoie leur nombre."""
+        aujourd_hui = date.today()
+        maintenant = time.time()
+        with self._verrou:
+            lignes = self._connexion.execute("SELECT rowid, annee, obtenu FROM comptes").fetchall()
+            expirees = [(rowid,) for rowid, annee, obtenu in lignes
+                        if maintenant - obtenu > duree_de_vie(annee, aujourd_hui)]
+            self._connexion.executemany("DELETE FROM comptes WHERE rowid = ?", expirees)
+            self._connexion.commit()
+        return len(expirees)
+
+    def resume(self):
+        """Ligne de statistiques à afficher en fin de script."""
+        s = self.stats
+        demandes = s["trouves"] + s["absents"] + s["expires"]
+        taux = s["trouves"] / demandes if demandes else 0.0
+        return (f"🗃️ Cache : {s['trouves']}/{demandes} cellules trouvées ({taux:.0%}), "
+                f"{s['absents']} absentes, {s['expires']} expirées, {s['ecrits']} enregistrées")
+
+    def fermer(self):
+        with self._verrou:
+            self._connexion.close()
+
+
+class _SansCache:
+    """Remplaçant neutre quand le cache est désactivé."""
+
+    stats = {"trouves": 0, "absents": 0, "expires": 0, "ecrits": 0}
+
+    def lire(self, *args, **kwargs):
+        return None
+
+    def ecrire(self, *args, **kwargs):
+        pass
+
+    def obtenir(self, source, requete, annee, calculer, filtre=""):
+        return calculer()
+
+    def purger(self):
+        return 0
+
+    def resume(self):
+        return "🗃️ Cache désactivé"
+
+    def fermer(self):
+        pass
+
+
+_cache = None
+_verrou_cache = threading.Lock()
+
+
+def cache_partage():
+    """Renvoie le cache du processus (ouvert au premier appel)."""
+    global _cache
+    with _verrou_cache:
+        if _cache is None:
+            _cache = _SansCache() if CHEMIN_CACHE in ("", "0") else CacheComptes()
+        return _cache
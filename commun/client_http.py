@@ -0,0 +1,324 @@
+##########################################################################
+#
+# Client HTTP partagé (connexions persistantes) pour tous les scripts
+# ------------------------------------------------------------------
+#
+# Un appel à `requests.get` ou un nouveau `build_opener()` par requête ouvre
+# à chaque fois une nouvelle connexion TCP + TLS. Ce module garde une seule
+# session par processus, avec un groupe de connexions persistantes par hôte
+# (keep-alive), réutilisées d'une requête à l'autre et entre threads.
+#
+# Politique commune à toutes les requêtes :
+#   - compression gzip / deflate acceptée ;
+#   - délais : 10 s pour se connecter, 30 s pour lire la réponse ;
+#   - User-Agent « poli » avec adresse de contact (mailto) ;
+#   - rythme réglé par le limiteur de l'hôte (commun/limiteur.py), avec
+#     nouvelle tentative automatique sur 429 / 503 ;
+#   - HTTP/2 (multiplexage) en option, si `httpx` et `h2` sont installés ;
+#   - chaque requête est mesurée (latence, octets, statut, nouvelles
+#     tentatives, attente du limiteur) dans commun/mesures.py, et compte
+#     dans la phase « fetch » (attente du limiteur et en-têtes de réponse).
+#
+# Avec SCRIPTORIUM_SERVEUR_LOCAL=http://hôte:port, toutes les requêtes partent
+# vers ce serveur de substitution (benchmarks/serveur_local.py), l'hôte
+# d'origine devenant le premier segment du chemin ; limiteur et mesures
+# restent ceux de l'hôte d'origine.
+#
+# `ClientHTTPAsync` offre la même politique aux tâches asyncio : client
+# `httpx.AsyncClient` si httpx est installé, sinon le client partagé exécuté
+# dans des threads. Le nombre de requêtes simultanées est plafonné.
+#
+##########################################################################
+
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from commun.limiteur import limiteur_pour
+from commun.mesures import MESURES
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (requis par httpx pour HTTP/2)
+    HTTP2_DISPONIBLE = httpx is not None
+except ImportError:
+    HTTP2_DISPONIBLE = False
+
+EMAIL = "votre.email@example.com"  # à modifier
+USER_AGENT = f"scriptorium/1.0 (mailto:{EMAIL})"
+DELAIS = (10, 30)          # (connexion, lecture) en secondes
+CONNEXIONS_PAR_HOTE = 16
+TENTATIVES_429 = 5
+CONCURRENCE = 4            # requêtes simultanées par défaut (client asyncio)
+SERVEUR_LOCAL = os.environ.get("SCRIPTORIUM_SERVEUR_LOCAL", "").rstrip("/")
+
+
+def reessayable(statut):
+    """Statut HTTP qui justifie une nouvelle tentative (429, 5xx) ; les autres 4xx sont définitifs."""
+    return statut == 429 or statut >= 500
+
+
+def url_effective(url):
+    """URL réellement interrogée : inchangée, ou redirigée vers le serveur local de substitution."""
+    if not SERVEUR_LOCAL:
+        return url
+    morceaux = urlsplit(url)
+    return f"{SERVEUR_LOCAL}/{morceaux.hostname}{morceaux.path}" + (f"?{morceaux.query}" if morceaux.query else "")
+
+
+def _compter_flux(reponse, hote):
+    """Compte dans les mesures les octets d'une réponse en flux, au fil de la lecture."""
+    iter_content = reponse.iter_content
+
+    def compter(*args, **kwargs):
+        for morceau in iter_content(*args, **kwargs):
+            MESURES.octets(hote, len(morceau))
+            yield morceau
+
+    reponse.iter_content = compter
+    return reponse
+
+
+class _ReponseHttpx:
+    """Donne à une réponse httpx l'interface de `requests` utilisée par les scripts."""
+
+    def __init__(self, reponse):
+        self._reponse = reponse
+        self.status_code = reponse.status_code
+        self.headers = reponse.headers
+        self.url = str(reponse.url)
+        self.reason = reponse.reason_phrase
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            self.close()
+            raise requests.exceptions.HTTPError(f"{self.status_code} {self.reason} : {self.url}", response=self)
+
+    def iter_content(self, chunk_size=65536):
+        try:
+            yield from self._reponse.iter_bytes(chunk_size)
+        finally:
+            self.close()
+
+    @property
+    def content(self):
+        contenu = self._reponse.read()
+        self.close()
+        return contenu
+
+    @property
+    def text(self):
+        self._reponse.read()
+        self.close()
+        return self._reponse.text
+
+    def json(self):
+        self._reponse.read()
+        self.close()
+        return self._reponse.json()
+
+    def close(self):
+        self._reponse.close()
+
+
+class ClientHTTP:
+    """Session HTTP partagée : connexions persistantes par hôte + limiteur de débit."""
+
+    def __init__(self, http2=False, connexions_par_hote=CONNEXIONS_PAR_HOTE, user_agent=USER_AGENT):
+        self.http2 = http2 and HTTP2_DISPONIBLE
+        self.en_tetes = {
+            "User-Agent": user_agent,
+            "Accept-Encoding": "gzip, deflate",
+        }
+        if self.http2:
+            self._httpx = httpx.Client(
+                http2=True,
+                headers=self.en_tetes,
+                timeout=httpx.Timeout(DELAIS[1], connect=DELAIS[0]),
+                limits=httpx.Limits(max_keepalive_connections=connexions_par_hote),
+                follow_redirects=True,
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(self.en_tetes)
+            # Nouvelles tentatives sur les échecs de connexion et les erreurs
+            # serveur transitoires ; 429 / 503 passent par le limiteur (voir `get`).
+            adaptateur = HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=connexions_par_hote,
+                max_retries=Retry(total=5, connect=3, read=0, status=3, backoff_factor=1,
+                                  status_forcelist=(500, 502, 504), raise_on_status=False),
+            )
+            self.session.mount("http://", adaptateur)
+            self.session.mount("https://", adaptateur)
+
+    def _envoyer(self, url, params, headers, stream, timeout):
+        url = url_effective(url)
+        if not self.http2:
+            return self.session.get(url, params=params, headers=headers, stream=stream, timeout=timeout)
+        try:
+            requete = self._httpx.build_request("GET", url, params=params, headers=headers,
+                                                timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+            return _ReponseHttpx(self._httpx.send(requete, stream=True))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=DELAIS,
+            limiter=True, tentatives_429=TENTATIVES_429, mesurer=True):
+        """
+        GET au rythme permis par le limiteur de l'hôte.
+        Sur 429 / 503, on respecte Retry-After puis on réessaie `tentatives_429` fois ;
+        la dernière réponse est renvoyée telle quelle (à tester avec raise_for_status).
+        `mesurer=False` : requête ni comptée ni chronométrée (déjà mesurée par l'appelant).
+        """
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        limiteur = limiteur_pour(url) if limiter else None
+        if not mesurer:
+            return self._get(url, params, headers, stream, timeout, limiteur, tentatives_429, mesurer)
+        with MESURES.phase("fetch"):
+            return self._get(url, params, headers, stream, timeout, limiteur, tentatives_429, mesurer)
+
+    def _get(self, url, params, headers, stream, timeout, limiteur, tentatives_429, mesurer):
+        hote = urlsplit(url).hostname
+        for tentative in range(tentatives_429 + 1):
+            attente = limiteur.attendre() if limiteur else 0.0
+            debut = time.perf_counter()
+            try:
+                reponse = self._envoyer(url, params, headers, stream, timeout)
+            except requests.exceptions.RequestException:
+                if mesurer:
+                    MESURES.requete(hote, time.perf_counter() - debut, tentatives=min(tentative, 1), attente=attente)
+                raise
+            if mesurer:
+                flux = stream
+                MESURES.requete(hote, time.perf_counter() - debut, 0 if flux else len(reponse.content),
+                                reponse.status_code, min(tentative, 1), attente)
+                if flux:
+                    _compter_flux(reponse, hote)
+            if reponse.status_code not in (429, 503):
+                if limiteur and reponse.status_code < 400:
+                    limiteur.mettre_a_jour(reponse.headers)
+                return reponse
+            if limiteur:
+                limiteur.signaler_429(reponse.headers)
+            if tentative < tentatives_429:
+                reponse.close()
+        return reponse
+
+    def fermer(self):
+        if self.http2:
+            self._httpx.close()
+        else:
+            self.session.close()
+
+
+class ClientHTTPAsync:
+    """
+    Client pour asyncio, à utiliser avec `async with` :
+    au plus `concurrence` requêtes en vol, rythme réglé par le limiteur de l'hôte.
+    Sur 429 / 503, c'est tout l'hôte qui est suspendu (pas seulement la tâche).
+    """
+
+    def __init__(self, concurrence=CONCURRENCE, user_agent=USER_AGENT):
+        self.concurrence = concurrence
+        self.en_tetes = {"User-Agent": user_agent, "Accept-Encoding": "gzip, deflate"}
+        self._httpx = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrence)
+        if httpx is not None:
+            self._httpx = httpx.AsyncClient(
+                http2=HTTP2_DISPONIBLE,
+                headers=self.en_tetes,
+                timeout=httpx.Timeout(DELAIS[1], connect=DELAIS[0]),
+                limits=httpx.Limits(max_connections=self.concurrence),
+                follow_redirects=True,
+            )
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._httpx is not None:
+            await self._httpx.aclose()
+            self._httpx = None
+        return False
+
+    async def _envoyer(self, url, params, headers):
+        if self._httpx is not None:
+            try:
+                return await self._httpx.get(url_effective(url), params=params, headers=headers)
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e))
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e))
+        # Sans httpx : client partagé (connexions persistantes) dans un thread
+        return await asyncio.to_thread(client().get, url, params=params, headers=headers,
+                                       limiter=False, tentatives_429=0, mesurer=False)
+
+    async def get(self, url, params=None, headers=None, limiter=True, tentatives_429=TENTATIVES_429):
+        """Équivalent asynchrone de `ClientHTTP.get` (réponse lue en entier)."""
+        limiteur = limiteur_pour(url) if limiter else None
+        with MESURES.phase("fetch"):
+            return await self._get(url, params, headers, limiteur, tentatives_429)
+
+    async def _get(self, url, params, headers, limiteur, tentatives_429):
+        hote = urlsplit(url).hostname
+        for tentative in range(tentatives_429 + 1):
+            attente = await limiteur.attendre_async() if limiteur else 0.0
+            async with self._semaphore:
+                debut = time.perf_counter()
+                try:
+                    reponse = await self._envoyer(url, params, headers)
+                except requests.exceptions.RequestException:
+                    MESURES.requete(hote, time.perf_counter() - debut, tentatives=min(tentative, 1), attente=attente)
+                    raise
+            MESURES.requete(hote, time.perf_counter() - debut, len(reponse.content),
+                            reponse.status_code, min(tentative, 1), attente)
+            if reponse.status_code not in (429, 503):
+                if limiteur and reponse.status_code < 400:
+                    limiteur.mettre_a_jour(reponse.headers)
+                return reponse
+            if limiteur:
+                limiteur.signaler_429(reponse.headers)
+        return reponse
+
+
+_client = None
+_verrou = threading.Lock()
+
+
+def client():
+    """Renvoie le client partagé du processus (créé au premier appel)."""
+    global _client
+    with _verrou:
+        if _client is None:
+            _client = ClientHTTP()
+        return _client
+
+
+def configurer(**options):
+    """Remplace le client partagé (ex. `configurer(http2=True)`)."""
+    global _client
+    with _verrou:
+        if _client is not None:
+            _client.fermer()
+        _client = ClientHTTP(**options)
+        return _client
+
+
+def get(url, params=None, **options):
+    """Raccourci : GET via le client partagé."""
+    return client().get(url, params=params, **options)
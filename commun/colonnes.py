@@ -0,0 +1,116 @@
+##########################################################################
+#
+# Construction colonne par colonne du tableau d'une page Crossref
+# ---------------------------------------------------------------
+#
+# Les scripts construisaient un dictionnaire par notice (chaînes de
+# `item.get`, jointure des auteurs...), puis `pd.DataFrame(liste_de_dicts)`
+# refaisait une seconde conversion ligne par ligne. Ici, chaque colonne du
+# schéma de sortie (commun/schemas.py) est remplie d'un seul passage sur les
+# notices de la page, directement dans sa propre liste : aucun dictionnaire
+# intermédiaire par notice, et le tableau final est assemblé à partir de
+# colonnes déjà prêtes (DataFrame, ou table Arrow si pyarrow est présent).
+#
+# Les conversions ci-dessous reproduisent exactement les anciennes fonctions
+# `extraire_ligne` des scripts. La lecture des notices (page en flux) est
+# chronométrée comme phase « parse », les conversions comme « transform ».
+#
+##########################################################################
+
+import pandas as pd
+
+from commun.mesures import MESURES
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# === CONVERSIONS D'UNE COLONNE DE CHAMPS CROSSREF ===
+# Chaque conversion reçoit toutes les valeurs du champ pour la page (None si
+# absent) et renvoie la colonne : une seule compréhension par colonne, sans
+# appel de fonction par notice.
+def premier(valeurs):
+    """Premier élément d'une liste Crossref (title, container-title...)."""
+    return [v[0] if v else "" for v in valeurs]
+
+
+def auteurs(separateur=", ", nettoyer=False):
+    """Listes `author` → « Prénom Nom » joints par `separateur`."""
+    if nettoyer:
+        def convertir(valeurs):
+            return [separateur.join([f"{a.get('given', '')} {a.get('family', '')}".strip() for a in v])
+                    if v else "" for v in valeurs]
+    else:
+        def convertir(valeurs):
+            return [separateur.join([f"{a.get('given', '')} {a.get('family', '')}" for a in v])
+                    if v else "" for v in valeurs]
+    return convertir
+
+
+def annee(valeurs):
+    """Champs de date (`issued`...) → année, ou None."""
+    parties = [(v or {}).get("date-parts", [[None]]) for v in valeurs]
+    return [p[0][0] if p else None for p in parties]
+
+
+def date_texte(valeurs):
+    """Champs de date → « AAAA-MM-JJ » (autant de parties que fournies)."""
+    return ["-".join(map(str, (v or {}).get("date-parts", [[None]])[0])) for v in valeurs]
+
+
+def date_heure(valeurs):
+    """Champs `created` / `indexed` → horodatage ISO."""
+    return [(v or {}).get("date-time", "") for v in valeurs]
+
+
+def jointure(separateur=", "):
+    """Listes de chaînes (subject, ISSN...) → chaînes jointes."""
+    def convertir(valeurs):
+        return [separateur.join(v) if v else "" for v in valeurs]
+    return convertir
+
+
+# === CONSTRUCTEUR ===
+class ConstructeurColonnes:
+    """
+    Tableau d'une page à partir des colonnes d'un schéma.
+    Chaque colonne est (nom, champ Crossref, conversion) ; sans conversion,
+    le champ est repris tel quel ("" s'il est absent).
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+
+    def colonnes(self, items):
+        """{nom: liste de valeurs}, une passe par colonne sur les notices de la page."""
+        if not isinstance(items, list):
+            with MESURES.phase("parse"):
+                items = list(items)
+        colonnes = {}
+        with MESURES.phase("transform"):
+            for nom, champ, conversion in self.schema.colonnes:
+                if conversion is None:
+                    colonnes[nom] = [item.get(champ, "") for item in items]
+                else:
+                    colonnes[nom] = conversion([item.get(champ) for item in items])
+        return colonnes
+
+    def tableau(self, items):
+        """DataFrame de la page (colonnes dans l'ordre du schéma)."""
+        return pd.DataFrame(self.colonnes(items), columns=list(self.schema.noms))
+
+    def construire(self, items):
+        """Tableau de la page pour le magasin : table Arrow si pyarrow est présent, sinon DataFrame."""
+        return self.tableau(items) if pa is None else self.table_arrow(items)
+
+    def table_arrow(self, items):
+        """Table Arrow de la page (pyarrow requis)."""
+        if pa is None:
+            raise ImportError("pyarrow est nécessaire pour construire une table Arrow.")
+        # Types fixés par le schéma : toutes les pages donnent des segments compatibles,
+        # même quand une colonne est entièrement vide sur une page
+        types = pa.schema([(nom, pa.int64() if conversion is annee else pa.string())
+                           for nom, _, conversion in self.schema.colonnes])
+        return pa.table(self.colonnes(items), schema=types)
@@ -0,0 +1,351 @@
+##########################################################################
+#
+# File de travaux partagée : baux, battements de cœur, partitions, fusion
+# ----------------------------------------------------------------------
+#
+# Un lot (commun/travaux.py) tourne dans un seul processus, sur un seul cœur.
+# Ici le lot est déposé dans une file SQLite ; N processus travailleurs,
+# sur une ou plusieurs machines qui partagent un système de fichiers, y
+# prennent les travaux un par un :
+#   - un travail de comptes ou de récolte est découpé par mot-clé à
+#     l'entrée dans la file : chaque mot-clé est un travail à part ;
+#   - prendre un travail, c'est poser un bail (travailleur, échéance) dans
+#     une transaction BEGIN IMMEDIATE : deux travailleurs ne prennent jamais
+#     le même ; un battement de cœur prolonge le bail tant que le travail
+#     tourne ;
+#   - un bail échu (machine arrêtée, processus tué) rend le travail à la
+#     file : le suivant le reprend dans la même partition (reprise exacte
+#     des récoltes, journal des grilles). Au-delà de MAX_TENTATIVES, le
+#     travail passe en échec ;
+#   - chaque travail écrit dans sa partition, dossier/partitions/<nom>/
+#     (sortie console comprise, sortie.txt) ; `fusionner` regroupe
+#     ensuite les partitions terminées dans dossier/fusion/ : un tableau
+#     comparatif par source et par lot de comptes, un fichier par lot de
+#     récoltes (colonne Mot-clé), un tableau DOI / date pour toutes les
+#     revues (colonne ISSN).
+#
+# La file reste en mode journal classique (pas de WAL) : sur un partage
+# réseau, seuls les verrous de fichiers sont fiables. Chaque travailleur
+# garde ses propres limiteurs de débit ; les 429 / Retry-After des API
+# ralentissent chacun d'eux : la capacité croît avec le nombre de
+# travailleurs jusqu'aux limites des API.
+#
+##########################################################################
+
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from commun.sortie import format_de, lire_morceaux, nom_sortie, ouvrir_ecrivain
+
+DUREE_BAIL = 300        # secondes sans battement de cœur avant qu'un travail soit repris
+MAX_TENTATIVES = 3
+PAUSE_ATTENTE = 5       # secondes entre deux regards sur une file sans travail libre
+ETATS = ("attente", "en_cours", "termine", "echec")
+
+
+def nom_sur(texte):
+    """Nom de travail utilisable comme nom de dossier."""
+    return re.sub(r"\W+", "_", texte.lower()).strip("_") or "travail"
+
+
+def decouper(travail):
+    """Un travail par mot-clé pour les comptes et les récoltes ; (groupe, [travaux])."""
+    if travail["type"] == "doi":
+        return "doi", [dict(travail, nom=nom_sur(travail["nom"]))]
+    groupe = nom_sur(travail["nom"])
+    morceaux, noms = [], set()
+    for mot in travail["mots_cles"]:
+        nom = f"{groupe}-{nom_sur(mot)}"
+        while nom in noms:
+            nom += "_"
+        noms.add(nom)
+        morceaux.append(dict(travail, nom=nom, mots_cles=[mot]))
+    return groupe, morceaux
+
+
+class FileTravaux:
+    """File de travaux SQLite partageable entre processus et machines (une connexion par opération)."""
+
+    def __init__(self, chemin, duree_bail=DUREE_BAIL, max_tentatives=MAX_TENTATIVES):
+        self.chemin = os.path.abspath(chemin)   # les travaux changent de dossier courant (partitions)
+        self.duree_bail = duree_bail
+        self.max_tentatives = max_tentatives
+        os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+        with self._transaction() as connexion:
+            connexion.execute(
+                "CREATE TABLE IF NOT EXISTS travaux ("
+                " id INTEGER PRIMARY KEY, nom TEXT UNIQUE NOT NULL, groupe TEXT NOT NULL,"
+                " type TEXT NOT NULL, travail TEXT NOT NULL, format TEXT,"
+                " etat TEXT NOT NULL DEFAULT 'attente', tentatives INTEGER NOT NULL DEFAULT 0,"
+                " travailleur TEXT, bail REAL, fichiers TEXT, erreur TEXT,"
+                " depose REAL, debut REAL, fin REAL)"
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # Verrou d'écriture pris d'emblée : lecture et mise à jour sans course entre travailleurs
+        connexion = sqlite3.connect(self.chemin, timeout=60, isolation_level=None)
+        connexion.row_factory = sqlite3.Row
+        try:
+            connexion.execute("BEGIN IMMEDIATE")
+            yield connexion
+            connexion.execute("COMMIT")
+        except BaseException:
+            connexion.execute("ROLLBACK")
+            raise
+        finally:
+            connexion.close()
+
+    # === DÉPÔT ===
+    def deposer(self, lot):
+        """Dépose les travaux d'un lot vérifié (découpés par mot-clé) ; renvoie (déposés, déjà présents)."""
+        deposes = presents = 0
+        with self._transaction() as connexion:
+            for travail in lot["travaux"]:
+                groupe, morceaux = decouper(travail)
+                for morceau in morceaux:
+                    curseur = connexion.execute(
+                        "INSERT OR IGNORE INTO travaux (nom, groupe, type, travail, format, depose)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (morceau["nom"], groupe, morceau["type"], json.dumps(morceau, ensure_ascii=False),
+                         lot.get("format"), time.time()))
+                    deposes += curseur.rowcount
+                    presents += 1 - curseur.rowcount
+        return deposes, presents
+
+    # === BAUX ===
+    def prendre(self, travailleur):
+        """Pose un bail sur le prochain travail libre (ou au bail échu) ; renvoie le travail, ou None."""
+        maintenant = time.time()
+        with self._transaction() as connexion:
+            connexion.execute(
+                "UPDATE travaux SET etat = 'echec', erreur = 'bail échu trop souvent', fin = ?"
+                " WHERE etat = 'en_cours' AND bail < ? AND tentatives >= ?",
+                (maintenant, maintenant, self.max_tentatives))
+            ligne = connexion.execute(
+                "SELECT * FROM travaux WHERE etat = 'attente' OR (etat = 'en_cours' AND bail < ?)"
+                " ORDER BY id LIMIT 1", (maintenant,)).fetchone()
+            if ligne is None:
+                return None
+            connexion.execute(
+                "UPDATE travaux SET etat = 'en_cours', travailleur = ?, bail = ?, tentatives = tentatives + 1,"
+                " debut = ? WHERE id = ?", (travailleur, maintenant + self.duree_bail, maintenant, ligne["id"]))
+        travail = json.loads(ligne["travail"])
+        travail.update(id=ligne["id"], tentative=ligne["tentatives"] + 1, format=ligne["format"])
+        return travail
+
+    def prolonger(self, id_travail, travailleur):
+        """Battement de cœur : repousse l'échéance du bail ; False si le bail a été perdu."""
+        with self._transaction() as connexion:
+            return connexion.execute(
+                "UPDATE travaux SET bail = ? WHERE id = ? AND travailleur = ? AND etat = 'en_cours'",
+                (time.time() + self.duree_bail, id_travail, travailleur)).rowcount == 1
+
+    def terminer(self, id_travail, travailleur, fichiers):
+        """Déclare le travail terminé ; False si le bail a été perdu (travail repris ailleurs)."""
+        with self._transaction() as connexion:
+            return connexion.execute(
+                "UPDATE travaux SET etat = 'termine', fichiers = ?, erreur = NULL, fin = ?"
+                " WHERE id = ? AND travailleur = ? AND etat = 'en_cours'",
+                (json.dumps(fichiers, ensure_ascii=False), time.time(), id_travail, travailleur)).rowcount == 1
+
+    def echouer(self, id_travail, travailleur, erreur):
+        """Rend le travail à la file, ou le passe en échec après MAX_TENTATIVES."""
+        with self._transaction() as connexion:
+            return connexion.execute(
+                "UPDATE travaux SET etat = CASE WHEN tentatives >= ? THEN 'echec' ELSE 'attente' END,"
+                " erreur = ?, fin = ? WHERE id = ? AND travailleur = ? AND etat = 'en_cours'",
+                (self.max_tentatives, str(erreur), time.time(), id_travail, travailleur)).rowcount == 1
+
+    def relancer_echecs(self):
+        """Remet les travaux en échec dans la file ; renvoie leur nombre."""
+        with self._transaction() as connexion:
+            return connexion.execute(
+                "UPDATE travaux SET etat = 'attente', tentatives = 0, travailleur = NULL, bail = NULL"
+                " WHERE etat = 'echec'").rowcount
+
+    # === ÉTAT ===
+    def travaux(self, etat=None):
+        with self._transaction() as connexion:
+            if etat is None:
+                return [dict(l) for l in connexion.execute("SELECT * FROM travaux ORDER BY id")]
+            return [dict(l) for l in connexion.execute("SELECT * FROM travaux WHERE etat = ? ORDER BY id", (etat,))]
+
+    def compter(self):
+        """{état: nombre de travaux}."""
+        with self._transaction() as connexion:
+            comptes = dict(connexion.execute("SELECT etat, COUNT(*) FROM travaux GROUP BY etat").fetchall())
+        return {etat: comptes.get(etat, 0) for etat in ETATS}
+
+    def resume(self):
+        c = self.compter()
+        return (f"📬 File : {c['attente']} en attente, {c['en_cours']} en cours, "
+                f"{c['termine']} terminés, {c['echec']} en échec")
+
+
+# === TRAVAILLEURS ===
+def identifiant_travailleur():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _battre(file, id_travail, travailleur, arret):
+    """Thread de battement de cœur : prolonge le bail toutes les DUREE_BAIL / 3 secondes."""
+    while not arret.wait(file.duree_bail / 3):
+        try:
+            if not file.prolonger(id_travail, travailleur):
+                print(f"⚠️ {travailleur} : bail perdu pour le travail {id_travail}")
+                return
+        except sqlite3.Error as e:
+            print(f"⚠️ {travailleur} : battement de cœur manqué ({e})")
+
+
+def travailler(chemin_file, dossier, duree_bail=DUREE_BAIL):
+    """
+    Boucle d'un travailleur : prend un travail, l'exécute dans sa partition,
+    le déclare terminé ou en échec, jusqu'à ce que la file soit vide (les
+    travaux en cours ailleurs sont attendus : leur bail peut échoir).
+    Renvoie le nombre de travaux terminés par ce travailleur.
+    """
+    from commun.travaux import executer_lot
+
+    file = FileTravaux(chemin_file, duree_bail=duree_bail)
+    travailleur = identifiant_travailleur()
+    termines = 0
+    while True:
+        travail = file.prendre(travailleur)
+        if travail is None:
+            comptes = file.compter()
+            if comptes["attente"] + comptes["en_cours"] == 0:
+                return termines
+            time.sleep(PAUSE_ATTENTE)
+            continue
+        id_travail = travail.pop("id")
+        tentative = travail.pop("tentative")
+        format_sortie = travail.pop("format")
+        if tentative > 1:
+            travail["reprise"] = True   # reprise exacte de la récolte laissée par le bail échu
+        partition = os.path.abspath(os.path.join(dossier, "partitions", travail["nom"]))
+        os.makedirs(partition, exist_ok=True)
+        print(f"🧵 {travailleur} prend {travail['nom']} (tentative {tentative})")
+
+        arret = threading.Event()
+        battement = threading.Thread(target=_battre, args=(file, id_travail, travailleur, arret), daemon=True)
+        battement.start()
+        debut = time.perf_counter()
+        try:
+            with open(os.path.join(partition, "sortie.txt"), "a", encoding="utf-8", buffering=1) as sortie, \
+                    contextlib.redirect_stdout(sortie):
+                bilan = executer_lot({"travaux": [travail]}, format_sortie, partition, arret_sur_erreur=True)
+            if file.terminer(id_travail, travailleur, bilan[0][2]):
+                termines += 1
+                print(f"✅ {travailleur} a terminé {travail['nom']} en {time.perf_counter() - debut:.1f} s")
+            else:
+                print(f"⚠️ {travailleur} : bail perdu pour {travail['nom']}, résultat ignoré (travail repris ailleurs)")
+        except Exception as e:
+            file.echouer(id_travail, travailleur, e)
+            print(f"❌ {travailleur} : {travail['nom']} en échec ({e}) ; détails dans {partition}/sortie.txt")
+        finally:
+            arret.set()
+            battement.join()
+
+
+def lancer_travailleurs(chemin_file, dossier, nb, duree_bail=DUREE_BAIL):
+    """Lance `nb` processus travailleurs sur cette machine et attend qu'ils aient vidé la file."""
+    contexte = multiprocessing.get_context("spawn")   # processus neufs : ni sessions ni verrous hérités
+    processus = [contexte.Process(target=travailler, args=(chemin_file, dossier, duree_bail)) for _ in range(nb)]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join()
+    return [p.exitcode for p in processus]
+
+
+# === FUSION DES PARTITIONS ===
+def _avec_colonne(tableau, nom, valeur):
+    if hasattr(tableau, "append_column"):   # table Arrow
+        import pyarrow as pa
+        return tableau.append_column(nom, pa.array([valeur] * len(tableau), type=pa.string()))
+    return tableau.assign(**{nom: valeur})
+
+
+def _schema_commun(chemins, colonne):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schemas = [pq.read_schema(chemin).remove_metadata() for chemin in chemins]
+    return pa.unify_schemas(schemas, promote_options="permissive").append(pa.field(colonne, pa.string()))
+
+
+def _fusionner_comptes(parties, cible):
+    import pandas as pd
+    from commun.sortie import ecrire_tableau
+
+    morceaux = [m.to_pandas() if hasattr(m, "to_pandas") else m for chemin, _ in parties for m in lire_morceaux(chemin)]
+    tableau = pd.concat(morceaux, ignore_index=True)
+    tableau.columns = [str(c) for c in tableau.columns]
+    annees = sorted((c for c in tableau.columns if c != "Mot-clé"), key=int)
+    ecrire_tableau(tableau[["Mot-clé"] + annees], cible)
+    return len(tableau)
+
+
+def _fusionner_lignes(parties, cible, colonne):
+    """Concatène les parties en flux, en ajoutant la colonne `colonne` (mot-clé ou ISSN)."""
+    chemins = [chemin for chemin, _ in parties]
+    parquet = format_de(cible) == "parquet" and all(format_de(chemin) == "parquet" for chemin in chemins)
+    schema = _schema_commun(chemins, colonne) if parquet else None
+    with ouvrir_ecrivain(cible, schema) as ecrivain:
+        for chemin, valeur in parties:
+            for morceau in lire_morceaux(chemin):
+                ecrivain.ecrire(_avec_colonne(morceau, colonne, valeur))
+    return ecrivain.lignes
+
+
+def fusionner(chemin_file, dossier, format_sortie=None):
+    """
+    Regroupe les sorties des partitions terminées dans dossier/fusion/ ;
+    renvoie les fichiers écrits. Les groupes incomplets sont signalés.
+    """
+    file = FileTravaux(chemin_file)
+    groupes = defaultdict(list)   # (groupe, type, source) -> [(chemin, valeur de la colonne ajoutée)]
+    for ligne in file.travaux("termine"):
+        travail = json.loads(ligne["travail"])
+        for fichier in json.loads(ligne["fichiers"] or "[]"):
+            chemin = os.path.join(dossier, "partitions", ligne["nom"], fichier)
+            if ligne["type"] == "comptes":
+                source = os.path.basename(fichier).split("_tableau_comparatif_")[0]
+                groupes[(ligne["groupe"], "comptes", source)].append((chemin, None))
+            elif ligne["type"] == "recolte":
+                groupes[(ligne["groupe"], "recolte", "crossref")].append((chemin, travail["mots_cles"][0]))
+            elif not fichier.endswith(".txt"):
+                groupes[(ligne["groupe"], "doi", "crossref")].append((chemin, "/".join(travail["issn"])))
+
+    inacheves = defaultdict(int)
+    for ligne in file.travaux():
+        if ligne["etat"] != "termine":
+            inacheves[ligne["groupe"]] += 1
+    for groupe, nb in inacheves.items():
+        print(f"⚠️ {groupe} : {nb} travaux non terminés, fusion partielle")
+
+    os.makedirs(os.path.join(dossier, "fusion"), exist_ok=True)
+    fichiers = []
+    for (groupe, type_travail, source), parties in sorted(groupes.items()):
+        format_cible = format_sortie or format_de(parties[0][0])
+        if type_travail == "comptes":
+            cible = nom_sortie(os.path.join(dossier, "fusion", f"{groupe}_{source}_tableau_comparatif"), format_cible)
+            nb = _fusionner_comptes(parties, cible)
+        elif type_travail == "recolte":
+            cible = nom_sortie(os.path.join(dossier, "fusion", f"{groupe}_{source}"), format_cible)
+            nb = _fusionner_lignes(parties, cible, "Mot-clé")
+        else:
+            cible = nom_sortie(os.path.join(dossier, "fusion", "doi_revues"), format_cible)
+            nb = _fusionner_lignes(parties, cible, "ISSN")
+        print(f"🔗 {cible} : {len(parties)} partitions, {nb} lignes")
+        fichiers.append(cible)
+    return fichiers
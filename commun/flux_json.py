@@ -0,0 +1,142 @@
+##########################################################################
+#
+# Lecture en flux des pages de résultats Crossref
+# -----------------------------------------------
+#
+# `response.json()` décode toute la page (500 notices avec résumés) avant
+# que la première ligne ne soit exploitée. Ici, le corps de la réponse est
+# lu morceau par morceau : chaque élément de `message.items` est décodé dès
+# qu'il est complet, réduit aux seuls champs conservés, puis rendu aussitôt.
+# Un seul élément brut est en mémoire à la fois, et l'extraction avance
+# pendant que la suite du corps est encore en cours de téléchargement.
+# Les octets reçus sont comptés (`octets`), pour mesurer la charge par notice.
+# La réponse est fermée à la fin de la lecture, même interrompue par une erreur :
+# la connexion retourne au groupe partagé.
+#
+##########################################################################
+
+import codecs
+import json
+import re
+
+# Champs conservés par les scripts d'extraction Crossref
+CHAMPS_CROSSREF = ("title", "author", "issued", "DOI", "URL", "abstract", "subject")
+
+TAILLE_MORCEAU = 64 * 1024
+
+_DEBUT_ITEMS = re.compile(r'"items"\s*:\s*\[')
+_NEXT_CURSOR = re.compile(r'"next-cursor"\s*:\s*("(?:[^"\\]|\\.)*")')
+_TOTAL_RESULTS = re.compile(r'"total-results"\s*:\s*(\d+)')
+_BLANCS = " \t\r\n,"
+
+
+class PageCrossref:
+    """
+    Page de résultats Crossref lue en flux.
+
+    Itérer sur la page rend les éléments de `message.items` un par un
+    (réduits à `champs`, ou tels quels si `champs` vaut None). Une fois l'itération terminée, `next_cursor`
+    et `total_results` sont renseignés.
+    """
+
+    def __init__(self, morceaux, champs=CHAMPS_CROSSREF, reponse=None):
+        self.morceaux = iter(morceaux)
+        self.champs = champs
+        self.reponse = reponse
+        self.next_cursor = None
+        self.total_results = None
+        self.nb_items = 0
+        self.octets = 0
+        self._decodeur_utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decodeur_json = json.JSONDecoder()
+        self._fin_flux = False
+
+    @classmethod
+    def depuis_reponse(cls, response, champs=CHAMPS_CROSSREF):
+        """Construit la page depuis une réponse `requests` ouverte avec `stream=True`."""
+        return cls(response.iter_content(chunk_size=TAILLE_MORCEAU), champs, reponse=response)
+
+    def _lire(self):
+        """Renvoie le texte du morceau suivant ("" en fin de flux)."""
+        if self._fin_flux:
+            return ""
+        try:
+            morceau = next(self.morceaux)
+        except StopIteration:
+            self._fin_flux = True
+            return self._decodeur_utf8.decode(b"", final=True)
+        self.octets += len(morceau)
+        return self._decodeur_utf8.decode(morceau)
+
+    def _lire_metadonnees(self, texte):
+        if self.next_cursor is None:
+            m = _NEXT_CURSOR.search(texte)
+            if m:
+                self.next_cursor = json.loads(m.group(1))
+        if self.total_results is None:
+            m = _TOTAL_RESULTS.search(texte)
+            if m:
+                self.total_results = int(m.group(1))
+
+    def __iter__(self):
+        try:
+            yield from self._parcourir()
+        finally:
+            if self.reponse is not None:
+                self.reponse.close()
+
+    def _parcourir(self):
+        # 1. En-tête du message, jusqu'au début de la liste `items`
+        tampon = ""
+        while True:
+            m = _DEBUT_ITEMS.search(tampon)
+            if m:
+                break
+            if self._fin_flux:
+                # Pas de liste `items` (page vide ou réponse inattendue)
+                self._lire_metadonnees(tampon)
+                return
+            tampon += self._lire()
+        self._lire_metadonnees(tampon[:m.start()])
+        tampon = tampon[m.end():]
+
+        # 2. Éléments de la liste, décodés un par un
+        pos = 0
+        while True:
+            while pos < len(tampon) and tampon[pos] in _BLANCS:
+                pos += 1
+            if pos == len(tampon):
+                if self._fin_flux:
+                    raise ValueError("Réponse Crossref tronquée dans la liste des résultats.")
+                tampon = tampon[pos:] + self._lire()
+                pos = 0
+                continue
+            if tampon[pos] == "]":
+                tampon = tampon[pos + 1:]
+                break
+            try:
+                item, fin = self._decodeur_json.raw_decode(tampon, pos)
+            except json.JSONDecodeError:
+                # Élément incomplet : on libère ce qui est déjà décodé
+                # et on attend le morceau suivant
+                if self._fin_flux:
+                    raise
+                tampon = tampon[pos:] + self._lire()
+                pos = 0
+                continue
+            self.nb_items += 1
+            if self.champs is None:
+                yield item   # déjà réduit par `select` : pas de copie
+            else:
+                yield {champ: item[champ] for champ in self.champs if champ in item}
+            pos = fin
+
+        # 3. Fin du message (le curseur peut aussi se trouver après `items`)
+        if self.next_cursor is None or self.total_results is None:
+            while not self._fin_flux:
+                tampon += self._lire()
+            self._lire_metadonnees(tampon)
+        else:
+            # On vide le flux pour pouvoir réutiliser la connexion
+            while not self._fin_flux:
+                self._lire()
@@ -0,0 +1,259 @@
+##########################################################################
+#
+# Moteur de grille mot-clé × année, toutes sources confondues (asyncio)
+# ---------------------------------------------------------------------
+#
+# Les scripts `keyword_occurrences_*` parcouraient chacun la même double
+# boucle mot-clé / année, une cellule après l'autre. Ici une grille reçoit
+# (sources, mots-clés, période) et lance toutes les cellules en même temps,
+# chaque source avec son propre plafond de requêtes simultanées et le
+# limiteur de son hôte : la grille avance au rythme permis par chaque API.
+#
+# Pour chaque (source, mot-clé) :
+#   0. en reprise, les cellules du journal (commun/journal.py) sont reprises ;
+#   1. les années déjà en cache (commun/cache_comptes.py) sont reprises ;
+#   2. si la source sait renvoyer un histogramme par année, une seule requête
+#      couvre toutes les années restantes (commun/histogrammes.py) ;
+#   3. les années encore manquantes sont comptées une par une.
+# Chaque résultat est rangé dans la grille dès qu'il arrive (rappel
+# `sur_resultat`) ; `sur_mot_cle_termine` permet d'enregistrer un mot-clé
+# dès qu'il est complet.
+#
+##########################################################################
+
+import asyncio
+import os
+
+from commun import client_http
+from commun.cache_comptes import cache_partage
+from commun.histogrammes import histogramme_crossref, histogramme_openalex
+from commun.journal import JournalGrille
+from commun.limiteur import limiteur_pour
+
+MAX_TENTATIVES = 5
+PAUSE_ERREUR = 5
+
+
+# === SOURCES ===
+class Source:
+    """Source de comptes : requête d'une cellule (mot-clé, année), histogramme éventuel."""
+
+    nom = ""
+    url = ""
+    filtre_cache = ""
+    concurrence = client_http.CONCURRENCE
+
+    def parametres(self, mot_cle, annee):
+        raise NotImplementedError
+
+    def lire_compte(self, donnees):
+        raise NotImplementedError
+
+    def histogramme(self, mot_cle, debut, fin):
+        """{année: nombre} en une requête, ou None si la source ne sait pas le faire."""
+        return None
+
+
+class SourceCrossref(Source):
+    nom = "crossref"
+    url = "https://api.crossref.org/works"
+    filtre_cache = "pub-date"
+
+    def parametres(self, mot_cle, annee):
+        return {"query": mot_cle, "rows": 0,
+                "filter": f"from-pub-date:{annee}-01-01,until-pub-date:{annee}-12-31"}
+
+    def lire_compte(self, donnees):
+        return donnees["message"]["total-results"]
+
+    def histogramme(self, mot_cle, debut, fin):
+        return histogramme_crossref(mot_cle, debut, fin)
+
+
+class SourceOpenAlex(Source):
+    nom = "openalex"
+    url = "https://api.openalex.org/works"
+    filtre_cache = "publication_date"
+
+    def parametres(self, mot_cle, annee):
+        return {"search": mot_cle, "per-page": 1,
+                "filter": f"from_publication_date:{annee}-01-01,to_publication_date:{annee}-12-31"}
+
+    def lire_compte(self, donnees):
+        return donnees.get("meta", {}).get("count", 0)
+
+    def histogramme(self, mot_cle, debut, fin):
+        return histogramme_openalex(mot_cle, debut, fin)
+
+
+class SourceSemanticScholar(Source):
+    nom = "semanticscholar"
+    url = "https://api.semanticscholar.org/graph/v1/paper/search"
+    concurrence = 2
+
+    def parametres(self, mot_cle, annee):
+        return {"query": mot_cle, "year": annee, "limit": 1, "fields": "title"}
+
+    def lire_compte(self, donnees):
+        return donnees.get("total", 0)
+
+
+SOURCES = {source.nom: source for source in (SourceCrossref(), SourceOpenAlex(), SourceSemanticScholar())}
+
+
+# === GRILLE ===
+class Grille:
+    """
+    Grille de comptes {source: {année: {mot-clé: nombre}}}.
+    `sources` : noms (voir SOURCES) ou objets `Source`.
+    `concurrence` : plafond commun (entier) ou par source ({nom: entier}).
+    `journal` : chemin du journal de reprise ; avec `reprise`, les cellules
+    déjà journalisées ne sont pas relancées.
+    """
+
+    def __init__(self, sources, mots_cles, debut, fin, concurrence=None, histogrammes=True, cache=None,
+                 journal=None, reprise=False):
+        self.sources = [SOURCES[s] if isinstance(s, str) else s for s in sources]
+        self.mots_cles = list(mots_cles)
+        self.annees = list(range(debut, fin + 1))
+        self.histogrammes = histogrammes
+        self.cache = cache or cache_partage()
+        self._concurrence = concurrence
+        self.chemin_journal = journal
+        self.reprise = reprise
+        self.journal = None
+        self.valeurs = {
+            source.nom: {annee: {mot: None for mot in self.mots_cles} for annee in self.annees}
+            for source in self.sources
+        }
+        self.origines = {}   # (source, mot-clé, année) -> "journal" / "cache" / "histogramme" / "requete"
+
+    def concurrence(self, source):
+        if isinstance(self._concurrence, dict):
+            return self._concurrence.get(source.nom, source.concurrence)
+        return self._concurrence or source.concurrence
+
+    # === EXÉCUTION ===
+    def executer(self, sur_resultat=None, sur_mot_cle_termine=None):
+        """Remplit toute la grille (bloquant) ; renvoie la grille."""
+        asyncio.run(self.executer_async(sur_resultat, sur_mot_cle_termine))
+        return self
+
+    async def executer_async(self, sur_resultat=None, sur_mot_cle_termine=None):
+        """
+        `sur_resultat(source, mot_cle, annee, nombre, origine)` est appelé à chaque cellule remplie,
+        `sur_mot_cle_termine(source, mot_cle)` quand toutes les années d'un mot-clé sont connues.
+        """
+        self._sur_resultat = sur_resultat
+        if self.chemin_journal:
+            self.journal = JournalGrille(self.chemin_journal, reprise=self.reprise)
+        clients = {source.nom: client_http.ClientHTTPAsync(self.concurrence(source)) for source in self.sources}
+        for client in clients.values():
+            await client.__aenter__()
+        try:
+            await asyncio.gather(*(
+                self._traiter_mot_cle(clients[source.nom], source, mot, sur_mot_cle_termine)
+                for source in self.sources for mot in self.mots_cles
+            ))
+        finally:
+            for client in clients.values():
+                await client.__aexit__(None, None, None)
+            if self.journal is not None:
+                self.journal.fermer()
+        return self
+
+    def _ranger(self, source, mot, annee, nombre, origine):
+        self.valeurs[source.nom][annee][mot] = nombre
+        self.origines[(source.nom, mot, annee)] = origine
+        if origine not in ("cache", "journal"):
+            self.cache.ecrire(source.nom, mot, annee, nombre, source.filtre_cache)
+        if self.journal is not None and origine != "journal":
+            self.journal.ecrire(source.nom, mot, annee, nombre)
+        if self._sur_resultat is not None:
+            self._sur_resultat(source.nom, mot, annee, nombre, origine)
+
+    async def _traiter_mot_cle(self, client, source, mot, sur_mot_cle_termine):
+        manquantes = []
+        journalisees = self.journal.cellules if self.journal is not None else {}
+        for annee in self.annees:
+            nombre = journalisees.get((source.nom, mot, annee))
+            if nombre is not None:
+                self._ranger(source, mot, annee, nombre, "journal")
+                continue
+            nombre = self.cache.lire(source.nom, mot, annee, source.filtre_cache)
+            if nombre is None:
+                manquantes.append(annee)
+            else:
+                self._ranger(source, mot, annee, nombre, "cache")
+
+        if self.histogrammes and manquantes:
+            histogramme = await asyncio.to_thread(source.histogramme, mot, manquantes[0], manquantes[-1]) or {}
+            for annee in manquantes:
+                if annee in histogramme:
+                    self._ranger(source, mot, annee, histogramme[annee], "histogramme")
+            manquantes = [annee for annee in manquantes if annee not in histogramme]
+
+        await asyncio.gather(*(self._cellule(client, source, mot, annee) for annee in manquantes))
+        if sur_mot_cle_termine is not None:
+            sur_mot_cle_termine(source.nom, mot)
+
+    async def _cellule(self, client, source, mot, annee):
+        self._ranger(source, mot, annee, await self._compter(client, source, mot, annee), "requete")
+
+    async def _compter(self, client, source, mot, annee):
+        """Compte d'une cellule par requête directe (sans cache), None en cas d'échec."""
+        for tentative in range(MAX_TENTATIVES):
+            try:
+                # Le client attend le limiteur de l'hôte et gère les 429 / Retry-After
+                reponse = await client.get(source.url, params=source.parametres(mot, annee))
+                if reponse.status_code == 200:
+                    return source.lire_compte(reponse.json())
+                if reponse.status_code not in (429, 503):
+                    print(f"❌ [{source.nom}] Erreur {reponse.status_code} pour '{mot}' en {annee}")
+                    return None
+            except Exception as e:
+                print(f"⚠️ [{source.nom}] Erreur pour '{mot}' en {annee} (tentative {tentative+1}/{MAX_TENTATIVES}) : {e}")
+                limiteur_pour(source.url).suspendre(PAUSE_ERREUR)
+        return None
+
+    def compter_direct(self, source, mot, annee):
+        """Compte d'une cellule par sa requête annuelle (pour vérifier un histogramme)."""
+        source = SOURCES[source] if isinstance(source, str) else source
+
+        async def compter():
+            async with client_http.ClientHTTPAsync(1) as client:
+                return await self._compter(client, source, mot, annee)
+
+        return asyncio.run(compter())
+
+    # === RÉSULTATS ===
+    def tableau(self, source):
+        """Tableau années en lignes × mots-clés en colonnes (colonne 'Année' en tête)."""
+        import pandas as pd   # importé à la demande : la grille compte sans pandas
+
+        df = pd.DataFrame.from_dict(self.valeurs[source], orient="index")
+        df.index.name = "Année"
+        return df.reset_index()
+
+    def echecs(self):
+        """Cellules (source, mot-clé, année) restées sans compte."""
+        return [(source, mot, annee) for source, par_annee in self.valeurs.items()
+                for annee, par_mot in par_annee.items() for mot, nombre in par_mot.items() if nombre is None]
+
+    def supprimer_journal_si_complete(self):
+        """
+        Supprime le journal de reprise si toutes les cellules ont un compte ; sinon il est
+        gardé, et une reprise ne relancera que les cellules en échec. Renvoie les échecs.
+        """
+        echecs = self.echecs()
+        if not echecs and self.chemin_journal and os.path.exists(self.chemin_journal):
+            os.remove(self.chemin_journal)
+        return echecs
+
+    def lignes(self, source, mot_cle=None):
+        """Lignes Mot-clé / Année / Occurrences, mot-clé par mot-clé puis année par année."""
+        mots = [mot_cle] if mot_cle is not None else self.mots_cles
+        return [
+            {"Mot-clé": mot, "Année": annee, "Occurrences": self.valeurs[source][annee][mot]}
+            for mot in mots for annee in self.annees
+        ]
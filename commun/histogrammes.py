@@ -0,0 +1,98 @@
+##########################################################################
+#
+# Répartition annuelle d'une recherche en une seule requête
+# ---------------------------------------------------------
+#
+# Compter une recherche année par année coûte une requête par année
+# (76 requêtes pour 1950–2025). Les API savent renvoyer directement la
+# distribution par année d'une recherche :
+#   - Crossref : facette `published:*` (message.facets.published.values) ;
+#   - OpenAlex : regroupement `group_by=publication_year` (group_by[].key/count).
+#
+# La boucle année par année reste disponible dans les scripts, comme
+# solution de repli et pour vérifier quelques années tirées au hasard.
+#
+##########################################################################
+
+import random
+
+import requests
+
+from commun import client_http
+
+URL_CROSSREF = "https://api.crossref.org/works"
+URL_OPENALEX = "https://api.openalex.org/works"
+
+
+def histogramme_crossref(requete, debut, fin, champ="query"):
+    """
+    Nombre de publications par année de `debut` à `fin` (inclus), en une requête.
+    Renvoie {année: nombre} (0 pour les années absentes de la facette),
+    ou None si la requête échoue.
+    """
+    params = {
+        champ: requete,
+        "filter": f"from-pub-date:{debut}-01-01,until-pub-date:{fin}-12-31",
+        "facet": "published:*",
+        "rows": 0,
+    }
+    try:
+        response = client_http.get(URL_CROSSREF, params=params)
+        if response.status_code != 200:
+            print(f"⚠️ Facette Crossref indisponible pour '{requete}' : code {response.status_code}")
+            return None
+        valeurs = response.json()["message"].get("facets", {}).get("published", {}).get("values", {})
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"⚠️ Facette Crossref indisponible pour '{requete}' : {e}")
+        return None
+    histogramme = {annee: 0 for annee in range(debut, fin + 1)}
+    for annee, nombre in valeurs.items():
+        if annee.isdigit() and debut <= int(annee) <= fin:
+            histogramme[int(annee)] = nombre
+    return histogramme
+
+
+def histogramme_openalex(requete, debut, fin):
+    """
+    Nombre de publications par année de `debut` à `fin` (inclus), en une requête.
+    Renvoie {année: nombre} pour les années présentes dans les groupes
+    (les années absentes sont à compter une par une), ou None si la requête échoue.
+    """
+    params = {
+        "search": requete,
+        "filter": f"from_publication_date:{debut}-01-01,to_publication_date:{fin}-12-31",
+        "group_by": "publication_year",
+        "per-page": 200,
+    }
+    try:
+        response = client_http.get(URL_OPENALEX, params=params)
+        if response.status_code != 200:
+            print(f"⚠️ Regroupement OpenAlex indisponible pour '{requete}' : code {response.status_code}")
+            return None
+        histogramme = {}
+        for groupe in response.json().get("group_by", []):
+            cle = str(groupe.get("key", ""))
+            if cle.isdigit() and debut <= int(cle) <= fin:
+                histogramme[int(cle)] = groupe.get("count", 0)
+    except (requests.exceptions.RequestException, ValueError, KeyError, AttributeError) as e:
+        print(f"⚠️ Regroupement OpenAlex indisponible pour '{requete}' : {e}")
+        return None
+    return histogramme
+
+
+def verifier_histogramme(histogramme, compter_annee, nb_annees=3, tolerance=0.01):
+    """
+    Compare quelques années de l'histogramme avec un comptage année par année.
+    `compter_annee(annee)` renvoie le nombre obtenu par la requête classique.
+    Renvoie la liste des écarts (année, facette, comptage) au-delà de `tolerance`.
+    """
+    annees = random.sample(sorted(histogramme), min(nb_annees, len(histogramme)))
+    ecarts = []
+    for annee in sorted(annees):
+        attendu = compter_annee(annee)
+        obtenu = histogramme[annee]
+        if attendu is None:
+            continue
+        if abs(obtenu - attendu) > tolerance * max(attendu, 1):
+            ecarts.append((annee, obtenu, attendu))
+    return ecarts
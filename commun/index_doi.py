@@ -0,0 +1,148 @@
+##########################################################################
+#
+# Index persistant des DOI déjà enregistrés (dédoublonnage)
+# ---------------------------------------------------------
+#
+# Les mêmes DOI reviennent à plusieurs endroits : une revue interrogée par
+# ses deux ISSN, une reprise imprécise, deux fenêtres qui se chevauchent...
+# Chaque écrivain consulte ici, avant d'émettre une notice, l'ensemble des
+# DOI déjà vus.
+#
+# Le DOI normalisé (minuscules, sans préfixe https://doi.org/) est réduit à
+# une empreinte de 8 octets (blake2b), clé entière d'une table SQLite sur
+# disque : chaque recherche est une lecture de clé, sans garder de chaînes
+# Python en mémoire. L'index reste compact (≈ 15 à 20 octets par DOI, quelques
+# centaines de Mo pour des dizaines de millions de DOI) et, avec 64 bits, une
+# collision reste improbable (≈ 1 sur 3 000 pour 100 millions de DOI).
+#
+# L'index sait aussi quels segments d'un magasin il couvre : un arrêt entre
+# l'écriture d'un segment et son indexation est rattrapé à l'ouverture.
+#
+##########################################################################
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+NOM_INDEX = "index_doi.sqlite"
+LOT_SQL = 500   # empreintes par requête IN (...)
+
+_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+
+
+def normaliser_doi(doi):
+    """Forme canonique d'un DOI ("" si absent)."""
+    if doi is None or doi != doi:   # None ou NaN
+        return ""
+    doi = str(doi).strip().lower()
+    for prefixe in _PREFIXES:
+        if doi.startswith(prefixe):
+            return doi[len(prefixe):]
+    return doi
+
+
+def empreinte(doi):
+    """Empreinte entière (64 bits signés, type INTEGER de SQLite) d'un DOI normalisé."""
+    return int.from_bytes(hashlib.blake2b(doi.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class IndexDOI:
+    """
+    Ensemble persistant de DOI (par empreinte), partageable entre threads.
+    `chemin` = ":memory:" pour un index limité au processus.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        if chemin != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA synchronous=NORMAL")
+        self._connexion.execute("CREATE TABLE IF NOT EXISTS dois (h INTEGER PRIMARY KEY)")
+        self._connexion.execute("CREATE TABLE IF NOT EXISTS segments (fichier TEXT PRIMARY KEY)")
+        self._connexion.commit()
+        self.stats = {"vus": 0, "doublons": 0, "sans_doi": 0}
+
+    def __len__(self):
+        with self._verrou:
+            return self._connexion.execute("SELECT COUNT(*) FROM dois").fetchone()[0]
+
+    def __contains__(self, doi):
+        with self._verrou:
+            return self._connexion.execute(
+                "SELECT 1 FROM dois WHERE h = ?", (empreinte(normaliser_doi(doi)),)
+            ).fetchone() is not None
+
+    def _connues(self, empreintes):
+        connues = set()
+        for i in range(0, len(empreintes), LOT_SQL):
+            lot = empreintes[i:i + LOT_SQL]
+            requete = f"SELECT h FROM dois WHERE h IN ({','.join('?' * len(lot))})"
+            connues.update(h for (h,) in self._connexion.execute(requete, lot))
+        return connues
+
+    def nouveaux(self, dois):
+        """
+        Masque (liste de booléens) des DOI à garder : absents de l'index et
+        premiers de leur lot. Les DOI vides sont toujours gardés. N'écrit rien.
+        """
+        normalises = [normaliser_doi(d) for d in dois]
+        empreintes = [empreinte(d) if d else None for d in normalises]
+        with self._verrou:
+            deja_vues = self._connues(list({h for h in empreintes if h is not None}))
+        masque = []
+        for h in empreintes:
+            if h is None:
+                masque.append(True)
+                self.stats["sans_doi"] += 1
+                continue
+            self.stats["vus"] += 1
+            if h in deja_vues:
+                masque.append(False)
+                self.stats["doublons"] += 1
+            else:
+                masque.append(True)
+                deja_vues.add(h)
+        return masque
+
+    def enregistrer(self, dois, segment=None):
+        """Ajoute des DOI à l'index (et marque `segment` comme indexé), en une transaction."""
+        empreintes = [(empreinte(d),) for d in map(normaliser_doi, dois) if d]
+        with self._verrou:
+            with self._connexion:
+                self._connexion.executemany("INSERT OR IGNORE INTO dois VALUES (?)", empreintes)
+                if segment is not None:
+                    self._connexion.execute("INSERT OR IGNORE INTO segments VALUES (?)", (segment,))
+
+    def filtrer(self, dois):
+        """Garde les DOI nouveaux (dans l'ordre, sans doublon) et les enregistre aussitôt."""
+        dois = list(dois)
+        gardes = [d for d, garder in zip(dois, self.nouveaux(dois)) if garder]
+        self.enregistrer(gardes)
+        return gardes
+
+    def segments_indexes(self):
+        with self._verrou:
+            return {f for (f,) in self._connexion.execute("SELECT fichier FROM segments")}
+
+    def vider(self):
+        with self._verrou:
+            with self._connexion:
+                self._connexion.execute("DELETE FROM dois")
+                self._connexion.execute("DELETE FROM segments")
+
+    def taux_doublons(self):
+        return self.stats["doublons"] / self.stats["vus"] if self.stats["vus"] else 0.0
+
+    def resume(self):
+        """Ligne de statistiques à afficher en fin de script."""
+        s = self.stats
+        return (f"🧬 DOI : {s['doublons']}/{s['vus']} doublons écartés ({self.taux_doublons():.1%}), "
+                f"{s['sans_doi']} notices sans DOI, {len(self)} DOI dans l'index")
+
+    def fermer(self):
+        with self._verrou:
+            self._connexion.close()
@@ -0,0 +1,89 @@
+##########################################################################
+#
+# Journal de reprise des grilles mot-clé × année (JSON Lines, ajout seul)
+# ---------------------------------------------------------------------
+#
+# Chaque cellule terminée (source, mot-clé, année, nombre) est ajoutée au
+# journal, une ligne JSON par cellule. Les écritures sont regroupées : le
+# fichier est synchronisé sur disque (fsync) toutes les `lot` cellules ou
+# toutes les `delai` secondes. Un arrêt brutal ne fait donc perdre que les
+# dernières cellules non synchronisées.
+#
+# À la reprise, le journal est relu puis coupé après sa dernière ligne
+# complète (une ligne tronquée est retirée) : seules les cellules absentes
+# ou en échec sont relancées.
+#
+##########################################################################
+
+import json
+import os
+import threading
+import time
+
+LOT = 20          # cellules par synchronisation
+DELAI = 2.0       # secondes au plus entre deux synchronisations
+
+
+class JournalGrille:
+    """Journal en ajout seul des cellules terminées d'une grille."""
+
+    def __init__(self, chemin, reprise=True, lot=LOT, delai=DELAI):
+        self.chemin = chemin
+        self.lot = lot
+        self.delai = delai
+        self._verrou = threading.Lock()
+        self._en_attente = 0
+        self._derniere_synchro = time.monotonic()
+        self.cellules = self.charger() if reprise else {}
+        if reprise:
+            self._couper_ligne_tronquee()
+        self._fichier = open(chemin, "a" if reprise else "w", encoding="utf-8")
+
+    def charger(self):
+        """Cellules déjà terminées : {(source, mot-clé, année): nombre} (échecs exclus)."""
+        cellules = {}
+        if not os.path.exists(self.chemin):
+            return cellules
+        with open(self.chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    cellule = json.loads(ligne)
+                except json.JSONDecodeError:
+                    continue   # ligne tronquée par un arrêt brutal
+                cle = (cellule["source"], cellule["mot_cle"], cellule["annee"])
+                if cellule["nombre"] is None:
+                    cellules.pop(cle, None)
+                else:
+                    cellules[cle] = cellule["nombre"]
+        return cellules
+
+    def _couper_ligne_tronquee(self):
+        """Retire une dernière ligne incomplète, pour que l'ajout suivant commence sur une ligne neuve."""
+        if not os.path.exists(self.chemin):
+            return
+        with open(self.chemin, "rb+") as f:
+            contenu = f.read()
+            if contenu and not contenu.endswith(b"\n"):
+                f.truncate(contenu.rfind(b"\n") + 1)
+
+    def ecrire(self, source, mot_cle, annee, nombre):
+        """Ajoute une cellule terminée (synchronisation par lots)."""
+        ligne = json.dumps({"source": source, "mot_cle": mot_cle, "annee": annee, "nombre": nombre},
+                           ensure_ascii=False)
+        with self._verrou:
+            self._fichier.write(ligne + "\n")
+            self._en_attente += 1
+            if self._en_attente >= self.lot or time.monotonic() - self._derniere_synchro >= self.delai:
+                self._synchroniser()
+
+    def _synchroniser(self):
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+        self._en_attente = 0
+        self._derniere_synchro = time.monotonic()
+
+    def fermer(self):
+        with self._verrou:
+            if not self._fichier.closed:
+                self._synchroniser()
+                self._fichier.close()
@@ -0,0 +1,160 @@
+##########################################################################
+#
+# Limiteur de débit partagé, un seau à jetons par hôte
+# ----------------------------------------------------
+#
+# Remplace les pauses écrites à la main dans chaque script (sleep fixe,
+# aléatoire ou dépendant du numéro de page). Un seul limiteur existe par hôte :
+# tous les threads et toutes les tâches asyncio d'un même processus le
+# partagent. Le débit s'ajuste aux en-têtes renvoyés par l'API :
+#   - X-Rate-Limit-Limit / X-Rate-Limit-Interval (Crossref) fixent le débit
+#     plafond, vers lequel le débit remonte ;
+#   - Retry-After (sur 429 / 503) suspend l'hôte le temps demandé ;
+#   - un 429 sans Retry-After divise le débit par deux, qui remonte ensuite
+#     progressivement à chaque réponse correcte.
+#
+##########################################################################
+
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Débits de départ (requêtes / seconde), avant toute information de l'API
+DEBITS_PAR_DEFAUT = {
+    "api.crossref.org": 5.0,
+    "api.openalex.org": 10.0,
+    "api.semanticscholar.org": 1.0,
+    "scholar.google.com": 0.25,
+}
+DEBIT_INCONNU = 1.0
+
+# Pause aléatoire ajoutée à chaque requête (Google Scholar bloque les rythmes trop réguliers)
+GIGUES_PAR_DEFAUT = {
+    "scholar.google.com": 3.0,
+}
+
+DEBIT_MINIMUM = 0.05
+PAUSE_429 = 5.0
+
+_INTERVALLE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$")
+_UNITES = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def lire_retry_after(valeur):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes."""
+    if not valeur:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Limiteur:
+    """
+    Seau à jetons : `debit` jetons par seconde, au plus `capacite` en réserve.
+    Chaque requête consomme un jeton ; sans jeton disponible, on attend.
+    """
+
+    def __init__(self, debit, capacite=1, gigue=0.0):
+        self.debit = float(debit)
+        self.debit_initial = float(debit)
+        self.capacite = float(capacite)
+        self.gigue = gigue
+        self.jetons = float(capacite)
+        self.suspendu_jusqua = 0.0
+        self.temps_attente = 0.0   # cumul des attentes imposées (secondes)
+        self._dernier = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def _remplir(self, maintenant):
+        self.jetons = min(self.capacite, self.jetons + (maintenant - self._dernier) * self.debit)
+        self._dernier = maintenant
+
+    def _reserver(self):
+        """Prend un jeton (éventuellement à crédit) et renvoie le délai à respecter."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            self._remplir(maintenant)
+            self.jetons -= 1
+            delai = -self.jetons / self.debit if self.jetons < 0 else 0.0
+            delai = max(delai, self.suspendu_jusqua - maintenant)
+            if self.gigue:
+                delai += random.uniform(0, self.gigue)
+            self.temps_attente += delai
+            return delai
+
+    def attendre(self):
+        """Bloque le thread appelant jusqu'à ce qu'une requête soit permise ; renvoie l'attente."""
+        delai = self._reserver()
+        if delai > 0:
+            time.sleep(delai)
+        return max(delai, 0.0)
+
+    async def attendre_async(self):
+        """Équivalent de `attendre` pour une tâche asyncio (ne bloque pas la boucle)."""
+        delai = self._reserver()
+        if delai > 0:
+            await asyncio.sleep(delai)
+        return max(delai, 0.0)
+
+    def suspendre(self, secondes):
+        """Suspend toutes les requêtes vers l'hôte pendant `secondes`."""
+        with self._verrou:
+            self.suspendu_jusqua = max(self.suspendu_jusqua, time.monotonic() + secondes)
+            self.jetons = min(self.jetons, 0.0)
+
+    def mettre_a_jour(self, headers):
+        """Ajuste le plafond d'après les en-têtes d'une réponse correcte, puis fait remonter le débit."""
+        limite = headers.get("X-Rate-Limit-Limit")
+        intervalle = headers.get("X-Rate-Limit-Interval")
+        with self._verrou:
+            if limite and intervalle:
+                m = _INTERVALLE.match(intervalle)
+                try:
+                    nb = float(limite)
+                except ValueError:
+                    nb = None
+                if m and nb:
+                    secondes = float(m.group(1)) * _UNITES[m.group(2)]
+                    if secondes > 0:
+                        self.debit_initial = nb / secondes
+                        self.debit = min(self.debit, self.debit_initial)
+                        self.capacite = max(1.0, nb)
+            # Remontée douce vers le plafond (après un ralentissement sur 429)
+            if self.debit < self.debit_initial:
+                self.debit = min(self.debit_initial, self.debit * 1.1)
+
+    def signaler_429(self, headers=None, pause=PAUSE_429):
+        """Réagit à un refus (429 / 503) : Retry-After si fourni, sinon ralentissement."""
+        attente = lire_retry_after((headers or {}).get("Retry-After"))
+        with self._verrou:
+            if attente is None:
+                self.debit = max(DEBIT_MINIMUM, self.debit / 2)
+                attente = pause
+        self.suspendre(attente)
+        return attente
+
+
+_limiteurs = {}
+_verrou_registre = threading.Lock()
+
+
+def limiteur_pour(url_ou_hote):
+    """Renvoie le limiteur partagé de l'hôte (créé au premier appel)."""
+    hote = urlsplit(url_ou_hote).hostname if "://" in url_ou_hote else url_ou_hote
+    with _verrou_registre:
+        if hote not in _limiteurs:
+            _limiteurs[hote] = Limiteur(
+                DEBITS_PAR_DEFAUT.get(hote, DEBIT_INCONNU),
+                gigue=GIGUES_PAR_DEFAUT.get(hote, 0.0),
+            )
+        return _limiteurs[hote]
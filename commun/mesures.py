@@ -0,0 +1,259 @@
+##########################################################################
+#
+# Mesures par requête et par phase, export JSON / Prometheus, profilage
+# ---------------------------------------------------------------------
+#
+# Une récolte lente attend-elle le réseau, le décodage JSON, l'écriture du
+# fichier ou les pauses du limiteur ? Ce module tient, pour tout le
+# processus (threads compris) :
+#   - par hôte : requêtes par code de statut (« erreur » si aucune réponse),
+#     latence jusqu'aux en-têtes (histogramme), octets reçus (décompressés,
+#     comptés au fil de la lecture pour une réponse en flux), nouvelles
+#     tentatives sur 429 / 503 et temps passé à attendre le limiteur ;
+#     le client HTTP partagé (commun/client_http.py) les enregistre seul ;
+#   - par phase (fetch, parse, transform, write) : nombre de passages et
+#     durée cumulée, avec `with MESURES.phase("write"):` (deux appels à
+#     perf_counter par passage). Une phase imbriquée dans une phase du même
+#     nom (même thread ou même tâche asyncio) n'est comptée qu'une fois ; les
+#     phases de threads ou de tâches différents se recouvrent : leur somme
+#     peut dépasser la durée réelle.
+#
+# Variables d'environnement :
+#   SCRIPTORIUM_METRIQUES=dossier   en fin de script, écrit <script>.json
+#                                   et <script>.prom (textfile collector
+#                                   de node_exporter) dans `dossier` ;
+#   SCRIPTORIUM_PROFIL=cprofile,tracemalloc
+#                                   profilage du processus entier : top des
+#                                   fonctions (et <script>.pstats) et/ou
+#                                   des allocations en fin de script.
+#
+##########################################################################
+
+import atexit
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bornes de l'histogramme des latences (secondes)
+BORNES_LATENCE = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIXE_PROMETHEUS = "scriptorium"
+
+# Phases ouvertes dans le thread / la tâche asyncio courante
+_PHASES_EN_COURS = contextvars.ContextVar("phases_en_cours", default=frozenset())
+
+
+def nom_script():
+    """Nom du script lancé, sans extension (sert à nommer les exports)."""
+    return os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+
+
+class _Hote:
+    def __init__(self):
+        self.statuts = {}
+        self.latence_totale = 0.0
+        self.latence_max = 0.0
+        self.buckets = [0] * (len(BORNES_LATENCE) + 1)
+        self.octets = 0
+        self.tentatives = 0
+        self.attente = 0.0
+
+    @property
+    def requetes(self):
+        return sum(self.statuts.values())
+
+
+class Mesures:
+    """Compteurs du processus : requêtes par hôte et durées par phase (partageables entre threads)."""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.hotes = {}
+        self.phases = {}
+        self._verrou = threading.Lock()
+
+    def requete(self, hote, latence, octets=0, statut=None, tentatives=0, attente=0.0):
+        """Enregistre une requête HTTP (statut None = pas de réponse)."""
+        with self._verrou:
+            h = self.hotes.get(hote)
+            if h is None:
+                h = self.hotes[hote] = _Hote()
+            cle = str(statut) if statut is not None else "erreur"
+            h.statuts[cle] = h.statuts.get(cle, 0) + 1
+            h.latence_totale += latence
+            h.latence_max = max(h.latence_max, latence)
+            h.buckets[bisect_left(BORNES_LATENCE, latence)] += 1
+            h.octets += octets
+            h.tentatives += tentatives
+            h.attente += attente
+
+    def octets(self, hote, octets):
+        """Ajoute des octets reçus après coup (corps d'une réponse lue en flux)."""
+        with self._verrou:
+            if hote in self.hotes:
+                self.hotes[hote].octets += octets
+
+    @contextmanager
+    def phase(self, nom):
+        """Chronomètre un passage dans la phase `nom` (fetch, parse, transform, write...)."""
+        en_cours = _PHASES_EN_COURS.get()
+        if nom in en_cours:
+            yield   # déjà chronométrée plus haut dans ce thread / cette tâche
+            return
+        jeton = _PHASES_EN_COURS.set(en_cours | {nom})
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            _PHASES_EN_COURS.reset(jeton)
+            with self._verrou:
+                nb, total = self.phases.get(nom, (0, 0.0))
+                self.phases[nom] = (nb + 1, total + duree)
+
+    def vider(self):
+        with self._verrou:
+            self.debut = time.perf_counter()
+            self.hotes.clear()
+            self.phases.clear()
+
+    # === EXPORTS ===
+    def resume(self):
+        """Dictionnaire sérialisable en JSON de toutes les mesures."""
+        with self._verrou:
+            return {
+                "script": nom_script(),
+                "duree_s": round(time.perf_counter() - self.debut, 3),
+                "hotes": {
+                    hote: {
+                        "requetes": h.requetes,
+                        "statuts": dict(h.statuts),
+                        "latence_moyenne_s": round(h.latence_totale / h.requetes, 4) if h.requetes else 0.0,
+                        "latence_max_s": round(h.latence_max, 4),
+                        "octets": h.octets,
+                        "tentatives": h.tentatives,
+                        "attente_s": round(h.attente, 3),
+                    }
+                    for hote, h in self.hotes.items()
+                },
+                "phases": {nom: {"passages": nb, "duree_s": round(total, 4)}
+                           for nom, (nb, total) in self.phases.items()},
+            }
+
+    def ligne(self):
+        """Ligne de statistiques à afficher en fin de script."""
+        r = self.resume()
+        requetes = sum(h["requetes"] for h in r["hotes"].values())
+        attente = sum(h["attente_s"] for h in r["hotes"].values())
+        reseau = sum(h["latence_moyenne_s"] * h["requetes"] for h in r["hotes"].values())
+        phases = ", ".join(f"{nom} {p['duree_s']:.1f} s" for nom, p in r["phases"].items())
+        return (f"⏱️ Mesures : {requetes} requêtes ({reseau:.1f} s de latence, {attente:.1f} s d'attente "
+                f"du limiteur) en {r['duree_s']:.1f} s" + (f" ; phases : {phases}" if phases else ""))
+
+    def prometheus(self):
+        """Texte au format d'exposition Prometheus."""
+        p = PREFIXE_PROMETHEUS
+        script = nom_script()
+        lignes = []
+
+        def metrique(nom, type_, aide, valeurs):
+            lignes.append(f"# HELP {p}_{nom} {aide}")
+            lignes.append(f"# TYPE {p}_{nom} {type_}")
+            for etiquettes, valeur in valeurs:
+                texte = ",".join(f'{k}="{v}"' for k, v in (("script", script),) + etiquettes)
+                lignes.append(f"{p}_{nom}{{{texte}}} {valeur}")
+
+        with self._verrou:
+            hotes = list(self.hotes.items())
+            metrique("requetes_total", "counter", "Requêtes HTTP par hôte et code de statut.",
+                     [((("hote", hote), ("statut", statut)), nb)
+                      for hote, h in hotes for statut, nb in h.statuts.items()])
+            histogramme = []
+            for hote, h in hotes:
+                cumul = 0
+                for borne, nb in zip(BORNES_LATENCE + ("+Inf",), h.buckets):
+                    cumul += nb
+                    histogramme.append(((("hote", hote), ("le", borne)), cumul))
+            lignes.append(f"# HELP {p}_latence_secondes Latence des requêtes jusqu'aux en-têtes.")
+            lignes.append(f"# TYPE {p}_latence_secondes histogram")
+            for etiquettes, valeur in histogramme:
+                texte = ",".join(f'{k}="{v}"' for k, v in (("script", script),) + etiquettes)
+                lignes.append(f"{p}_latence_secondes_bucket{{{texte}}} {valeur}")
+            for hote, h in hotes:
+                lignes.append(f'{p}_latence_secondes_sum{{script="{script}",hote="{hote}"}} {h.latence_totale:.6f}')
+                lignes.append(f'{p}_latence_secondes_count{{script="{script}",hote="{hote}"}} {h.requetes}')
+            metrique("octets_recus_total", "counter", "Octets reçus par hôte.",
+                     [((("hote", hote),), h.octets) for hote, h in hotes])
+            metrique("tentatives_total", "counter", "Nouvelles tentatives après 429 / 503.",
+                     [((("hote", hote),), h.tentatives) for hote, h in hotes])
+            metrique("attente_secondes_total", "counter", "Temps passé à attendre le limiteur de débit.",
+                     [((("hote", hote),), f"{h.attente:.6f}") for hote, h in hotes])
+            phases = list(self.phases.items())
+            metrique("phase_secondes_total", "counter", "Durée cumulée par phase.",
+                     [((("phase", nom),), f"{total:.6f}") for nom, (_, total) in phases])
+            metrique("phase_passages_total", "counter", "Passages par phase.",
+                     [((("phase", nom),), nb) for nom, (nb, _) in phases])
+        return "\n".join(lignes) + "\n"
+
+    def exporter(self, dossier):
+        """Écrit <script>.json et <script>.prom dans `dossier` (remplacement atomique) ; renvoie les chemins."""
+        os.makedirs(dossier, exist_ok=True)
+        base = os.path.join(dossier, nom_script())
+        chemins = []
+        for extension, contenu in ((".json", json.dumps(self.resume(), ensure_ascii=False, indent=2)),
+                                   (".prom", self.prometheus())):
+            chemin = base + extension
+            with open(chemin + ".tmp", "w", encoding="utf-8") as fichier:
+                fichier.write(contenu)
+            os.replace(chemin + ".tmp", chemin)
+            chemins.append(chemin)
+        return chemins
+
+
+MESURES = Mesures()
+
+
+# === EXPORT ET PROFILAGE EN FIN DE SCRIPT (variables d'environnement) ===
+def _profilage(options):
+    profileur = None
+    if "cprofile" in options:
+        import cProfile
+        profileur = cProfile.Profile()
+        profileur.enable()
+    if "tracemalloc" in options:
+        import tracemalloc
+        tracemalloc.start(10)
+
+    def terminer():
+        if profileur is not None:
+            import pstats
+            profileur.disable()
+            fichier = f"{nom_script()}.pstats"
+            profileur.dump_stats(fichier)
+            print(f"\n🔬 Profil cProfile : {fichier} (20 fonctions les plus coûteuses)")
+            pstats.Stats(profileur).sort_stats("cumulative").print_stats(20)
+        if "tracemalloc" in options:
+            import tracemalloc
+            courant, pic = tracemalloc.get_traced_memory()
+            print(f"\n🧠 Mémoire Python : {courant / 1e6:.1f} Mo en fin de script, pic {pic / 1e6:.1f} Mo")
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]:
+                print(f"   {stat}")
+            tracemalloc.stop()
+
+    return terminer
+
+
+def _exporter_a_la_sortie(dossier):
+    for chemin in MESURES.exporter(dossier):
+        print(f"📈 Mesures écrites : {chemin}")
+
+
+_options_profil = {o.strip().lower() for o in os.environ.get("SCRIPTORIUM_PROFIL", "").split(",") if o.strip()}
+if _options_profil:
+    atexit.register(_profilage(_options_profil))
+if os.environ.get("SCRIPTORIUM_METRIQUES"):
+    atexit.register(_exporter_a_la_sortie, os.environ["SCRIPTORIUM_METRIQUES"])
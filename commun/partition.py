@@ -0,0 +1,237 @@
+##########################################################################
+#
+# Extraction Crossref parallèle, fragmentée par dates de publication
+# ------------------------------------------------------------------
+#
+# Un seul curseur profond impose une requête à la fois. Ici la recherche est
+# d'abord découpée en fenêtres de dates disjointes (from-pub-date /
+# until-pub-date) : une fenêtre trop volumineuse est coupée en deux, et ainsi
+# de suite, jusqu'à ce que chacune contienne au plus `max_par_fenetre`
+# résultats. Chaque fenêtre a ensuite son propre curseur et est extraite par
+# un groupe de travailleurs (threads), sous un budget de requêtes commun
+# (nombre de requêtes en vol + limiteur de débit partagé de Crossref).
+#
+# Toutes les fenêtres écrivent dans le même magasin de segments ; l'état de
+# chaque fenêtre (curseur, lignes, terminée) est enregistré dans le manifeste
+# avec le segment qui le fait avancer, ce qui permet une reprise par fenêtre.
+#
+# ⚠️ Les publications sans date de publication ne tombent dans aucune fenêtre :
+#    le mode séquentiel reste la référence pour une extraction exhaustive.
+#
+##########################################################################
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+import requests
+
+from commun import client_http
+from commun.colonnes import ConstructeurColonnes
+from commun.flux_json import CHAMPS_CROSSREF, PageCrossref
+from commun.limiteur import limiteur_pour
+
+URL_CROSSREF = "https://api.crossref.org/works"
+DATE_DEBUT = date(1665, 1, 1)   # premières revues savantes
+MAX_PAR_FENETRE = 20000
+NB_TRAVAILLEURS = 4
+MAX_TENTATIVES = 60          # erreurs réseau, 429 et 5xx (dans _get)
+MAX_TENTATIVES_LECTURE = 3   # pages reçues mais illisibles
+PAUSE_TENTATIVE = 5
+
+
+class BudgetRequetes:
+    """
+    Budget de requêtes partagé par tous les travailleurs :
+    au plus `max_simultanees` requêtes en vol, corps de la réponse compris.
+    Le rythme est celui du limiteur de l'hôte, appliqué par le client HTTP commun.
+    """
+
+    def __init__(self, max_simultanees=NB_TRAVAILLEURS, limiteur=None):
+        self._semaphore = threading.BoundedSemaphore(max_simultanees)
+        self.limiteur = limiteur or limiteur_pour(URL_CROSSREF)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+        return False
+
+
+def cle_fenetre(debut, fin):
+    return f"{debut.isoformat()}_{fin.isoformat()}"
+
+
+def filtre_fenetre(debut, fin):
+    return f"from-pub-date:{debut.isoformat()},until-pub-date:{fin.isoformat()}"
+
+
+class RecolteFragmentee:
+    """
+    Extraction d'une recherche Crossref découpée en fenêtres de dates.
+
+    `parametres` : paramètres communs à toutes les requêtes
+    (ex. {"query.bibliographic": ..., "mailto": ...}).
+    `extraire_ligne` : transforme une notice en ligne du tableau final.
+    `schema` (commun/schemas.py) : champs demandés (`select`), mesure de la charge
+    et, sans `extraire_ligne`, construction du tableau colonne par colonne.
+    """
+
+    def __init__(self, parametres, magasin, extraire_ligne=None, headers=None,
+                 nb_travailleurs=NB_TRAVAILLEURS, max_par_fenetre=MAX_PAR_FENETRE, rows=500, schema=None):
+        self.parametres = dict(parametres)
+        self.schema = schema
+        if schema is not None:
+            self.parametres["select"] = schema.select
+        self.magasin = magasin
+        self.extraire_ligne = extraire_ligne
+        self.constructeur = ConstructeurColonnes(schema) if schema is not None else None
+        self.headers = headers or {}
+        self.nb_travailleurs = nb_travailleurs
+        self.max_par_fenetre = max_par_fenetre
+        self.rows = rows
+        self.budget = BudgetRequetes(nb_travailleurs)
+        self.limiteur = self.budget.limiteur
+        self._verrou_affichage = threading.Lock()
+        self._lignes_total = 0
+
+    # === REQUÊTES ===
+    def _get(self, params, lire, stream=False):
+        """
+        Requête lue par `lire(réponse)`, sous le budget jusqu'à la fin du corps ; renvoie
+        le résultat de `lire`, ou None. Erreurs réseau, 429 et 5xx : nouvelle tentative
+        après une pause de ce seul travailleur (le client gère déjà Retry-After) ;
+        autres 4xx : abandon immédiat. Les erreurs de décodage de `lire` remontent.
+        """
+        for tentative in range(MAX_TENTATIVES):
+            try:
+                with self.budget:
+                    r = client_http.get(URL_CROSSREF, params=params, headers=self.headers or None,
+                                        stream=stream)
+                    try:
+                        if r.status_code < 400:
+                            return lire(r)
+                    finally:
+                        r.close()
+                erreur = f"HTTP {r.status_code}"
+                if not client_http.reessayable(r.status_code):
+                    self._afficher(f"❌ Requête refusée ({erreur}), sans nouvelle tentative : {params.get('filter')}")
+                    return None
+            except requests.exceptions.RequestException as e:
+                erreur = e
+            self._afficher(f"⚠️ Erreur (tentative {tentative+1}/{MAX_TENTATIVES}) : {erreur}")
+            time.sleep(PAUSE_TENTATIVE)
+        return None
+
+    def compter(self, debut, fin):
+        """Nombre de résultats dans la fenêtre [debut, fin] (requête rows=0)."""
+        params = dict(self.parametres, rows=0, filter=filtre_fenetre(debut, fin))
+        total = self._get(params, lambda r: r.json()["message"]["total-results"])
+        if total is None:
+            raise RuntimeError(f"Impossible de compter la fenêtre {cle_fenetre(debut, fin)}")
+        return total
+
+    # === DÉCOUPAGE ADAPTATIF ===
+    def decouper(self, debut=DATE_DEBUT, fin=None):
+        """
+        Coupe [debut, fin] en fenêtres disjointes d'au plus `max_par_fenetre` résultats.
+        Les comptages d'un même niveau de découpage sont lancés en parallèle.
+        Renvoie une liste de (debut, fin, nombre).
+        """
+        fin = fin or date(date.today().year + 1, 12, 31)
+        retenues = []
+        a_compter = [(debut, fin)]
+        with ThreadPoolExecutor(max_workers=self.nb_travailleurs) as pool:
+            while a_compter:
+                comptes = list(pool.map(lambda f: self.compter(*f), a_compter))
+                suivantes = []
+                for (d, f), n in zip(a_compter, comptes):
+                    if n == 0:
+                        continue
+                    if n <= self.max_par_fenetre or d == f:
+                        retenues.append((d, f, n))
+                    else:
+                        milieu = d + timedelta(days=(f - d).days // 2)
+                        suivantes += [(d, milieu), (milieu + timedelta(days=1), f)]
+                a_compter = suivantes
+        retenues.sort()
+        return retenues
+
+    # === EXTRACTION D'UNE FENÊTRE ===
+    def _lire_page(self, r):
+        """Page Crossref lue en flux et son tableau de lignes."""
+        page = PageCrossref.depuis_reponse(r, self.schema.champs if self.schema else CHAMPS_CROSSREF)
+        if self.extraire_ligne is None:
+            lignes = self.constructeur.construire(page)
+        else:
+            lignes = pd.DataFrame([self.extraire_ligne(item) for item in page])
+        if self.schema is not None:
+            self.schema.mesure.ajouter(page.octets, page.nb_items)
+        return page, lignes
+
+    def _recolter_fenetre(self, cle):
+        etat = self.magasin.etat(cle)
+        debut, fin = date.fromisoformat(etat["debut"]), date.fromisoformat(etat["fin"])
+        while not etat["terminee"]:
+            params = dict(self.parametres, rows=self.rows, cursor=etat["curseur"],
+                          filter=filtre_fenetre(debut, fin))
+            lu = None
+            for tentative in range(MAX_TENTATIVES_LECTURE):
+                try:
+                    lu = self._get(params, self._lire_page, stream=True)
+                    break
+                except ValueError as e:   # JSON ou UTF-8 invalide, réponse tronquée
+                    self._afficher(f"⚠️ Page illisible [{cle}] (tentative {tentative+1}/{MAX_TENTATIVES_LECTURE}) : {e}")
+                    time.sleep(PAUSE_TENTATIVE)
+            if lu is None:
+                self._afficher(f"❌ Abandon de la fenêtre {cle} (reprise possible).")
+                return
+            page, lignes = lu
+
+            if len(lignes) == 0:
+                etat["terminee"] = True
+                self.magasin.maj_etat(cle, etat)
+                break
+
+            etat["curseur"] = page.next_cursor
+            etat["lignes"] += len(lignes)
+            self.magasin.ajouter(lignes, cle, dict(etat))
+            with self._verrou_affichage:
+                self._lignes_total += len(lignes)
+                total = self._lignes_total
+            self._afficher(f"📦 [{cle}] +{len(lignes)} lignes ({etat['lignes']}/{etat['attendues']}) — total {total}")
+
+        self._afficher(f"✅ Fenêtre {cle} terminée ({etat['lignes']} lignes)")
+
+    def _afficher(self, message):
+        with self._verrou_affichage:
+            print(message)
+
+    # === POINT D'ENTRÉE ===
+    def executer(self, reprise=False, debut=DATE_DEBUT, fin=None):
+        """Découpe (sauf en reprise), puis extrait toutes les fenêtres non terminées."""
+        cles = sorted(c for c, e in self.magasin.manifeste["etat"].items() if "debut" in e) if reprise else []
+        if not cles:
+            self.magasin.vider()
+            print("✂️ Découpage de la recherche en fenêtres de dates...")
+            for d, f, n in self.decouper(debut, fin):
+                cle = cle_fenetre(d, f)
+                self.magasin.maj_etat(cle, {
+                    "debut": d.isoformat(), "fin": f.isoformat(), "attendues": n,
+                    "curseur": "*", "lignes": 0, "terminee": False,
+                })
+                cles.append(cle)
+            print(f"🧩 {len(cles)} fenêtres à extraire avec {self.nb_travailleurs} travailleurs.\n")
+        else:
+            print(f"🔁 Reprise de {len(cles)} fenêtres enregistrées dans le manifeste.\n")
+
+        self._lignes_total = self.magasin.nb_lignes
+        restantes = [c for c in cles if not self.magasin.etat(c)["terminee"]]
+        with ThreadPoolExecutor(max_workers=self.nb_travailleurs) as pool:
+            list(pool.map(self._recolter_fenetre, restantes))
+
+        return all(self.magasin.etat(c)["terminee"] for c in cles)
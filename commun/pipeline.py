@@ -0,0 +1,77 @@
+##########################################################################
+#
+# Préchargement des pages de curseur (producteur / consommateur)
+# --------------------------------------------------------------
+#
+# Sans pipeline, la requête, l'extraction des notices, l'écriture du segment,
+# l'affichage et la pause s'enchaînent strictement : le réseau attend pendant
+# l'écriture. Ici un thread « chargeur » suit les `next-cursor` et dépose
+# chaque page extraite dans une file bornée, pendant que le thread principal
+# (« écrivain ») enregistre la page précédente. La file bornée évite que le
+# chargeur prenne trop d'avance en mémoire.
+#
+##########################################################################
+
+import queue
+import threading
+from collections import namedtuple
+
+# Page prête à être écrite : lignes extraites (liste ou tableau), curseur suivant, total annoncé
+PageChargee = namedtuple("PageChargee", ["lignes", "curseur_suivant", "total"])
+
+PROFONDEUR = 2
+
+_FIN = object()
+
+
+def precharger_pages(charger_page, curseur="*", profondeur=PROFONDEUR, pause=None):
+    """
+    Parcourt les pages d'un curseur en gardant la suivante en cours de chargement.
+
+    `charger_page(curseur)` renvoie une `PageChargee`, ou None en cas d'échec
+    définitif. `pause()` est appelée par le chargeur entre deux requêtes.
+    Les pages sont rendues dans l'ordre ; le parcours s'arrête après une page
+    vide ou un échec (None est alors rendu).
+    """
+    file = queue.Queue(maxsize=profondeur)
+    arret = threading.Event()
+
+    def deposer(element):
+        # On n'attend pas indéfiniment si le consommateur s'est arrêté
+        while not arret.is_set():
+            try:
+                file.put(element, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def chargeur():
+        courant = curseur
+        try:
+            while not arret.is_set():
+                page = charger_page(courant)
+                if not deposer(page) or page is None or len(page.lignes) == 0:
+                    return
+                courant = page.curseur_suivant
+                if pause is not None:
+                    pause()
+        except BaseException as e:
+            deposer(e)
+        finally:
+            deposer(_FIN)
+
+    thread = threading.Thread(target=chargeur, name="chargeur-pages", daemon=True)
+    thread.start()
+    try:
+        while True:
+            element = file.get()
+            if element is _FIN:
+                return
+            if isinstance(element, BaseException):
+                raise element
+            yield element
+            if element is None or len(element.lignes) == 0:
+                return
+    finally:
+        arret.set()
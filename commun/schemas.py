@@ -0,0 +1,111 @@
+##########################################################################
+#
+# Schémas de sortie des outils Crossref et mesure de la charge utile
+# ------------------------------------------------------------------
+#
+# Une notice Crossref complète (références, licences, financeurs...) pèse
+# souvent 10 à 30 Ko, alors que chaque outil n'en garde que quelques champs.
+# Chaque outil déclare ici, une seule fois, les colonnes de son tableau de
+# sortie, le champ Crossref dont chacune provient et sa conversion. Le
+# paramètre `select` des requêtes, la liste des champs lus en flux et la
+# construction du tableau (commun/colonnes.py) en sont déduits.
+#
+# Chaque schéma mesure aussi les octets reçus par notice : le résumé de fin
+# de récolte montre la réduction obtenue, et un avertissement signale une
+# charge au-delà du budget du schéma (paramètre `select` oublié ou ignoré).
+#
+##########################################################################
+
+import threading
+
+from commun.colonnes import annee, auteurs, date_heure, date_texte, jointure, premier
+
+
+class MesureCharge:
+    """Octets reçus et notices lues, cumulés sur toute une récolte (partageable entre threads)."""
+
+    def __init__(self, octets_max=None):
+        self.octets_max = octets_max
+        self.octets = 0
+        self.notices = 0
+        self._alerte = False
+        self._verrou = threading.Lock()
+
+    @property
+    def octets_par_notice(self):
+        return self.octets / self.notices if self.notices else 0.0
+
+    def ajouter(self, octets, notices):
+        """Ajoute une page ; avertit (une fois) si la moyenne dépasse le budget."""
+        with self._verrou:
+            self.octets += octets
+            self.notices += notices
+            depasse = (self.octets_max is not None and not self._alerte
+                       and self.notices and self.octets_par_notice > self.octets_max)
+            if depasse:
+                self._alerte = True
+        if depasse:
+            print(f"⚠️ Charge de {self.octets_par_notice:.0f} octets par notice, au-delà du budget "
+                  f"de {self.octets_max} : le paramètre select est-il bien appliqué ?")
+
+    def resume(self):
+        """Ligne de statistiques à afficher en fin de récolte."""
+        return (f"📦 Charge : {self.octets / 1e6:.1f} Mo reçus pour {self.notices} notices "
+                f"({self.octets_par_notice:.0f} octets par notice)")
+
+
+class Schema:
+    """
+    Tableau de sortie d'un outil : colonnes (nom, champ Crossref source, conversion).
+    Plusieurs colonnes peuvent venir du même champ ; conversion None = champ tel quel.
+    """
+
+    def __init__(self, nom, colonnes, octets_max=None):
+        self.nom = nom
+        self.colonnes = tuple(colonnes)
+        self.mesure = MesureCharge(octets_max)
+
+    @property
+    def noms(self):
+        return tuple(nom for nom, _, _ in self.colonnes)
+
+    @property
+    def champs(self):
+        """Champs Crossref à demander, sans doublon, dans l'ordre des colonnes."""
+        return tuple(dict.fromkeys(champ for _, champ, _ in self.colonnes))
+
+    @property
+    def select(self):
+        """Valeur du paramètre `select` des requêtes /works."""
+        return ",".join(self.champs)
+
+
+# === SCHÉMAS DES OUTILS ===
+# Budgets : un résumé reste sous quelques Ko ; sans résumé, quelques centaines d'octets.
+CROSSREF_V100 = Schema("crossref_scraper_v100", (
+    ("Titre", "title", premier), ("Auteurs", "author", auteurs(", ")), ("Année", "issued", annee),
+    ("DOI", "DOI", None), ("URL", "URL", None), ("Résumé", "abstract", None),
+    ("Mots-clés", "subject", jointure(", ")),
+), octets_max=6000)
+
+CROSSREF_V101 = Schema("crossref_scraper_v101", (
+    ("titre", "title", premier), ("auteurs", "author", auteurs("; ")), ("date", "issued", date_texte),
+    ("DOI", "DOI", None), ("URL", "URL", None), ("abstract", "abstract", None),
+    ("mots_cles", "subject", jointure("; ")),
+), octets_max=6000)
+
+CROSSREF_V102 = Schema("crossref_scraper_v102", (
+    ("Titre", "title", premier), ("Auteurs", "author", auteurs(", ", nettoyer=True)),
+    ("Année", "issued", annee), ("DOI", "DOI", None), ("URL", "URL", None), ("Résumé", "abstract", None),
+), octets_max=6000)
+
+GET_DOI = Schema("get_doi", (
+    ("DOI", "DOI", None), ("Date", "created", date_heure),
+), octets_max=400)
+
+GET_DOI_REVUE = Schema("get_doi (par ISSN)", (
+    ("DOI", "DOI", None), ("Date", "created", date_heure), ("Revue", "container-title", premier),
+    ("Éditeur", "publisher", None), ("ISSN", "ISSN", jointure(", ")),
+), octets_max=800)
+
+SCHEMAS = {schema.nom: schema for schema in (CROSSREF_V100, CROSSREF_V101, CROSSREF_V102, GET_DOI, GET_DOI_REVUE)}
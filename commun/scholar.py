@@ -0,0 +1,107 @@
+##########################################################################
+#
+# Lecture rapide du nombre de résultats d'une page Google Scholar
+# ---------------------------------------------------------------
+#
+# Le nombre de résultats se trouve dans le bloc `div#gs_ab_md`, tout en haut
+# de la page. Plutôt que de télécharger toute la page puis de construire un
+# arbre BeautifulSoup complet, on lit la réponse morceau par morceau et on
+# s'arrête dès que ce bloc est complet ; seul ce bloc est ensuite analysé.
+# La réponse est alors fermée sans télécharger la suite de la page.
+#
+# Les séparateurs de milliers dépendent de la langue de la page :
+#   en : About 1,230,000 results        fr : Environ 1 230 000 résultats
+#   de : Ungefähr 1.230.000 Ergebnisse  ch : 1'230'000 / 1’230’000
+# Un nombre de résultats est toujours entier : un séparateur suivi d'exactement
+# trois chiffres est donc toujours un séparateur de milliers.
+#
+# Le nombre retenu est celui de la formule du compteur (« N results »,
+# « N résultats »...), pas un autre nombre du bloc (numéro de page, année).
+#
+##########################################################################
+
+import html
+import re
+
+MARQUEUR = b'id="gs_ab_md"'
+TAILLE_MORCEAU = 8192
+
+_BALISE_DIV = re.compile(rb"<(/?)div\b", re.IGNORECASE)
+_BALISE = re.compile(r"<[^>]*>")
+_PARENTHESES = re.compile(r"\([^)]*\)")   # durée de la recherche : (0,05 s)
+_SEPARATEURS = " \u00a0\u202f\u2009,.'’"   # espaces (insécables, fines), virgule, point, apostrophes
+_NOMBRE = re.compile(r"\d{1,3}(?:[" + _SEPARATEURS + r"]\d{3})+(?!\d)|\d+")
+# Mot qui suit le nombre de résultats, selon la langue de la page
+_MOTS_RESULTATS = r"(?:results?|r[ée]sultats?|ergebnisse?|risultat[io]|resultados?|resultaten|wynik(?:i|ów)?|件)"
+_COMPTEUR = re.compile(r"(?<!\d)(" + _NOMBRE.pattern + r")\s*" + _MOTS_RESULTATS + r"\b", re.IGNORECASE)
+
+
+def bloc_compteur(contenu):
+    """
+    Renvoie le HTML interne du bloc `div#gs_ab_md` (bytes), b"" si le bloc
+    est vide, ou None si le bloc est absent ou pas encore complet.
+    """
+    debut = contenu.find(MARQUEUR)
+    if debut < 0:
+        return None
+    ouverture = contenu.find(b">", debut)
+    if ouverture < 0:
+        return None
+    profondeur = 1
+    for balise in _BALISE_DIV.finditer(contenu, ouverture + 1):
+        profondeur += -1 if balise.group(1) else 1
+        if profondeur == 0:
+            return contenu[ouverture + 1:balise.start()]
+    return None
+
+
+def lire_nombre(texte):
+    """
+    Nombre de la formule du compteur (« Page 2 of about 1,230 results » → 1230) ;
+    dans une langue non reconnue, plus grand nombre du bloc ; 0 sans nombre.
+    """
+    texte = _PARENTHESES.sub(" ", texte)
+    compteur = _COMPTEUR.search(texte)
+    if compteur:
+        return int(re.sub(r"\D", "", compteur.group(1)))
+    nombres = [int(re.sub(r"\D", "", n)) for n in _NOMBRE.findall(texte)]
+    return max(nombres) if nombres else 0
+
+
+def extraire_nombre_resultats(page):
+    """
+    Nombre de résultats d'une page Scholar (bytes ou str).
+    None si le bloc du compteur est absent (page de blocage, captcha...).
+    """
+    if isinstance(page, str):
+        page = page.encode("utf-8")
+    bloc = bloc_compteur(page)
+    if bloc is None:
+        return None
+    texte = html.unescape(_BALISE.sub(" ", bloc.decode("utf-8", errors="replace")))
+    return lire_nombre(texte)
+
+
+def lire_jusqua_compteur(morceaux):
+    """
+    Accumule les morceaux jusqu'à ce que le bloc du compteur soit complet.
+    Renvoie (nombre ou None, octets lus).
+    """
+    contenu = b""
+    for morceau in morceaux:
+        contenu += morceau
+        if bloc_compteur(contenu) is not None:
+            break
+    return extraire_nombre_resultats(contenu), len(contenu)
+
+
+def nombre_resultats_reponse(response, taille_morceau=TAILLE_MORCEAU):
+    """
+    Lit une réponse HTTP (ouverte avec stream=True) jusqu'au bloc du compteur
+    seulement, puis ferme la connexion. Renvoie le nombre, ou None si absent.
+    """
+    try:
+        nombre, _ = lire_jusqua_compteur(response.iter_content(taille_morceau))
+        return nombre
+    finally:
+        response.close()
@@ -0,0 +1,250 @@
+##########################################################################
+#
+# Écrivains de fichiers de sortie en flux, au choix du format
+# ----------------------------------------------------------
+#
+# `DataFrame.to_excel` construit tout le classeur en mémoire, sur un seul
+# thread, et Excel s'arrête à 1 048 576 lignes par feuille (65 536 pour
+# l'ancien .xls). Les grosses récoltes Crossref dépassent cette limite.
+#
+# Ici un écrivain reçoit le tableau morceau par morceau (DataFrame ou table
+# Arrow) et l'écrit au fil de l'eau, selon l'extension du fichier :
+#   .parquet  Parquet compressé zstd (un groupe de lignes par morceau) ;
+#   .csv.gz   CSV compressé gzip ;   .csv  CSV simple ;
+#   .jsonl    JSON Lines, une notice par ligne ;
+#   .xlsx     classeur openpyxl en écriture seule (mémoire constante), une
+#             nouvelle feuille est ouverte à chaque limite d'Excel atteinte.
+#
+# Le format se choisit à chaque exécution : variable d'environnement
+# SCRIPTORIUM_FORMAT (défaut xlsx) ou question posée par les scripts.
+# pyarrow et openpyxl ne sont importés qu'à l'ouverture d'un écrivain.
+#
+##########################################################################
+
+import gzip
+import os
+
+from commun.mesures import MESURES
+
+FORMATS = ("xlsx", "parquet", "csv.gz", "csv", "jsonl")
+MAX_LIGNES_XLSX = 1_048_576   # en-tête compris
+TAILLE_MORCEAU = 100_000      # lignes par morceau relu
+
+
+def _format_environnement():
+    """Format lu dans SCRIPTORIUM_FORMAT ; une valeur inconnue retombe sur xlsx."""
+    valeur = os.environ.get("SCRIPTORIUM_FORMAT", "").strip().lower().lstrip(".")
+    if valeur and valeur not in FORMATS:
+        print(f"⚠️ SCRIPTORIUM_FORMAT inconnu « {valeur} » ({', '.join(FORMATS)}) : xlsx utilisé.")
+        return "xlsx"
+    return valeur or "xlsx"
+
+
+FORMAT_PAR_DEFAUT = _format_environnement()
+
+
+def format_de(chemin):
+    """Format d'un fichier d'après son extension (xlsx par défaut)."""
+    for format_sortie in FORMATS:
+        if chemin.endswith("." + format_sortie):
+            return format_sortie
+    return "xlsx"
+
+
+def nom_sortie(base, format_sortie=None):
+    """Nom du fichier de sortie : `base` + extension du format choisi."""
+    return f"{base}.{format_sortie or FORMAT_PAR_DEFAUT}"
+
+
+def demander_format(defaut=None):
+    """Demande le format de sortie ; Entrée garde le format par défaut."""
+    defaut = defaut or FORMAT_PAR_DEFAUT
+    reponse = input(f"💾 Format de sortie ({', '.join(FORMATS)} ; défaut {defaut}) : ").strip().lower().lstrip(".")
+    if reponse and reponse not in FORMATS:
+        print(f"⚠️ Format inconnu « {reponse} » : {defaut} utilisé.")
+    return reponse if reponse in FORMATS else defaut
+
+
+def _en_dataframe(tableau):
+    if hasattr(tableau, "to_pandas"):   # table Arrow
+        return tableau.to_pandas()
+    return tableau
+
+
+# === ÉCRIVAINS ===
+class Ecrivain:
+    """Écrivain en flux : `ecrire(tableau)` autant de fois que nécessaire, puis `fermer()`."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.lignes = 0
+        self._entame = False
+
+    def ecrire(self, tableau):
+        # Un premier morceau vide fixe quand même l'en-tête / le schéma
+        if len(tableau) or not self._entame:
+            with MESURES.phase("write"):
+                self._ecrire(tableau)
+            self._entame = True
+            self.lignes += len(tableau)
+
+    def _ecrire(self, tableau):
+        raise NotImplementedError
+
+    def fermer(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        with MESURES.phase("write"):
+            self.fermer()
+
+
+class EcrivainParquet(Ecrivain):
+    """Parquet zstd ; le schéma est celui donné, sinon celui du premier morceau."""
+
+    def __init__(self, chemin, schema=None, compression="zstd"):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow est nécessaire pour écrire du Parquet.")
+        self._pa, self._pq = pyarrow, pyarrow.parquet
+        super().__init__(chemin)
+        self.schema = schema
+        self.compression = compression
+        self._ecrivain = None
+
+    def _ecrire(self, tableau):
+        if not isinstance(tableau, self._pa.Table):
+            tableau = self._pa.Table.from_pandas(tableau, preserve_index=False)
+        if self._ecrivain is None:
+            self.schema = self.schema or tableau.schema.remove_metadata()
+            self._ecrivain = self._pq.ParquetWriter(self.chemin, self.schema, compression=self.compression)
+        self._ecrivain.write_table(tableau.select(self.schema.names).cast(self.schema))
+
+    def fermer(self):
+        if self._ecrivain is not None:
+            self._ecrivain.close()
+        elif self.schema is not None:
+            self._pq.write_table(self.schema.empty_table(), self.chemin)
+
+
+class EcrivainCSV(Ecrivain):
+    """CSV (UTF-8), compressé gzip si le fichier se termine par .gz."""
+
+    def __init__(self, chemin):
+        super().__init__(chemin)
+        if chemin.endswith(".gz"):
+            self._fichier = gzip.open(chemin, "wt", encoding="utf-8", newline="")
+        else:
+            self._fichier = open(chemin, "w", encoding="utf-8", newline="")
+
+    def _ecrire(self, tableau):
+        _en_dataframe(tableau).to_csv(self._fichier, header=not self._entame, index=False)
+
+    def fermer(self):
+        self._fichier.close()
+
+
+class EcrivainJSONL(Ecrivain):
+    """JSON Lines : un objet JSON par ligne du tableau."""
+
+    def __init__(self, chemin):
+        super().__init__(chemin)
+        self._fichier = open(chemin, "w", encoding="utf-8")
+
+    def _ecrire(self, tableau):
+        texte = _en_dataframe(tableau).to_json(orient="records", lines=True, force_ascii=False)
+        if texte:
+            self._fichier.write(texte if texte.endswith("\n") else texte + "\n")
+
+    def fermer(self):
+        self._fichier.close()
+
+
+class EcrivainXLSX(Ecrivain):
+    """
+    Classeur .xlsx en écriture seule (openpyxl) : les lignes partent sur le
+    disque au fil de l'eau. Au-delà de la limite d'Excel, une nouvelle
+    feuille (même en-tête) est ouverte.
+    """
+
+    def __init__(self, chemin, feuille="Sheet1", max_lignes=MAX_LIGNES_XLSX):
+        from openpyxl import Workbook
+
+        super().__init__(chemin)
+        self.feuille = feuille
+        self.max_lignes = max_lignes
+        self._classeur = Workbook(write_only=True)
+        self._feuille = None
+        self._lignes_feuille = 0
+        self._entete = None
+        self._nb_feuilles = 0
+
+    def _nouvelle_feuille(self):
+        self._nb_feuilles += 1
+        titre = self.feuille if self._nb_feuilles == 1 else f"{self.feuille} ({self._nb_feuilles})"
+        self._feuille = self._classeur.create_sheet(titre)
+        self._feuille.append(self._entete)
+        self._lignes_feuille = 1
+
+    def _ecrire(self, tableau):
+        df = _en_dataframe(tableau)
+        if self._entete is None:
+            self._entete = [str(c) for c in df.columns]
+            self._nouvelle_feuille()
+        # Cellules vides plutôt que NaN / NaT
+        df = df.astype(object).where(df.notna(), None)
+        for ligne in df.itertuples(index=False, name=None):
+            if self._lignes_feuille >= self.max_lignes:
+                self._nouvelle_feuille()
+            self._feuille.append(ligne)
+            self._lignes_feuille += 1
+
+    def fermer(self):
+        if self._feuille is None:
+            self._classeur.create_sheet(self.feuille)
+        self._classeur.save(self.chemin)
+
+
+def ouvrir_ecrivain(chemin, schema=None):
+    """Écrivain adapté à l'extension de `chemin` (.parquet, .csv.gz, .csv, .jsonl, sinon .xlsx)."""
+    format_sortie = format_de(chemin)
+    if format_sortie == "parquet":
+        return EcrivainParquet(chemin, schema)
+    if format_sortie in ("csv", "csv.gz"):
+        return EcrivainCSV(chemin)
+    if format_sortie == "jsonl":
+        return EcrivainJSONL(chemin)
+    return EcrivainXLSX(chemin)
+
+
+def ecrire_tableau(df, chemin, index=False):
+    """Écrit un tableau complet d'un coup (remplace `df.to_excel(chemin)`) ; renvoie le chemin."""
+    if index:
+        df = df.reset_index()
+    df = df.rename(columns=str)   # en-têtes texte (années d'un tableau croisé...)
+    with ouvrir_ecrivain(chemin) as ecrivain:
+        ecrivain.ecrire(df)
+    return chemin
+
+
+def lire_morceaux(chemin, taille=TAILLE_MORCEAU):
+    """Relit un fichier de sortie morceau par morceau (table Arrow pour Parquet, sinon DataFrame)."""
+    import pandas as pd
+
+    format_sortie = format_de(chemin)
+    if format_sortie == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        for lot in pq.ParquetFile(chemin).iter_batches(batch_size=taille):
+            yield pa.Table.from_batches([lot])
+    elif format_sortie in ("csv", "csv.gz"):
+        yield from pd.read_csv(chemin, chunksize=taille)
+    elif format_sortie == "jsonl":
+        yield from pd.read_json(chemin, lines=True, chunksize=taille)
+    else:
+        yield from pd.read_excel(chemin, sheet_name=None).values()   # toutes les feuilles
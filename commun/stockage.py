@@ -0,0 +1,284 @@
+##########################################################################
+#
+# Stockage des pages extraites en segments colonnes (Parquet / Arrow)
+# ------------------------------------------------------------------
+#
+# Chaque page de résultats est écrite UNE seule fois dans son propre segment.
+# Un petit manifeste JSON liste les segments déjà écrits (nom, nombre de lignes).
+# Le fichier combiné n'est produit qu'à la fin, par une seule étape de fusion
+# (compaction) : le coût d'une page reste constant quelle que soit la taille
+# de l'extraction, au lieu de relire et réécrire tout l'Excel à chaque page.
+#
+# Le manifeste porte aussi l'état de reprise (curseur, lignes, ...) de chaque
+# extraction ou fragment : il est enregistré dans la même écriture que le
+# segment qui le fait avancer. Le magasin peut être partagé entre threads.
+#
+# Le manifeste est la seule source de vérité : un segment n'existe qu'une fois
+# inscrit, avec son nombre de lignes et le curseur suivant, par un renommage
+# atomique. Un arrêt entre l'écriture du segment et celle du manifeste laisse
+# un fichier orphelin, réécrit au prochain ajout ; jamais une page en double
+# ou manquante. La reprise ne lit que le manifeste, quel que soit le nombre
+# de segments.
+#
+# `remplacer` substitue tout le contenu par un seul segment (fusion d'une
+# récolte delta par exemple) dans la même écriture atomique du manifeste ;
+# les anciens segments ne sont supprimés qu'ensuite.
+#
+# Avec `cle_unique` (ex. "DOI"), le magasin tient un index persistant des clés
+# déjà écrites (commun/index_doi.py) : chaque page est dédoublonnée contre
+# tout le magasin avant d'être écrite.
+#
+##########################################################################
+
+import json
+import os
+import threading
+
+import pandas as pd
+
+from commun.index_doi import NOM_INDEX, IndexDOI
+from commun.mesures import MESURES
+from commun.sortie import format_de, ouvrir_ecrivain
+
+try:
+    import pyarrow as pa  # moteur Parquet de pandas
+    import pyarrow.parquet as pq
+    FORMAT_SEGMENT = "parquet"
+except ImportError:
+    pa = None
+    # Sans pyarrow, on garde des segments binaires pandas (pickle) :
+    # toujours en ajout seul, simplement moins portables que Parquet.
+    FORMAT_SEGMENT = "pickle"
+
+NOM_MANIFESTE = "manifeste.json"
+
+
+def numero_segment(nom):
+    """Numéro d'un segment d'après son nom (segment_000012.parquet → 12)."""
+    return int(nom.split("_")[1].split(".")[0])
+
+
+def _colonne(tableau, nom):
+    """Valeurs d'une colonne (DataFrame ou table Arrow)."""
+    if pa is not None and isinstance(tableau, pa.Table):
+        return tableau.column(nom).to_pylist()
+    return tableau[nom]
+
+
+def _filtrer(tableau, masque):
+    """Lignes dont le masque est vrai (DataFrame ou table Arrow)."""
+    if pa is not None and isinstance(tableau, pa.Table):
+        return tableau.filter(pa.array(masque, type=pa.bool_()))
+    return tableau[masque]
+
+
+def fusionner_par_cle(ancien, nouveau, colonne="DOI"):
+    """
+    Mise à jour par clé (upsert) : les lignes de `nouveau` remplacent celles de
+    `ancien` ayant la même clé (sans tenir compte de la casse), les autres
+    sont ajoutées. Les lignes sans clé sont toutes conservées.
+    """
+    df = pd.concat([ancien, nouveau], ignore_index=True)
+    cles = df[colonne].fillna("").astype(str).str.strip().str.lower()
+    doublons = cles.duplicated(keep="last") & (cles != "")
+    return df[~doublons].reset_index(drop=True)
+
+
+def ecrire_json_atomique(chemin, contenu):
+    """Écrit un JSON via un fichier temporaire puis un renommage atomique."""
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(contenu, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+    # Rend le renommage lui-même durable (POSIX ; sans effet ailleurs)
+    if hasattr(os, "O_DIRECTORY"):
+        dossier = os.open(os.path.dirname(os.path.abspath(chemin)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dossier)
+        finally:
+            os.close(dossier)
+
+
+class MagasinSegments:
+    """
+    Magasin de segments en ajout seul, décrit par un manifeste.
+    Le combiné final est écrit une seule fois par `compacter`.
+    `cle_unique` : colonne dédoublonnée contre tout le magasin (index persistant).
+    """
+
+    def __init__(self, dossier, cle_unique=None):
+        self.dossier = dossier
+        self.chemin_manifeste = os.path.join(dossier, NOM_MANIFESTE)
+        os.makedirs(dossier, exist_ok=True)
+        self._verrou = threading.Lock()
+        self._verrou_index = threading.Lock()
+        self._numero_reserve = 0
+        self.manifeste = self._charger_manifeste()
+        self.cle_unique = cle_unique
+        self.index = None
+        if cle_unique is not None:
+            self.index = IndexDOI(os.path.join(dossier, NOM_INDEX))
+            self._rattraper_index()
+
+    def _rattraper_index(self):
+        """Indexe les segments inscrits au manifeste mais pas encore dans l'index (arrêt brutal)."""
+        indexes = self.index.segments_indexes()
+        for segment in self.segments:
+            if segment["fichier"] not in indexes:
+                self.index.enregistrer(self.lire_segment(segment)[self.cle_unique], segment["fichier"])
+
+    def _charger_manifeste(self):
+        if os.path.exists(self.chemin_manifeste):
+            with open(self.chemin_manifeste, "r", encoding="utf-8") as f:
+                manifeste = json.load(f)
+            manifeste.setdefault("etat", {})
+            manifeste.setdefault("lignes", sum(seg["lignes"] for seg in manifeste["segments"]))
+            return manifeste
+        return {"version": 1, "segments": [], "lignes": 0, "etat": {}}
+
+    def _ecrire_manifeste(self):
+        ecrire_json_atomique(self.chemin_manifeste, self.manifeste)
+
+    @property
+    def segments(self):
+        return self.manifeste["segments"]
+
+    @property
+    def nb_lignes(self):
+        return self.manifeste["lignes"]
+
+    def prochain_numero(self):
+        return len(self.segments) + 1
+
+    def etat(self, cle):
+        """État de reprise enregistré sous `cle` (None s'il n'existe pas)."""
+        with self._verrou:
+            etat = self.manifeste["etat"].get(cle)
+            return dict(etat) if etat is not None else None
+
+    def maj_etat(self, cle, etat):
+        """Enregistre un état de reprise sans ajouter de segment."""
+        with self._verrou:
+            self.manifeste["etat"][cle] = etat
+            self._ecrire_manifeste()
+
+    def _ecrire_segment(self, df):
+        """Écrit `df` (DataFrame ou table Arrow) sous un numéro libre ; renvoie (nom, chemin)."""
+        with self._verrou:
+            dernier = max((numero_segment(seg["fichier"]) for seg in self.segments), default=0)
+            numero = max(self.prochain_numero(), dernier + 1, self._numero_reserve + 1)
+            self._numero_reserve = numero
+        extension = "parquet" if FORMAT_SEGMENT == "parquet" else "pkl"
+        nom = f"segment_{numero:06d}.{extension}"
+        chemin = os.path.join(self.dossier, nom)
+
+        with MESURES.phase("write"):
+            if FORMAT_SEGMENT == "parquet" and isinstance(df, pa.Table):
+                pq.write_table(df, chemin)   # table Arrow : écrite sans passer par pandas
+            elif FORMAT_SEGMENT == "parquet":
+                df.to_parquet(chemin, index=False)
+            else:
+                df.to_pickle(chemin)
+        return nom, chemin
+
+    def ajouter(self, df, cle_etat=None, etat=None):
+        """
+        Écrit une page (DataFrame ou table Arrow) comme nouveau segment puis
+        l'enregistre dans le manifeste.
+        Si `cle_etat` est donné, `etat` est enregistré dans la même écriture.
+        Avec un index, les lignes dont la clé est déjà connue sont écartées.
+        """
+        if self.index is None:
+            return self._inscrire(df, cle_etat, etat)
+        # Filtrage, écriture puis indexation : une page à la fois
+        with self._verrou_index:
+            df = _filtrer(df, self.index.nouveaux(_colonne(df, self.cle_unique)))
+            chemin = self._inscrire(df, cle_etat, etat)
+            self.index.enregistrer(_colonne(df, self.cle_unique), os.path.basename(chemin))
+        return chemin
+
+    def _inscrire(self, df, cle_etat, etat):
+        nom, chemin = self._ecrire_segment(df)
+
+        # Le segment n'existe pour le magasin qu'une fois inscrit au manifeste
+        with self._verrou:
+            self.segments.append({"fichier": nom, "lignes": len(df), "format": FORMAT_SEGMENT})
+            self.manifeste["lignes"] += len(df)
+            if cle_etat is not None:
+                self.manifeste["etat"][cle_etat] = etat
+            self._ecrire_manifeste()
+        return chemin
+
+    def remplacer(self, df, cle_etat=None, etat=None):
+        """
+        Remplace tout le contenu du magasin par `df` (un seul segment).
+        Les états de reprise sont conservés ; les anciens segments ne sont
+        supprimés qu'une fois le nouveau manifeste écrit.
+        """
+        nom, chemin = self._ecrire_segment(df)
+        with self._verrou:
+            anciens = self.segments
+            self.manifeste["segments"] = [{"fichier": nom, "lignes": len(df), "format": FORMAT_SEGMENT}]
+            self.manifeste["lignes"] = len(df)
+            if cle_etat is not None:
+                self.manifeste["etat"][cle_etat] = etat
+            self._ecrire_manifeste()
+        for segment in anciens:
+            ancien = os.path.join(self.dossier, segment["fichier"])
+            if os.path.exists(ancien):
+                os.remove(ancien)
+        if self.index is not None:
+            self.index.vider()
+            self.index.enregistrer(_colonne(df, self.cle_unique), nom)
+        return chemin
+
+    def lire_tout(self):
+        """Tous les segments réunis en un seul DataFrame (vide s'il n'y en a pas)."""
+        if not self.segments:
+            return pd.DataFrame()
+        return pd.concat(list(self.iterer()), ignore_index=True)
+
+    def lire_segment(self, segment):
+        chemin = os.path.join(self.dossier, segment["fichier"])
+        if segment["format"] == "parquet":
+            return pd.read_parquet(chemin)
+        return pd.read_pickle(chemin)
+
+    def iterer(self):
+        """Parcourt les segments dans l'ordre d'écriture, un DataFrame à la fois."""
+        for segment in self.segments:
+            yield self.lire_segment(segment)
+
+    def schema_arrow(self):
+        """Schéma Arrow commun à tous les segments Parquet (types élargis au besoin), ou None."""
+        schemas = [pq.read_schema(os.path.join(self.dossier, seg["fichier"])).remove_metadata()
+                   for seg in self.segments if seg["format"] == "parquet"]
+        return pa.unify_schemas(schemas, promote_options="permissive") if schemas else None
+
+    def compacter(self, fichier_sortie):
+        """
+        Écrit le fichier combiné segment par segment (mémoire constante) ; renvoie
+        son nombre de lignes. Le format suit l'extension (voir commun/sortie.py).
+        """
+        if not self.segments:
+            return None
+        schema = self.schema_arrow() if format_de(fichier_sortie) == "parquet" else None
+        with MESURES.phase("write"), ouvrir_ecrivain(fichier_sortie, schema) as ecrivain:
+            for df in self.iterer():
+                ecrivain.ecrire(df)
+        return ecrivain.lignes
+
+    def vider(self):
+        """Supprime tous les segments et remet le manifeste à zéro."""
+        with self._verrou:
+            for segment in self.segments:
+                chemin = os.path.join(self.dossier, segment["fichier"])
+                if os.path.exists(chemin):
+                    os.remove(chemin)
+            self.manifeste = {"version": 1, "segments": [], "lignes": 0, "etat": {}}
+            self._numero_reserve = 0
+            self._ecrire_manifeste()
+        if self.index is not None:
+            self.index.vider()
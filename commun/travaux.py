@@ -0,0 +1,243 @@
+##########################################################################
+#
+# Lots de travaux : comptes, récoltes Crossref et DOI de revues, sans questions
+# ---------------------------------------------------------------------------
+#
+# Chaque script pose ses questions avec input(), et chaque mot-clé coûte un
+# processus Python neuf : imports, connexions et cache repartent de zéro.
+# Ici un fichier de travaux (JSON, ou TOML) décrit tout le lot, exécuté dans
+# un seul processus : connexions persistantes, limiteurs de débit et cache
+# des comptes sont partagés d'un travail à l'autre.
+#
+# Types de travaux :
+#   comptes  mots-clés × années ; sources crossref, openalex, semanticscholar
+#            (moteur de grille, journal de reprise) et scholar ; un tableau
+#            comparatif mots-clés × années par source ;
+#   recolte  notices Crossref d'un ou plusieurs mots-clés
+#            (crossref_scraper_v102) : mode complet, delta ou fragmente ;
+#   doi      tous les DOI d'une revue (get_doi.py), un ou deux ISSN.
+#
+# Les dépendances lourdes (pandas, pyarrow, modules des scripts) ne sont
+# importées qu'au lancement du travail qui en a besoin : un lot de comptes
+# envoie ses premières requêtes sans avoir chargé pandas.
+#
+# Exemple de fichier :
+#   {"format": "csv", "dossier": "resultats", "travaux": [
+#     {"type": "comptes", "sources": ["crossref", "openalex"],
+#      "mots_cles": ["informal economy", "shadow economy"], "debut": 2000, "fin": 2024},
+#     {"type": "recolte", "mot_cle": "informal economy", "mode": "delta"},
+#     {"type": "doi", "issn": ["0022-0388", "1743-9140"]}]}
+#
+##########################################################################
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from commun.mesures import MESURES
+from commun.sortie import FORMATS, nom_sortie
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TYPES = ("comptes", "recolte", "doi")
+SOURCES_COMPTES = ("crossref", "openalex", "semanticscholar", "scholar")
+MODES_RECOLTE = ("complet", "delta", "fragmente")
+
+
+# === LECTURE DU LOT ===
+def charger_lot(chemin):
+    """Lit un fichier de travaux (.toml, sinon JSON) ; renvoie le lot vérifié."""
+    if chemin.endswith(".toml"):
+        import tomllib
+        with open(chemin, "rb") as fichier:
+            lot = tomllib.load(fichier)
+    else:
+        with open(chemin, encoding="utf-8") as fichier:
+            lot = json.load(fichier)
+    return verifier_lot(lot)
+
+
+def _liste(valeur):
+    if valeur is None:
+        return []
+    return [valeur] if isinstance(valeur, (str, int)) else list(valeur)
+
+
+def verifier_lot(lot):
+    """
+    Vérifie et complète un lot {"format", "dossier", "travaux": [...]} :
+    chaque travail reçoit un nom, ses listes (mots-clés, sources, ISSN) et
+    ses valeurs par défaut. Lève ValueError au premier travail invalide.
+    """
+    if isinstance(lot, list):
+        lot = {"travaux": lot}
+    format_sortie = lot.get("format")
+    if format_sortie is not None and format_sortie not in FORMATS:
+        raise ValueError(f"format inconnu « {format_sortie} » (choix : {', '.join(FORMATS)})")
+    travaux = []
+    for numero, travail in enumerate(lot.get("travaux", []), 1):
+        travail = dict(travail)
+        type_travail = travail.get("type")
+        nom = travail.setdefault("nom", f"travail{numero}_{type_travail}")
+        if type_travail not in TYPES:
+            raise ValueError(f"{nom} : type inconnu « {type_travail} » (choix : {', '.join(TYPES)})")
+        if type_travail in ("comptes", "recolte"):
+            travail["mots_cles"] = [m.strip() for m in _liste(travail.pop("mot_cle", None)) + _liste(travail.get("mots_cles"))
+                                    if m.strip()]
+            if not travail["mots_cles"]:
+                raise ValueError(f"{nom} : aucun mot-clé")
+        if type_travail == "comptes":
+            travail["sources"] = _liste(travail.get("sources")) or ["crossref"]
+            inconnues = set(travail["sources"]) - set(SOURCES_COMPTES)
+            if inconnues:
+                raise ValueError(f"{nom} : source(s) inconnue(s) {sorted(inconnues)} (choix : {', '.join(SOURCES_COMPTES)})")
+            travail.setdefault("fin", datetime.now().year)
+            if "debut" not in travail or int(travail["debut"]) > int(travail["fin"]):
+                raise ValueError(f"{nom} : période invalide (debut et fin attendus, debut <= fin)")
+        elif type_travail == "recolte":
+            travail.setdefault("mode", "complet")
+            if travail["mode"] not in MODES_RECOLTE:
+                raise ValueError(f"{nom} : mode inconnu « {travail['mode']} » (choix : {', '.join(MODES_RECOLTE)})")
+        elif type_travail == "doi":
+            travail["issn"] = [str(issn).strip() for issn in _liste(travail.get("issn")) if str(issn).strip()]
+            if not 1 <= len(travail["issn"]) <= 2:
+                raise ValueError(f"{nom} : un ou deux ISSN attendus")
+        travaux.append(travail)
+    return {"format": format_sortie, "dossier": lot.get("dossier"), "travaux": travaux}
+
+
+# === EXÉCUTION DES TRAVAUX ===
+def _importer_script(module):
+    """Importe un script du dépôt (racine ou keyword_occurrences/) à la demande."""
+    for dossier in (RACINE, os.path.join(RACINE, "keyword_occurrences")):
+        if dossier not in sys.path:
+            sys.path.append(dossier)
+    return __import__(module)
+
+
+def _afficher_compte(source, mot, annee, nombre, origine):
+    if nombre is None:
+        print(f"❌ [{source}] {mot} | {annee} : échec")
+    else:
+        print(f"✅ [{source}] {mot} | {annee} : {nombre} publications" + (f" ({origine})" if origine == "cache" else ""))
+
+
+def _compter_scholar(mots_cles, debut, fin):
+    """Lignes Mot-clé / Année / Occurrences pour Google Scholar (requêtes une par une)."""
+    get_num_results = _importer_script("keyword_occurrences_google_scholar").get_num_results
+    lignes = []
+    for mot in mots_cles:
+        for annee in range(debut, fin + 1):
+            nombre, succes = get_num_results(f'"{mot}"', annee)
+            _afficher_compte("scholar", mot, annee, nombre if succes else None, "requete")
+            lignes.append({"Mot-clé": mot, "Année": annee, "Occurrences": nombre})
+    return lignes
+
+
+def executer_comptes(travail, format_sortie=None):
+    """Comptes mots-clés × années ; renvoie les tableaux comparatifs écrits (un par source)."""
+    from commun.grille import Grille
+
+    debut, fin = int(travail["debut"]), int(travail["fin"])
+    sources_grille = [s for s in travail["sources"] if s != "scholar"]
+    lignes = {}
+    grille = None
+    if sources_grille:
+        # Toutes les sources de la grille en même temps ; reprise automatique si le journal existe
+        journal = f"journal_{travail['nom']}.jsonl"
+        grille = Grille(sources_grille, travail["mots_cles"], debut, fin, concurrence=travail.get("concurrence"),
+                        histogrammes=travail.get("histogrammes", True), journal=journal,
+                        reprise=os.path.exists(journal))
+        grille.executer(sur_resultat=_afficher_compte)
+        lignes = {source: grille.lignes(source) for source in sources_grille}
+    if "scholar" in travail["sources"]:
+        lignes["scholar"] = _compter_scholar(travail["mots_cles"], debut, fin)
+
+    import pandas as pd
+    from commun.sortie import ecrire_tableau
+
+    horodatage = datetime.now().strftime("%Y%m%d_%H%M%S")
+    fichiers = []
+    for source, lignes_source in lignes.items():
+        tableau = pd.DataFrame(lignes_source).pivot(index="Mot-clé", columns="Année", values="Occurrences")
+        nom = nom_sortie(f"{source}_tableau_comparatif_{travail['nom']}_{debut}_{fin}_{horodatage}", format_sortie)
+        fichiers.append(ecrire_tableau(tableau, nom, index=True))
+        print(f"📊 Tableau comparatif {source} : {nom}")
+    if grille is not None and grille.supprimer_journal_si_complete():
+        print(f"⚠️ Cellules en échec : journal {grille.chemin_journal} conservé, relancer le lot pour les reprendre")
+    return fichiers
+
+
+def executer_recolte(travail, format_sortie=None):
+    """Récolte Crossref de chaque mot-clé (mode complet, delta ou fragmente) ; renvoie les fichiers combinés."""
+    scraper = _importer_script("crossref_scraper_v102")
+    reprise = travail.get("reprise", False)
+    fichiers = []
+    for mot in travail["mots_cles"]:
+        print(f"\n📘 Récolte Crossref « {mot} » (mode {travail['mode']})")
+        if travail["mode"] == "delta":
+            fichier = scraper.fetch_crossref_delta(mot, format_sortie)
+        elif travail["mode"] == "fragmente":
+            fichier = scraper.fetch_crossref_data_fragmente(mot, resume=reprise, format_sortie=format_sortie,
+                                                            nb_travailleurs=travail.get("travailleurs", 4))
+        else:
+            fichier = scraper.fetch_crossref_data(mot, resume=reprise, format_sortie=format_sortie)
+        if fichier is None:
+            raise RuntimeError(f"récolte incomplète pour « {mot} » (à reprendre)")
+        fichiers.append(fichier)
+    return fichiers
+
+
+def executer_doi(travail, format_sortie=None):
+    """Tous les DOI d'une revue ; renvoie le fichier texte et le tableau DOI / date."""
+    recuperer_dois = _importer_script("get_doi").recuperer_dois
+    issn1, issn2 = (travail["issn"] + [""])[:2]
+    fichiers = recuperer_dois(issn1, issn2, travail.get("rapide", True), format_sortie)
+    if fichiers is None:
+        raise RuntimeError(f"récolte des DOI incomplète pour {', '.join(travail['issn'])} (à relancer)")
+    return list(fichiers)
+
+
+EXECUTEURS = {"comptes": executer_comptes, "recolte": executer_recolte, "doi": executer_doi}
+
+
+def executer_lot(lot, format_sortie=None, dossier=None, arret_sur_erreur=False):
+    """
+    Exécute les travaux du lot dans l'ordre, dans `dossier` (sinon celui du
+    lot, sinon le dossier courant). Un travail en échec est signalé puis
+    sauté (sauf `arret_sur_erreur`). Renvoie [(nom, réussi, fichiers, durée)].
+    """
+    format_sortie = format_sortie or lot.get("format")
+    dossier = dossier or lot.get("dossier")
+    depart = os.getcwd()
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+        os.chdir(dossier)   # les scripts écrivent (segments, journaux) dans le dossier courant
+    bilan = []
+    try:
+        for travail in lot["travaux"]:
+            print(f"\n▶️ {travail['nom']} ({travail['type']})")
+            debut = time.perf_counter()
+            try:
+                fichiers = EXECUTEURS[travail["type"]](travail, format_sortie)
+                bilan.append((travail["nom"], True, fichiers, time.perf_counter() - debut))
+            except Exception as e:
+                if arret_sur_erreur:
+                    raise
+                print(f"⛔ {travail['nom']} interrompu : {e}")
+                bilan.append((travail["nom"], False, [], time.perf_counter() - debut))
+    finally:
+        os.chdir(depart)
+    return bilan
+
+
+def afficher_bilan(bilan):
+    """Récapitulatif du lot, caches et mesures compris."""
+    from commun.cache_comptes import cache_partage
+
+    print("\n📋 Bilan du lot :")
+    for nom, reussi, fichiers, duree in bilan:
+        print(f"   {'✅' if reussi else '❌'} {nom} ({duree:.1f} s)" + (f" : {', '.join(fichiers)}" if fichiers else ""))
+    print(cache_partage().resume())
+    print(MESURES.ligne())
@@ -0,0 +1,92 @@
+##########################################################################
+#
+# Tri externe de couples (DOI, date) : runs triés sur disque + fusion
+# ------------------------------------------------------------------
+#
+# Une méga-revue compte des centaines de milliers de DOI. Les garder tous en
+# mémoire, puis les trier avec un `datetime.strptime` par élément, coûte
+# cher en temps comme en mémoire.
+#
+# Ici les dates ISO 8601 de Crossref (« 2021-03-04T10:22:31Z », même
+# format pour toutes) sont triées telles quelles : l'ordre des chaînes est
+# l'ordre chronologique, sans aucune conversion. Au-delà d'un seuil de
+# lignes, le lot en mémoire est trié puis déversé sur disque (un « run »,
+# fichier texte date<TAB>DOI) ; la lecture finale fusionne les runs
+# (heapq.merge, k voies) au fil de l'eau. Le tri est stable : à date égale,
+# l'ordre d'arrivée est conservé, comme avec l'ancien `list.sort`.
+#
+##########################################################################
+
+import heapq
+import os
+import shutil
+import tempfile
+from operator import itemgetter
+
+SEUIL_LIGNES = 200_000   # lignes gardées en mémoire avant déversement d'un run
+
+
+class TriExterne:
+    """
+    Trie des couples (DOI, date ISO) par date, en mémoire bornée.
+    `ajouter(...)` autant que nécessaire, puis une seule lecture avec `iterer()`.
+    """
+
+    def __init__(self, seuil_lignes=SEUIL_LIGNES, dossier=None):
+        self.seuil_lignes = seuil_lignes
+        self.dossier_parent = dossier
+        self.nb = 0
+        self._lot = []
+        self._runs = []
+        self._dossier = None
+
+    def ajouter(self, dois_dates):
+        self._lot.extend(dois_dates)
+        self.nb += len(dois_dates)
+        if len(self._lot) >= self.seuil_lignes:
+            self._deverser()
+
+    def _deverser(self):
+        if self._dossier is None:
+            self._dossier = tempfile.mkdtemp(prefix="tri_doi_", dir=self.dossier_parent)
+        self._lot.sort(key=itemgetter(1))
+        chemin = os.path.join(self._dossier, f"run_{len(self._runs):04d}.tsv")
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            fichier.writelines(f"{date}\t{doi}\n" for doi, date in self._lot)
+        self._runs.append(chemin)
+        self._lot = []
+
+    @staticmethod
+    def _lire_run(chemin):
+        with open(chemin, encoding="utf-8") as fichier:
+            for ligne in fichier:
+                date, doi = ligne.rstrip("\n").split("\t", 1)
+                yield doi, date
+
+    @property
+    def nb_runs(self):
+        return len(self._runs)
+
+    def iterer(self):
+        """Couples (DOI, date) dans l'ordre chronologique ; fusion des runs si déversement."""
+        self._lot.sort(key=itemgetter(1))
+        if not self._runs:
+            yield from self._lot
+            return
+        # Le dernier lot (en mémoire) vient après les runs : l'ordre d'arrivée départage les égalités
+        flux = [self._lire_run(chemin) for chemin in self._runs] + [iter(self._lot)]
+        yield from heapq.merge(*flux, key=itemgetter(1))
+
+    def fermer(self):
+        """Supprime les runs temporaires."""
+        if self._dossier is not None:
+            shutil.rmtree(self._dossier, ignore_errors=True)
+            self._dossier = None
+        self._runs = []
+        self._lot = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
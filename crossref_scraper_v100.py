@@ -8,38 +8,72 @@
 #
 # Fonctionnalités :
 #    - Extraction complète sans limite (par lots de 500).
-#    - Reprise automatique en cas d'arrêt, avec détection des fichiers sauvegardés.
-#    - Enregistrement des résultats par tranche (chunk) au format Excel.
+#    - Lecture en flux de chaque page : les notices sont extraites dès leur réception.
+#    - Seuls les champs du schéma de sortie sont demandés (select), charge mesurée.
+#    - Tableau de chaque page construit colonne par colonne (sans dict par notice).
+#    - La page suivante est téléchargée pendant l'écriture de la précédente.
+#    - Rythme des requêtes réglé par les limites annoncées par Crossref.
+#    - Reprise exacte en cas d'arrêt : un manifeste enregistre ensemble chaque
+#      tranche, son nombre de lignes et le curseur suivant (seul lu à la reprise).
+#    - Enregistrement des résultats par tranche (chunk), un segment par tranche.
+#    - Dédoublonnage par DOI contre tout le magasin (index persistant).
 #    - Gestion des erreurs réseau avec 5 minutes de tentatives progressives.
-#    - Fusion finale des données extraites.
+#    - Fusion finale des données extraites, écrite en flux au format choisi
+#      (xlsx, parquet, csv.gz, csv, jsonl : voir commun/sortie.py).
 #    - Affichage progressif, suivi en pourcentage et message clair pour l'utilisateur.
 #
 ##########################################################################
 
 import requests
-import time
-import pandas as pd
 import os
-import re
+import time
 from urllib.parse import quote
 
+from commun import client_http
+from commun.colonnes import ConstructeurColonnes
+from commun.flux_json import PageCrossref
+from commun.mesures import MESURES
+from commun.pipeline import PageChargee, precharger_pages
+from commun.schemas import CROSSREF_V100 as SCHEMA
+from commun.sortie import demander_format, nom_sortie
+from commun.stockage import MagasinSegments
+
 # === PARAMÈTRES GLOBAUX ===
 CHUNK_SIZE = 500
 MAX_TOTAL_RETRIES = 60  # nombre total de tentatives (5 minutes)
 RETRY_INTERVAL = 5      # en secondes
-EMAIL = "votre.email@example.com"  # à modifier
+EMAIL = client_http.EMAIL  # à modifier dans commun/client_http.py
 OUTPUT_DIR = "crossref_results"
+CLE_ETAT = "sequentiel"  # état de reprise (curseur suivant) dans le manifeste
+CONSTRUCTEUR = ConstructeurColonnes(SCHEMA)  # colonnes de sortie : voir commun/schemas.py
 
-# === FONCTION : récupérer le dernier chunk existant ===
-def detect_last_chunk(keyword_slug):
-    existing = [
-        f for f in os.listdir(OUTPUT_DIR)
-        if re.match(rf"chunk_(\d+)_({keyword_slug})\.xlsx", f)
-    ]
-    if not existing:
-        return 0
-    indices = [int(re.findall(r"chunk_(\d+)_", name)[0]) for name in existing]
-    return max(indices)
+# === FONCTION : charger une page (requête + extraction en flux) ===
+def charger_page(cursor):
+    url = (
+        f"https://api.crossref.org/works?query.bibliographic={safe_keyword}"
+        f"&rows={CHUNK_SIZE}&cursor={cursor}&mailto={EMAIL}&select={SCHEMA.select}"
+    )
+
+    retry_count = 0
+    while retry_count < MAX_TOTAL_RETRIES:
+        try:
+            response = client_http.get(url, stream=True)
+            if response.status_code != 200:
+                response.close()
+                if not client_http.reessayable(response.status_code):
+                    print(f"❌ Requête refusée (code {response.status_code}), sans nouvelle tentative.")
+                    return None
+                raise requests.exceptions.HTTPError(f"Code {response.status_code}")
+            # Chaque notice est extraite dès qu'elle est reçue
+            page = PageCrossref.depuis_reponse(response, SCHEMA.champs)
+            rows = CONSTRUCTEUR.construire(page)
+            SCHEMA.mesure.ajouter(page.octets, page.nb_items)
+            return PageChargee(rows, page.next_cursor, page.total_results)
+        except (requests.exceptions.RequestException, ValueError) as e:   # réseau, 429 / 5xx, page illisible
+            retry_count += 1
+            print(f"⚠️ Erreur (tentative {retry_count}/60) : {e}")
+            time.sleep(RETRY_INTERVAL)   # ce chargeur seulement : les 429 sont gérés par le client
+    return None
 
 # === INITIALISATION ===
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -47,7 +81,7 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 print("\n🔎 Ce script extrait toutes les publications de Crossref liées à un mot-clé.")
 print("📘 Il recherche dans les titres et les mots-clés des publications.")
-print("💾 Les résultats sont sauvegardés par tranches de 500 dans des fichiers Excel.")
+print("💾 Les résultats sont sauvegardés par tranches de 500, fusionnées en Excel à la fin.")
 print("🔁 En cas d'arrêt, vous pourrez relancer et reprendre l'extraction.\n")
 
 
@@ -59,107 +93,57 @@ if not keyword:
 safe_keyword = quote(keyword)
 keyword_slug = keyword.replace(" ", "_")
 cursor = "*"
-all_dataframes = []
-
-# === DÉTECTION DE SAUVEGARDES EXISTANTES ===
-last_chunk = detect_last_chunk(keyword_slug)
-resume = False
+magasin = MagasinSegments(os.path.join(OUTPUT_DIR, f"segments_{keyword_slug}"), cle_unique="DOI")
+final_name = nom_sortie(os.path.join(OUTPUT_DIR, f"crossref_all_{keyword_slug}"), demander_format())
 
-if last_chunk > 0:
-    print(f"\n📁 {last_chunk} chunks précédents détectés pour « {keyword} ».")
+# === DÉTECTION DE SAUVEGARDES EXISTANTES (manifeste seul) ===
+etat = magasin.etat(CLE_ETAT)
+if etat is not None and not etat["terminee"] and magasin.segments:
+    print(f"\n📁 {len(magasin.segments)} chunks précédents détectés pour « {keyword} » ({magasin.nb_lignes} publications).")
     rep = input("↩️ Voulez-vous reprendre à partir du dernier chunk sauvegardé ? (o/n) : ").lower()
     if rep == 'o':
-        resume = True
-        cursor_df = pd.read_excel(os.path.join(OUTPUT_DIR, f"chunk_{last_chunk}_{keyword_slug}.xlsx"))
-        # Charger tous les chunks précédents
-        for i in range(1, last_chunk + 1):
-            df_part = pd.read_excel(os.path.join(OUTPUT_DIR, f"chunk_{i}_{keyword_slug}.xlsx"))
-            all_dataframes.append(df_part)
-    else:
+        cursor = etat["curseur"]
+
+if cursor == "*":
+    if magasin.segments:
         print("🧹 Suppression des anciens fichiers...")
-        for f in os.listdir(OUTPUT_DIR):
-            if re.match(rf"chunk_\d+_{keyword_slug}\.xlsx", f) or f.startswith(f"crossref_all_{keyword_slug}"):
-                os.remove(os.path.join(OUTPUT_DIR, f))
-        last_chunk = 0
+    magasin.vider()
+    if os.path.exists(final_name):
+        os.remove(final_name)
 
-chunk_count = last_chunk
+chunk_count = len(magasin.segments)
 print("\n🚀 Lancement de l'extraction depuis Crossref...")
 print("⏳ Les résultats s'affichent progressivement. Veuillez patienter...\n")
 
-while True:
-    url = (
-        f"https://api.crossref.org/works?query.bibliographic={safe_keyword}"
-        f"&rows={CHUNK_SIZE}&cursor={cursor}&mailto={EMAIL}"
-    )
-
-    retry_count = 0
-    success = False
-
-    while retry_count < MAX_TOTAL_RETRIES:
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code != 200:
-                raise requests.exceptions.HTTPError(f"Code {response.status_code}")
-            data = response.json()
-            success = True
-            break
-        except Exception as e:
-            retry_count += 1
-            print(f"⚠️ Erreur (tentative {retry_count}/60) : {e}")
-            time.sleep(RETRY_INTERVAL)
-
-    if not success:
+# Le chargeur garde la page suivante en cours pendant l'écriture de la page courante
+for page in precharger_pages(charger_page, cursor):
+    if page is None:
         print("❌ Échec définitif après plusieurs tentatives.")
         break
 
-    items = data['message']['items']
-    if not items:
+    rows = page.lignes
+    if len(rows) == 0:
+        magasin.maj_etat(CLE_ETAT, {"curseur": cursor, "terminee": True})
         print("✅ Tous les résultats ont été extraits.")
         break
 
     if chunk_count == 0:
-        total_results = data['message']['total-results']
+        total_results = page.total
         print(f"📊 Total de publications trouvées : {total_results}\n")
 
-    rows = []
-    for item in items:
-        title = item.get('title', [''])[0]
-        authors = ", ".join(
-            [f"{a.get('given', '')} {a.get('family', '')}" for a in item.get('author', [])]
-        )
-        date_parts = item.get('issued', {}).get('date-parts', [[None]])
-        year = date_parts[0][0] if date_parts else None
-        doi = item.get('DOI', '')
-        url = item.get('URL', '')
-        abstract = item.get('abstract', '')
-        keywords = ", ".join(item.get('subject', []))
-
-        rows.append({
-            "Titre": title,
-            "Auteurs": authors,
-            "Année": year,
-            "DOI": doi,
-            "URL": url,
-            "Résumé": abstract,
-            "Mots-clés": keywords
-        })
-
-    df = pd.DataFrame(rows)
+    # Tranche, nombre de lignes et curseur suivant : une seule écriture du manifeste
     chunk_count += 1
-    filename = os.path.join(OUTPUT_DIR, f"chunk_{chunk_count}_{keyword_slug}.xlsx")
-    df.to_excel(filename, index=False)
-    all_dataframes.append(df)
+    cursor = page.curseur_suivant
+    filename = magasin.ajouter(rows, CLE_ETAT, {"curseur": cursor, "terminee": False})
 
     print(f"📦 Chunk {chunk_count} → {filename} ({len(rows)} publications)")
 
-    cursor = data['message']['next-cursor']
-    time.sleep(1)
-
 # === SAUVEGARDE FINALE ===
-if all_dataframes:
-    final_df = pd.concat(all_dataframes, ignore_index=True)
-    final_name = os.path.join(OUTPUT_DIR, f"crossref_all_{keyword_slug}.xlsx")
-    final_df.to_excel(final_name, index=False)
+if magasin.segments:
+    magasin.compacter(final_name)
     print(f"\n💾 Fusion complète sauvegardée : {final_name}")
+    print(magasin.index.resume())
+    print(SCHEMA.mesure.resume())
+    print(MESURES.ligne())
 else:
     print("📭 Aucun résultat n’a été traité.")
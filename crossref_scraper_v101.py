@@ -4,45 +4,67 @@
 # Ce script : 
 # - Recherche les publications liées à un mot-clé depuis l'API Crossref.
 # - Extrait les métadonnées : titre, auteur, date, DOI, résumé
-# - Les résultats sont sauvegardés par tranches de 500 publications.
-# - Met à jour automatiquement un fichier global fusionné après chaque tranche.
-# - Reprend automatiquement là où il s’est arrêté en cas d’interruption.
+#   (lecture en flux de chaque page, notice par notice)
+# - Les résultats sont sauvegardés par tranches de 500 publications
+#   (un segment Parquet par tranche, listé dans un manifeste).
+# - Écrit le fichier global fusionné une seule fois, en fin d'extraction, en flux
+#   et au format choisi (xlsx, parquet, csv.gz, csv, jsonl : commun/sortie.py).
+# - Écarte les DOI déjà enregistrés (index persistant des DOI du magasin).
+# - Reprend automatiquement là où il s’est arrêté en cas d’interruption
+#   (le manifeste enregistre ensemble chaque tranche, son nombre de lignes et
+#   le curseur suivant : la reprise est exacte et ne lit que le manifeste).
 # - Gère les erreurs et les connexions lentes (jusqu'à 60 tentatives de 5s)
 # - Fournit une progression en pourcentage dans la console.
+# - La page suivante est téléchargée pendant l'écriture de la précédente.
+# - Le rythme des requêtes suit les limites annoncées par Crossref.
 # ========================================
 
 
-import requests
-import time
 import os
-import glob
-import pandas as pd
+import time
+
+import requests
+
+from commun import client_http
+from commun.colonnes import ConstructeurColonnes
+from commun.flux_json import PageCrossref
+from commun.mesures import MESURES
+from commun.pipeline import PageChargee, precharger_pages
+from commun.schemas import CROSSREF_V101 as SCHEMA
+from commun.sortie import demander_format, nom_sortie
+from commun.stockage import MagasinSegments
+
+# Clé de l'état de reprise (curseur, lignes) dans le manifeste
+CLE_ETAT = "sequentiel"
+# Tableau de chaque page, construit colonne par colonne d'après le schéma de sortie
+CONSTRUCTEUR = ConstructeurColonnes(SCHEMA)
 
 # === FONCTION PRINCIPALE ===
-def fetch_crossref_data(mot_cle):
+def fetch_crossref_data(mot_cle, format_sortie=None):
     nom_dossier = f"resultats_{mot_cle.replace(' ', '_')}"
     os.makedirs(nom_dossier, exist_ok=True)
-    fichier_cursor = os.path.join(nom_dossier, "cursor.txt")
-    fichier_combine = f"{nom_dossier}.xlsx"
-    email_contact = "votre.email@example.com"
-
-    if os.path.exists(fichier_cursor):
-        with open(fichier_cursor, "r") as f:
-            cursor = f.read().strip()
-        print("🔁 Reprise à partir du dernier curseur enregistré.")
+    fichier_combine = nom_sortie(nom_dossier, format_sortie)
+    email_contact = client_http.EMAIL
+    magasin = MagasinSegments(os.path.join(nom_dossier, "segments"), cle_unique="DOI")
+
+    # Le manifeste donne le curseur suivant la dernière tranche enregistrée
+    etat = magasin.etat(CLE_ETAT)
+    if etat is not None and not etat["terminee"]:
+        cursor = etat["curseur"]
+        print(f"🔁 Reprise après {magasin.nb_lignes} lignes déjà enregistrées.")
     else:
         cursor = "*"
+        magasin.vider()
         print("🚀 Nouvelle recherche commencée.")
 
     try:
-        r_init = requests.get(
+        r_init = client_http.get(
             "https://api.crossref.org/works",
             params={
                 "query.bibliographic": mot_cle,
                 "rows": 0,
                 "mailto": email_contact
-            },
-            timeout=30
+            }
         )
         r_init.raise_for_status()
         total = r_init.json()["message"]["total-results"]
@@ -51,82 +73,70 @@ def fetch_crossref_data(mot_cle):
         print(f"\u26a0\ufe0f Impossible d’obtenir le total initial : {e}")
         total = None
 
-    def enregistrer_chunk(data, numero):
-        df = pd.DataFrame(data)
-        fichier = os.path.join(nom_dossier, f"chunk_{numero}.xlsx")
-        df.to_excel(fichier, index=False)
+    def enregistrer_chunk(df, numero, curseur_suivant):
+        # Tranche, nombre de lignes et curseur suivant : une seule écriture du manifeste
+        fichier = magasin.ajouter(df, CLE_ETAT, {"curseur": curseur_suivant, "terminee": False})
         print(f"📂 Chunk {numero} sauvegardé ({len(df)} lignes)")
         return fichier
 
-    def maj_fichier_combine():
-        fichiers = sorted(glob.glob(os.path.join(nom_dossier, "chunk_*.xlsx")))
-        all_dfs = []
-        for f in fichiers:
+    def ecrire_fichier_combine():
+        nb_lignes = magasin.compacter(fichier_combine)
+        if nb_lignes is not None:
+            print(f"📁 Fichier combiné écrit : {fichier_combine} ({nb_lignes} lignes)")
+        print(magasin.index.resume())
+        print(SCHEMA.mesure.resume())
+        print(MESURES.ligne())
+
+    # Chargeur : requête + extraction en flux d'une page (thread de préchargement)
+    def charger_page(cursor):
+        for tentative in range(60):
             try:
-                df = pd.read_excel(f)
-                all_dfs.append(df)
-            except Exception as e:
-                print(f"❌ Erreur lecture {f} : {e}")
-        if all_dfs:
-            df_final = pd.concat(all_dfs, ignore_index=True)
-            df_final.to_excel(fichier_combine, index=False)
-            print(f"📁 Fichier combiné mis à jour : {fichier_combine} ({len(df_final)} lignes)")
-
-    def trouver_prochain_numero():
-        existants = glob.glob(os.path.join(nom_dossier, "chunk_*.xlsx"))
-        if not existants:
-            return 1
-        numeros = [int(os.path.basename(f).split("_")[1].split(".")[0]) for f in existants]
-        return max(numeros) + 1
-
-    chunk_num = trouver_prochain_numero()
-    count_total = (chunk_num - 1) * 500
-
-    while True:
-        try:
-            for tentative in range(60):
-                try:
-                    r = requests.get(
-                        "https://api.crossref.org/works",
-                        params={
-                            "query.bibliographic": mot_cle,
-                            "rows": 500,
-                            "cursor": cursor,
-                            "mailto": email_contact,
-                            "select": "title,author,issued,DOI,URL,abstract,subject"
-                        },
-                        timeout=30
-                    )
+                r = client_http.get(
+                    "https://api.crossref.org/works",
+                    params={
+                        "query.bibliographic": mot_cle,
+                        "rows": 500,
+                        "cursor": cursor,
+                        "mailto": email_contact,
+                        "select": SCHEMA.select
+                    },
+                    stream=True
+                )
+                if r.status_code >= 400:
+                    r.close()
+                    if not client_http.reessayable(r.status_code):
+                        print(f"❌ Requête refusée (HTTP {r.status_code}), sans nouvelle tentative.")
+                        return None
                     r.raise_for_status()
-                    break
-                except Exception as e:
-                    print(f"⚠\ufe0f Erreur (tentative {tentative+1}/60) : {e}")
-                    time.sleep(5)
-            else:
+                # Chaque notice est extraite dès qu'elle est reçue
+                page = PageCrossref.depuis_reponse(r, SCHEMA.champs)
+                lignes = CONSTRUCTEUR.construire(page)
+                SCHEMA.mesure.ajouter(page.octets, page.nb_items)
+                return PageChargee(lignes, page.next_cursor, page.total_results)
+            except (requests.exceptions.RequestException, ValueError) as e:   # réseau, 429 / 5xx, page illisible
+                print(f"⚠\ufe0f Erreur (tentative {tentative+1}/60) : {e}")
+                time.sleep(5)   # ce chargeur seulement : les 429 sont gérés par le client
+        return None
+
+    chunk_num = magasin.prochain_numero()
+    count_total = magasin.nb_lignes
+
+    # Écrivain : enregistre chaque page pendant que la suivante se télécharge
+    try:
+        for page in precharger_pages(charger_page, cursor):
+            if page is None:
                 print("❌ Abandon après 60 tentatives.")
                 break
 
-            data = r.json()["message"]
-            items = data["items"]
-            if not items:
+            lignes = page.lignes
+            if len(lignes) == 0:
+                magasin.maj_etat(CLE_ETAT, {"curseur": cursor, "terminee": True})
                 print("✅ Extraction terminée.")
                 break
 
-            lignes = []
-            for item in items:
-                lignes.append({
-                    "titre": item.get("title", [""])[0],
-                    "auteurs": "; ".join([f"{a.get('given', '')} {a.get('family', '')}" for a in item.get("author", [])]) if item.get("author") else "",
-                    "date": "-".join(map(str, item.get("issued", {}).get("date-parts", [[None]])[0])),
-                    "DOI": item.get("DOI", ""),
-                    "URL": item.get("URL", ""),
-                    "abstract": item.get("abstract", ""),
-                    "mots_cles": "; ".join(item.get("subject", [])) if item.get("subject") else ""
-                })
-
-            fichier_chunk = enregistrer_chunk(lignes, chunk_num)
+            cursor = page.curseur_suivant
+            fichier_chunk = enregistrer_chunk(lignes, chunk_num, cursor)
             count_total += len(lignes)
-            maj_fichier_combine()
 
             if total:
                 pourcentage = count_total / total * 100
@@ -135,15 +145,12 @@ def fetch_crossref_data(mot_cle):
                 print(f"📈 Progression : {count_total} lignes extraites\n")
 
             chunk_num += 1
-            cursor = data["next-cursor"]
-            with open(fichier_cursor, "w") as f:
-                f.write(cursor)
 
-            time.sleep(1 + 5 * (chunk_num % 3))
+    except KeyboardInterrupt:
+        print("⏹️ Interruption par l’utilisateur.")
 
-        except KeyboardInterrupt:
-            print("⏹️ Interruption par l’utilisateur.")
-            break
+    # Fusion unique de tous les segments dans le fichier combiné
+    ecrire_fichier_combine()
 
 # === POINT D’ENTRÉE DU SCRIPT ===
 if __name__ == "__main__":
@@ -155,7 +162,7 @@ Ce script :
 ✔️ Recherche toutes les publications associées à un mot-clé
 ✔️ Extrait les métadonnées : titre, auteur, date, DOI, résumé
 ✔️ Sauvegarde automatiquement par tranches de 500 résultats
-✔️ Met à jour automatiquement un fichier combiné global
+✔️ Écrit un fichier combiné global en fin d’extraction (format au choix)
 ✔️ Gère les erreurs et les connexions lentes (jusqu’à 60 essais)
 
 ⚠️ Important :
@@ -166,4 +173,4 @@ Le mot-clé sera recherché dans le **titre** et le champ **bibliographique**.
     if not keyword:
         print("❌ Vous devez entrer un mot-clé valide.")
     else:
-        fetch_crossref_data(keyword)
+        fetch_crossref_data(keyword, demander_format())
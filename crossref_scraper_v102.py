@@ -5,48 +5,108 @@
 # Ce script : 
 # - Recherche les publications liées à un mot-clé depuis l'API Crossref.
 # - Extrait les métadonnées : titre, auteur, date, DOI, résumé
-# - Les résultats sont sauvegardés par tranches de 500 publications.
-# - Met à jour automatiquement un fichier global fusionné après chaque tranche.
-# - Demande s'il faut reprendre là où il s’est arrêté ou non en cas d’interruption.
+#   (lecture en flux de chaque page, notice par notice ; seuls les champs du
+#   schéma de sortie sont demandés à Crossref, charge par notice mesurée ;
+#   tableau de la page construit colonne par colonne, sans dict par notice)
+# - Les résultats sont sauvegardés par tranches de 500 publications
+#   (un segment Parquet par tranche, listé dans un manifeste).
+# - Écrit le fichier global fusionné une seule fois, en fin d'extraction, en flux
+#   et au format choisi (xlsx, parquet, csv.gz, csv, jsonl : commun/sortie.py).
+# - Écarte les DOI déjà enregistrés (index persistant des DOI du magasin).
+# - Demande s'il faut reprendre là où il s’est arrêté ou non en cas d’interruption
+#   (le manifeste enregistre ensemble chaque tranche, son nombre de lignes et
+#   le curseur suivant : la reprise est exacte et ne lit que le manifeste).
 # - Gère les erreurs et les connexions lentes (jusqu'à 60 tentatives de 5s)
 # - Fournit une progression en pourcentage dans la console.
+# - Mode parallèle optionnel : recherche découpée en fenêtres de dates,
+#   extraites simultanément, chacune avec son propre curseur.
+# - La page suivante est téléchargée pendant l'écriture de la précédente.
+# - Le rythme des requêtes suit les limites annoncées par Crossref.
+# - Mode delta : après une extraction complète, ne récupère que les notices
+#   indexées par Crossref depuis la dernière récolte (filtre from-index-date)
+#   et les fusionne par DOI dans le jeu existant (notices modifiées remplacées).
 # ========================================
 
 
-import requests
-import time
 import os
-import json
-import pandas as pd
+import time
+from datetime import datetime, timezone
 from urllib.parse import quote
 
-def fetch_crossref_data(keyword, resume=False):
+import requests
+
+from commun import client_http
+from commun.colonnes import ConstructeurColonnes
+from commun.flux_json import PageCrossref
+from commun.mesures import MESURES
+from commun.partition import RecolteFragmentee
+from commun.pipeline import PageChargee, precharger_pages
+from commun.schemas import CROSSREF_V102 as SCHEMA
+from commun.sortie import demander_format, nom_sortie
+from commun.stockage import MagasinSegments, fusionner_par_cle
+
+# Clé de l'état de reprise (curseur, lignes) dans le manifeste
+CLE_ETAT = "sequentiel"
+# Clé de la date de la dernière récolte réussie (point de départ du delta)
+CLE_DELTA = "delta"
+# Tableau de chaque page, construit colonne par colonne d'après le schéma de sortie
+CONSTRUCTEUR = ConstructeurColonnes(SCHEMA)
+
+def date_du_jour():
+    """Date UTC du jour (AAAA-MM-JJ), granularité du filtre from-index-date."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+def charger_page(base_url, params, cursor):
+    """Requête + extraction en flux d'une page (appelée par le thread de préchargement)."""
+    for attempt in range(60):
+        try:
+            response = client_http.get(base_url, params={**params, "cursor": cursor, "select": SCHEMA.select},
+                                       stream=True)
+            if response.status_code >= 400:
+                response.close()
+                if not client_http.reessayable(response.status_code):
+                    print(f"❌ Requête refusée (HTTP {response.status_code}), sans nouvelle tentative.")
+                    return None
+                response.raise_for_status()
+            # Chaque notice est extraite dès qu'elle est reçue
+            page = PageCrossref.depuis_reponse(response, SCHEMA.champs)
+            chunk_data = CONSTRUCTEUR.construire(page)
+            SCHEMA.mesure.ajouter(page.octets, page.nb_items)
+            return PageChargee(chunk_data, page.next_cursor, page.total_results)
+        except (requests.exceptions.RequestException, ValueError) as e:   # réseau, 429 / 5xx, page illisible
+            print(f"⚠️ Erreur (tentative {attempt+1}/60) : {e}")
+            time.sleep(5)   # ce chargeur seulement : les 429 sont gérés par le client
+    return None
+
+def fetch_crossref_data(keyword, resume=False, format_sortie=None):
+    """Extraction complète (ou reprise) ; renvoie le fichier combiné, None si l'extraction est incomplète."""
     encoded_keyword = quote(keyword)
     base_url = "https://api.crossref.org/works"
     rows_per_request = 500
-    email = "votre.email@example.com"
-    headers = {"User-Agent": f"Python Script (mailto:{email})"}
+    email = client_http.EMAIL
 
     # Dossiers de sauvegarde
     output_folder = f"resultats_{keyword.replace(' ', '_')}"
     os.makedirs(output_folder, exist_ok=True)
-    combined_file = f"{output_folder}.xlsx"
-    cursor_file = os.path.join(output_folder, "cursor.txt")
-
-    # Reprendre à partir du dernier curseur ?
-    if resume and os.path.exists(cursor_file):
-        with open(cursor_file, "r") as f:
-            cursor = f.read().strip()
-        print("🔁 Reprise intelligente à partir du dernier curseur sauvegardé...")
+    combined_file = nom_sortie(output_folder, format_sortie)
+    magasin = MagasinSegments(os.path.join(output_folder, "segments"), cle_unique="DOI")
+
+    # Reprendre à partir du dernier curseur ? (lu dans le manifeste, avec la dernière tranche)
+    etat = magasin.etat(CLE_ETAT) if resume else None
+    if etat is not None:
+        cursor = etat["curseur"]
+        debut_recolte = etat.get("debut", date_du_jour())
+        print(f"🔁 Reprise exacte après {magasin.nb_lignes} lignes déjà enregistrées...")
     else:
         cursor = "*"
+        debut_recolte = date_du_jour()
+        magasin.vider()
         print("🚀 Nouvelle extraction depuis le début...")
 
     # Chercher le nombre total estimé de résultats
     try:
-        count_response = requests.get(
-            f"{base_url}?query.bibliographic={encoded_keyword}&rows=0&mailto={email}",
-            headers=headers, timeout=30
+        count_response = client_http.get(
+            f"{base_url}?query.bibliographic={encoded_keyword}&rows=0&mailto={email}"
         )
         count_response.raise_for_status()
         total_results = count_response.json()["message"]["total-results"]
@@ -55,84 +115,39 @@ def fetch_crossref_data(keyword, resume=False):
         print(f"❌ Erreur lors de la récupération du nombre total de résultats : {e}")
         total_results = None
 
-    all_chunks = []
-    chunk_number = 1
-    total_saved = 0
-
-    if resume:
-        # Trouver le dernier chunk existant
-        existing_chunks = [f for f in os.listdir(output_folder) if f.startswith("chunk_") and f.endswith(".xlsx")]
-        if existing_chunks:
-            chunk_numbers = [int(f.split("_")[1].split(".")[0]) for f in existing_chunks]
-            chunk_number = max(chunk_numbers) + 1
-            total_saved = (chunk_number - 1) * rows_per_request
-
-    while True:
-        params = {
-            "query.bibliographic": keyword,
-            "rows": rows_per_request,
-            "cursor": cursor,
-            "mailto": email,
-        }
-
-        success = False
-        for attempt in range(60):
-            try:
-                response = requests.get(base_url, params=params, headers=headers, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                success = True
-                break
-            except Exception as e:
-                print(f"⚠️ Erreur (tentative {attempt+1}/60) : {e}")
-                time.sleep(5)
-
-        if not success:
+    # Reprise : le manifeste donne directement le numéro et le nombre de lignes
+    chunk_number = magasin.prochain_numero()
+    total_saved = magasin.nb_lignes
+
+    params = {
+        "query.bibliographic": keyword,
+        "rows": rows_per_request,
+        "mailto": email,
+    }
+
+    # Écrivain : enregistre chaque page pendant que la suivante se télécharge
+    complete = False
+    for page in precharger_pages(lambda c: charger_page(base_url, params, c), cursor):
+        if page is None:
             print("❌ Échec après 60 tentatives. Fin de l'extraction.")
             break
 
-        items = data["message"]["items"]
-        if not items:
+        if len(page.lignes) == 0:
+            magasin.maj_etat(CLE_ETAT, {"curseur": cursor, "debut": debut_recolte, "terminee": True})
+            # Point de départ du prochain delta : le début de cette récolte
+            magasin.maj_etat(CLE_DELTA, {"derniere_recolte": debut_recolte})
             print("✅ Aucune donnée supplémentaire. Extraction terminée.")
+            complete = True
             break
 
-        chunk_data = []
-        for item in items:
-            title = item.get("title", [""])[0]
-            authors = ", ".join([f"{a.get('given', '')} {a.get('family', '')}".strip() for a in item.get("author", [])]) if "author" in item else ""
-            date_parts = item.get("issued", {}).get("date-parts", [[None]])
-            year = date_parts[0][0]
-            doi = item.get("DOI", "")
-            url = item.get("URL", "")
-            abstract = item.get("abstract", "")
-            chunk_data.append({
-                "Titre": title,
-                "Auteurs": authors,
-                "Année": year,
-                "DOI": doi,
-                "URL": url,
-                "Résumé": abstract
-            })
-
-        df_chunk = pd.DataFrame(chunk_data)
-        chunk_path = os.path.join(output_folder, f"chunk_{chunk_number}.xlsx")
-        df_chunk.to_excel(chunk_path, index=False)
+        # Tranche, nombre de lignes et curseur suivant : une seule écriture du manifeste
+        df_chunk = page.lignes
+        cursor = page.curseur_suivant
+        magasin.ajouter(df_chunk, CLE_ETAT, {"curseur": cursor, "debut": debut_recolte, "terminee": False})
+        total_saved += len(df_chunk)
         print(f"\n💾 Chunk {chunk_number} sauvegardé ({len(df_chunk)} lignes)")
 
-        # Mise à jour fichier combiné
-        if os.path.exists(combined_file):
-            df_existing = pd.read_excel(combined_file)
-            df_combined = pd.concat([df_existing, df_chunk], ignore_index=True)
-        else:
-            df_combined = df_chunk
-        df_combined.to_excel(combined_file, index=False)
-        total_saved = len(df_combined)
-        print(f"📁 Fichier combiné mis à jour : {combined_file} ({total_saved} lignes)")
-
         chunk_number += 1
-        cursor = data["message"]["next-cursor"]
-        with open(cursor_file, "w") as f:
-            f.write(cursor)
 
         if total_results:
             percent = (total_saved / total_results) * 100
@@ -140,8 +155,112 @@ def fetch_crossref_data(keyword, resume=False):
         else:
             print(f"📈 Progression : {total_saved} lignes extraites...")
 
-        # Pause aléatoire entre 1 et 7 secondes
-        time.sleep(1 + (6 * time.time() % 1))
+    # Fusion unique de tous les segments dans le fichier combiné
+    nb_lignes = magasin.compacter(combined_file)
+    if nb_lignes is not None:
+        print(f"📁 Fichier combiné écrit : {combined_file} ({nb_lignes} lignes)")
+    print(magasin.index.resume())
+    print(SCHEMA.mesure.resume())
+    print(MESURES.ligne())
+    return combined_file if complete else None
+
+
+def fetch_crossref_delta(keyword, format_sortie=None):
+    """
+    Mise à jour incrémentale : notices indexées depuis la dernière récolte réussie,
+    fusionnées par DOI dans le jeu existant. Sans récolte précédente, extraction complète.
+    Renvoie le fichier combiné, None si la mise à jour est incomplète.
+    """
+    base_url = "https://api.crossref.org/works"
+    output_folder = f"resultats_{keyword.replace(' ', '_')}"
+    combined_file = nom_sortie(output_folder, format_sortie)
+    magasin = MagasinSegments(os.path.join(output_folder, "segments"), cle_unique="DOI")
+
+    etat_delta = magasin.etat(CLE_DELTA)
+    if etat_delta is None:
+        print("ℹ️ Aucune récolte complète enregistrée pour ce mot-clé : extraction complète.")
+        return fetch_crossref_data(keyword, format_sortie=format_sortie)
+    depuis = etat_delta["derniere_recolte"]
+
+    # Les notices du delta sont d'abord mises de côté dans leur propre magasin :
+    # un delta interrompu reprend à son curseur sans toucher au jeu existant.
+    delta = MagasinSegments(os.path.join(output_folder, "delta"))
+    etat = delta.etat(CLE_ETAT)
+    if etat is not None and etat.get("depuis") == depuis and not etat["terminee"]:
+        cursor, debut_recolte = etat["curseur"], etat["debut"]
+        print(f"🔁 Reprise du delta après {delta.nb_lignes} notices déjà reçues...")
+    else:
+        cursor, debut_recolte = "*", date_du_jour()
+        delta.vider()
+        print(f"🔄 Mise à jour : notices indexées depuis le {depuis}...")
+
+    params = {
+        "query.bibliographic": keyword,
+        "filter": f"from-index-date:{depuis}",
+        "rows": 500,
+        "mailto": client_http.EMAIL,
+    }
+    for page in precharger_pages(lambda c: charger_page(base_url, params, c), cursor):
+        if page is None:
+            print("❌ Échec après 60 tentatives. Relancez la mise à jour pour la reprendre.")
+            return None
+        if len(page.lignes) == 0:
+            break
+        cursor = page.curseur_suivant
+        delta.ajouter(page.lignes, CLE_ETAT,
+                      {"curseur": cursor, "depuis": depuis, "debut": debut_recolte, "terminee": False})
+        print(f"📥 {delta.nb_lignes} notices nouvelles ou modifiées reçues...")
+
+    # Fusion par DOI + nouvelle date de référence : une seule écriture du manifeste
+    if delta.segments:
+        avant = magasin.nb_lignes
+        fusion = fusionner_par_cle(magasin.lire_tout(), delta.lire_tout(), "DOI")
+        magasin.remplacer(fusion, CLE_DELTA, {"derniere_recolte": debut_recolte})
+        ajoutees = len(fusion) - avant
+        print(f"🔀 {delta.nb_lignes} notices fusionnées : {ajoutees} ajoutées, "
+              f"{delta.nb_lignes - ajoutees} mises à jour ({len(fusion)} lignes au total)")
+    else:
+        magasin.maj_etat(CLE_DELTA, {"derniere_recolte": debut_recolte})
+        print("✅ Aucune notice indexée depuis la dernière récolte.")
+    delta.vider()
+
+    nb_lignes = magasin.compacter(combined_file)
+    if nb_lignes is not None:
+        print(f"📁 Fichier combiné écrit : {combined_file} ({nb_lignes} lignes)")
+    print(SCHEMA.mesure.resume())
+    print(MESURES.ligne())
+    return combined_file
+
+
+def fetch_crossref_data_fragmente(keyword, resume=False, nb_travailleurs=4, format_sortie=None):
+    """Variante parallèle : une fenêtre de dates par curseur, plusieurs en même temps ; renvoie le fichier combiné (None si incomplet)."""
+    email = client_http.EMAIL
+
+    output_folder = f"resultats_{keyword.replace(' ', '_')}"
+    os.makedirs(output_folder, exist_ok=True)
+    combined_file = nom_sortie(output_folder, format_sortie)
+    magasin = MagasinSegments(os.path.join(output_folder, "fragments"), cle_unique="DOI")
+
+    recolte = RecolteFragmentee(
+        {"query.bibliographic": keyword, "mailto": email},
+        magasin, nb_travailleurs=nb_travailleurs, schema=SCHEMA
+    )
+    try:
+        complete = recolte.executer(reprise=resume)
+    except KeyboardInterrupt:
+        print("⏹️ Interruption par l’utilisateur.")
+        complete = False
+
+    if not complete:
+        print("⚠️ Certaines fenêtres ne sont pas terminées : relancez avec reprise pour les compléter.")
+
+    nb_lignes = magasin.compacter(combined_file)
+    if nb_lignes is not None:
+        print(f"📁 Fichier combiné écrit : {combined_file} ({nb_lignes} lignes)")
+    print(magasin.index.resume())
+    print(SCHEMA.mesure.resume())
+    print(MESURES.ligne())
+    return combined_file if complete else None
 
 
 if __name__ == "__main__":
@@ -153,7 +272,7 @@ Ce script :
 ✔️ Recherche toutes les publications associées à un mot-clé
 ✔️ Extrait les métadonnées : titre, auteur, date, DOI, résumé
 ✔️ Sauvegarde automatiquement par tranches de 500 résultats
-✔️ Met à jour automatiquement un fichier combiné global
+✔️ Écrit un fichier combiné global en fin d’extraction (format au choix)
 ✔️ Gère les erreurs et les connexions lentes (jusqu’à 60 essais)
 
 ⚠️ Important :
@@ -164,5 +283,14 @@ Le mot-clé sera recherché dans le **titre** et le champ **bibliographique**.
     if not keyword:
         print("❌ Vous devez entrer un mot-clé valide.")
     else:
-        reprendre = input("🔁 Reprendre à partir de la dernière interruption ? (o/n) : ").strip().lower()
-        fetch_crossref_data(keyword, resume=(reprendre == 'o'))
+        format_sortie = demander_format()
+        mise_a_jour = input("🔄 Mise à jour incrémentale depuis la dernière récolte ? (o/n) : ").strip().lower()
+        if mise_a_jour == 'o':
+            fetch_crossref_delta(keyword, format_sortie)
+        else:
+            reprendre = input("🔁 Reprendre à partir de la dernière interruption ? (o/n) : ").strip().lower()
+            parallele = input("⚡ Extraction parallèle par fenêtres de dates ? (o/n) : ").strip().lower()
+            if parallele == 'o':
+                fetch_crossref_data_fragmente(keyword, resume=(reprendre == 'o'), format_sortie=format_sortie)
+            else:
+                fetch_crossref_data(keyword, resume=(reprendre == 'o'), format_sortie=format_sortie)
@@ -1,47 +1,86 @@
 
-#########################################
+#########################################
 # Ce script permet de récupérer tous les DOI d'une revue scientifique.
 #
 # Il prend en entrée jusqu'à deux ISSN (imprimé et en ligne) d'une même revue.
 #
-# Les DOI récupérés sont triés par date 
-# et sauvegardés dans un fichier texte.
+# Mode rapide : un seul flux /works?filter=issn:A,issn:B (le chevauchement
+# disparaît à la source), réduit aux champs DOI et date (paramètre `select`) ;
+# les métadonnées de la revue sont lues une fois sur /journals/{issn}, en
+# parallèle du flux, et la page suivante se télécharge pendant le traitement
+# de la précédente.
+#
+# Un article indexé sous les deux ISSN n'est gardé qu'une fois (index des DOI,
+# sur disque dans un dossier temporaire supprimé en fin de récolte).
+#
+# Si le flux s'interrompt (page en échec), les DOI déjà reçus sont tout de
+# même sauvegardés, dans des fichiers suffixés « _incomplet ».
+#
+# Les DOI récupérés sont triés par date 
+# et sauvegardés dans un fichier texte, ainsi que dans un tableau DOI / date
+# au format choisi (xlsx, parquet, csv.gz, csv, jsonl : commun/sortie.py).
+#
+# Tri en mémoire bornée (commun/tri_externe.py) : comparaison directe des
+# dates ISO, runs triés déversés sur disque au-delà d'un seuil, puis fusion
+# écrite au fil de l'eau dans les deux fichiers. La console n'affiche plus
+# qu'un résumé : la liste complète des DOI est dans le fichier texte.
+#
+# La récolte est une fonction, `recuperer_dois(issn1, issn2, ...)`, appelée
+# par les questions ci-dessous ou par le lanceur de lots (scriptorium.py).
 #
 #########################################
 
+import os
+import pandas as pd
 import requests
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+
+from commun import client_http
+from commun.index_doi import NOM_INDEX, IndexDOI
+from commun.mesures import MESURES
+from commun.pipeline import PageChargee, precharger_pages
+# Champs demandés (paramètre `select`) : mode rapide / mode par ISSN
+from commun.schemas import GET_DOI, GET_DOI_REVUE
+from commun.sortie import demander_format, nom_sortie, ouvrir_ecrivain
+from commun.tri_externe import TriExterne
+
+TRANCHE_ECRITURE = 100_000  # lignes par morceau envoyé à l'écrivain du tableau
 
 # Afficher un message explicatif
 def afficher_message_explicatif():
     print("Ce script permet de récupérer tous les DOI d'une revue scientifique.")
     print("Il prend en entrée jusqu'à deux ISSN (imprimé et en ligne) d'une même revue.")
     print("Les DOI récupérés sont triés par date de création et sauvegardés dans un fichier texte.")
+    print("La console n'affiche qu'un résumé : la liste complète est dans le fichier.")
     print("-" * 80)
 
 # Fonction pour formater l'ISSN
 def format_issn(issn):
-    return issn.replace("-", "")
+    return issn.strip().replace("-", "")
 
 # Fonction pour obtenir les articles avec pagination
+# (None en cas d'échec, à distinguer d'une page vide : fin de la liste)
 def get_dois(url, cursor="*"):
     try:
         # Faire une requête HTTP pour obtenir les articles
-        response = session.get(url, params={"rows": 1000, "cursor": cursor})
+        response = client_http.get(url, params={"rows": 1000, "cursor": cursor, "select": GET_DOI_REVUE.select})
         response.raise_for_status()  # Vérifie si la requête a réussi
 
         # Vérifier si la réponse est au format JSON
         try:
-            data = response.json()
+            with MESURES.phase("parse"):
+                data = response.json()
         except ValueError:
             print("Erreur : La réponse de l'API n'est pas au format JSON.")
-            data = None
+            return None
 
         if data:
             # Extraire les DOI et les dates de création des articles
             dois_dates = [(item['DOI'], item['created']['date-time']) for item in data['message']['items']]
+            GET_DOI_REVUE.mesure.ajouter(len(response.content), len(dois_dates))
             journal_title = data['message']['items'][0]['container-title'][0] if data['message']['items'] else ""
             publisher = data['message']['items'][0]['publisher'] if data['message']['items'] else "Éditeur inconnu"
             issn_list = data['message']['items'][0]['ISSN'] if data['message']['items'] else []
@@ -49,85 +88,187 @@ def get_dois(url, cursor="*"):
             return dois_dates, journal_title, publisher, issn_list, next_cursor
         else:
             print("Erreur : Aucune donnée trouvée.")
-            return [], "", "Éditeur inconnu", [], None
-    except requests.exceptions.RequestException as e:
+            return None
+    except (requests.exceptions.RequestException, KeyError, IndexError, TypeError) as e:
         print(f"Erreur de requête HTTP : {e}")
-        return [], "", "Éditeur inconnu", [], None
-
-# Afficher le message explicatif
-afficher_message_explicatif()
-
-# Demander les ISSN de la revue à l'utilisateur
-issn1 = input("Entrez le premier ISSN de la revue (par exemple, 0022-0388) : ")
-issn2 = input("Entrez le deuxième ISSN de la revue (par exemple, 1743-9140) : ")
-
-# Formater les ISSN
-formatted_issn1 = format_issn(issn1)
-formatted_issn2 = format_issn(issn2)
-
-# URL de base de l'API CrossRef pour les ISSN
-base_url1 = f"https://api.crossref.org/journals/{formatted_issn1}/works"
-base_url2 = f"https://api.crossref.org/journals/{formatted_issn2}/works"
-
-# Configurer le mécanisme de nouvelle tentative
-session = requests.Session()
-retry = Retry(
-    total=5,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
-)
-adapter = HTTPAdapter(max_retries=retry)
-session.mount('http://', adapter)
-session.mount('https://', adapter)
-
-# Initialiser les variables pour stocker les résultats
-all_dois_dates = []
-journal_title = ""
-publisher = "Éditeur inconnu"
-issn_list = []
-
-# Récupérer les DOI en utilisant la pagination pour les deux ISSN
-for base_url in [base_url1, base_url2]:
-    cursor = "*"
-    while cursor:
-        dois_dates, title, pub, issns, cursor = get_dois(base_url, cursor)
-        if dois_dates:
-            all_dois_dates.extend(dois_dates)
-            journal_title = title if title else journal_title
-            publisher = pub if pub else publisher
-            issn_list = list(set(issn_list + issns))
-        else:
-            break
-
-# Trier les DOI par date de création
-all_dois_dates.sort(key=lambda x: datetime.strptime(x[1], '%Y-%m-%dT%H:%M:%SZ'))
-all_dois = [doi for doi, _ in all_dois_dates]
-
-# Obtenir la date et l'heure actuelles pour le nom de fichier
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-# Afficher les détails de la revue et les DOI
-print(f"Nom de la revue : {journal_title if journal_title else 'Titre inconnu'}")
-print(f"Éditeur : {publisher}")
-print("ISSN :")
-for issn in issn_list:
-    print(issn)
-print(f"Nombre total de DOI récupérés : {len(all_dois)}")
-print("DOI des articles :")
-for doi in all_dois:
-    print(doi)
-
-# Sauvegarder les DOI dans un fichier texte
-filename = f"{formatted_issn1}_{formatted_issn2}_{current_time}.txt"
-with open(filename, "w") as file:
-    file.write(f"Nom de la revue : {journal_title if journal_title else 'Titre inconnu'}\n")
-    file.write(f"Éditeur : {publisher}\n")
-    file.write("ISSN :\n")
+        return None
+
+# Mode rapide : métadonnées de la revue, une seule requête par ISSN
+def get_journal_metadata(issn):
+    try:
+        response = client_http.get(f"https://api.crossref.org/journals/{issn}")
+        response.raise_for_status()
+        message = response.json()["message"]
+        return message.get("title", ""), message.get("publisher", "Éditeur inconnu"), message.get("ISSN", [])
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Erreur lors de la lecture des métadonnées de la revue {issn} : {e}")
+        return "", "Éditeur inconnu", []
+
+# Mode rapide : une page du flux unique /works filtré sur tous les ISSN de la revue
+def get_dois_flux_unique(issns, cursor="*"):
+    params = {
+        "filter": ",".join(f"issn:{issn}" for issn in issns),
+        "select": GET_DOI.select,
+        "rows": 1000,
+        "cursor": cursor,
+    }
+    try:
+        response = client_http.get("https://api.crossref.org/works", params=params)
+        response.raise_for_status()
+        with MESURES.phase("parse"):
+            message = response.json()["message"]
+        dois_dates = [(item['DOI'], item['created']['date-time']) for item in message['items']]
+        GET_DOI.mesure.ajouter(len(response.content), len(dois_dates))
+        return PageChargee(dois_dates, message.get('next-cursor'), message.get('total-results'))
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Erreur de requête HTTP : {e}")
+        return None
+
+# Ajoute une page de (DOI, date) en écartant les DOI déjà reçus
+def ajouter_dois(dois_dates, index_doi, tri):
+    with MESURES.phase("transform"):
+        garder = index_doi.nouveaux([doi for doi, _ in dois_dates])
+        dois_dates = [dd for dd, g in zip(dois_dates, garder) if g]
+        index_doi.enregistrer([doi for doi, _ in dois_dates])
+        tri.ajouter(dois_dates)
+
+# Parcourt les DOI de la revue ; renvoie (complète, titre, éditeur, ISSN de la revue)
+def recolter_dois(issns, mode_rapide, index_doi, tri):
+    journal_title = ""
+    publisher = "Éditeur inconnu"
+    issn_list = []
+    complet = True
+
+    if mode_rapide:
+        with ThreadPoolExecutor(max_workers=len(issns)) as executeur:
+            # Métadonnées de la revue pendant que le flux des DOI avance
+            metadonnees = [executeur.submit(get_journal_metadata, issn) for issn in issns]
+            for page in precharger_pages(lambda c: get_dois_flux_unique(issns, c)):
+                if page is None:
+                    complet = False
+                    break
+                if not page.lignes:
+                    break
+                ajouter_dois(page.lignes, index_doi, tri)
+            for futur in metadonnees:
+                title, pub, issns_revue = futur.result()
+                journal_title = journal_title or title
+                publisher = pub if publisher == "Éditeur inconnu" else publisher
+                issn_list = list(set(issn_list + issns_revue))
+    else:
+        # Récupérer les DOI en utilisant la pagination pour chaque ISSN
+        # (URL de base de l'API CrossRef : /journals/{issn}/works)
+        for issn in issns:
+            base_url = f"https://api.crossref.org/journals/{issn}/works"
+            cursor = "*"
+            while cursor:
+                page = get_dois(base_url, cursor)
+                if page is None:
+                    complet = False
+                    break
+                dois_dates, title, pub, issns_revue, cursor = page
+                if dois_dates:
+                    ajouter_dois(dois_dates, index_doi, tri)
+                    journal_title = title if title else journal_title
+                    publisher = pub if pub else publisher
+                    issn_list = list(set(issn_list + issns_revue))
+                else:
+                    break
+
+    return complet, journal_title, publisher, issn_list
+
+# Récolte complète d'une revue : DOI triés par date, fichier texte et tableau DOI / date
+def recuperer_dois(issn1, issn2="", mode_rapide=True, format_tableau=None):
+    """
+    Récupère tous les DOI de la revue (un ou deux ISSN) ; renvoie (fichier texte, tableau),
+    ou None si le flux s'est interrompu (fichiers « _incomplet » écrits). ValueError sans ISSN.
+    """
+    # Formater les ISSN
+    formatted_issn1 = format_issn(issn1)
+    formatted_issn2 = format_issn(issn2)
+    issns = [issn for issn in (formatted_issn1, formatted_issn2) if issn]
+    if not issns:
+        raise ValueError("aucun ISSN fourni")
+
+    # DOI triés par date en mémoire bornée : runs sur disque au-delà du seuil
+    tri = TriExterne()
+
+    # Index des DOI déjà reçus (empreintes sur disque, hors chaînes Python) pour les deux ISSN.
+    # Chaque récolte réécrit la liste complète de la revue : l'index ne vaut que pour elle.
+    debut = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="index_doi_") as dossier_index:
+        index_doi = IndexDOI(os.path.join(dossier_index, NOM_INDEX))
+        try:
+            complet, journal_title, publisher, issn_list = recolter_dois(issns, mode_rapide, index_doi, tri)
+            resume_index = index_doi.resume()
+        finally:
+            index_doi.fermer()
+
+    # Obtenir la date et l'heure actuelles pour le nom de fichier
+    current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Afficher les détails de la revue et un résumé de la récolte
+    print(f"Nom de la revue : {journal_title if journal_title else 'Titre inconnu'}")
+    print(f"Éditeur : {publisher}")
+    print("ISSN :")
     for issn in issn_list:
-        file.write(f"{issn}\n")
-    file.write(f"Nombre total de DOI récupérés : {len(all_dois)}\n")
-    file.write("DOI des articles :\n")
-    for doi in all_dois:
-        file.write(doi + "\n")
+        print(issn)
+    print(f"Nombre total de DOI récupérés : {tri.nb}")
+    print(resume_index)
+    print(f"Durée de la récolte : {time.perf_counter() - debut:.1f} s")
+    if not complet:
+        print("Attention : flux interrompu, la récolte est incomplète (fichiers suffixés « _incomplet »).")
+    print((GET_DOI if mode_rapide else GET_DOI_REVUE).mesure.resume())
+
+    # Sauvegarder les DOI triés par date de création, en un seul passage sur la
+    # fusion : fichier texte et tableau DOI / date (par morceaux, au moins un pour l'en-tête)
+    suffixe = "" if complet else "_incomplet"
+    filename = f"{formatted_issn1}_{formatted_issn2}_{current_time}{suffixe}.txt"
+    fichier_tableau = nom_sortie(f"{formatted_issn1}_{formatted_issn2}_{current_time}{suffixe}", format_tableau)
+    premiere_date = derniere_date = None
+    with MESURES.phase("write"), tri, open(filename, "w") as file, ouvrir_ecrivain(fichier_tableau) as ecrivain:
+        if not complet:
+            file.write("Récolte incomplète : flux interrompu avant la dernière page\n")
+        file.write(f"Nom de la revue : {journal_title if journal_title else 'Titre inconnu'}\n")
+        file.write(f"Éditeur : {publisher}\n")
+        file.write("ISSN :\n")
+        for issn in issn_list:
+            file.write(f"{issn}\n")
+        file.write(f"Nombre total de DOI récupérés : {tri.nb}\n")
+        file.write("DOI des articles :\n")
+        morceau = []
+        for doi, date in tri.iterer():
+            file.write(doi + "\n")
+            morceau.append((doi, date))
+            if len(morceau) >= TRANCHE_ECRITURE:
+                ecrivain.ecrire(pd.DataFrame(morceau, columns=list(GET_DOI.noms)))
+                morceau = []
+            premiere_date = premiere_date or date
+            derniere_date = date
+        ecrivain.ecrire(pd.DataFrame(morceau, columns=list(GET_DOI.noms)))
+        nb_runs = tri.nb_runs
+
+    if premiere_date:
+        print(f"Période couverte : du {premiere_date[:10]} au {derniere_date[:10]}")
+    if nb_runs:
+        print(f"Tri externe : {nb_runs} runs fusionnés depuis le disque.")
+    print(f"Les DOI ont été sauvegardés dans le fichier '{filename}'.")
+    print(f"Tableau DOI / date : '{fichier_tableau}' ({ecrivain.lignes} lignes).")
+    return (filename, fichier_tableau) if complet else None
+
 
-print(f"Les DOI ont été sauvegardés dans le fichier '{filename}'.")
+if __name__ == "__main__":
+    # Afficher le message explicatif
+    afficher_message_explicatif()
+
+    # Demander les ISSN de la revue à l'utilisateur
+    issn1 = input("Entrez le premier ISSN de la revue (par exemple, 0022-0388) : ")
+    issn2 = input("Entrez le deuxième ISSN de la revue (par exemple, 1743-9140) : ")
+    mode_rapide = input("Mode rapide (un seul flux pour les deux ISSN, champs réduits) ? (o/n) : ").strip().lower() != "n"
+    format_tableau = demander_format()
+
+    try:
+        recuperer_dois(issn1, issn2, mode_rapide, format_tableau)
+    except ValueError as e:
+        print(f"Erreur : {e}")
+    print(MESURES.ligne())
@@ -0,0 +1,9 @@
+# Rend importable le dossier `commun/` (racine du dépôt) depuis les scripts
+# de ce dossier, lancés directement : `import acces_commun` avant `from commun ...`.
+
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
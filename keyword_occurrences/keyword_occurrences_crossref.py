@@ -9,16 +9,24 @@
 # - Cette méthode permet d'analyser l'évolution temporelle de la présence
 #   d'un terme dans la littérature scientifique.
 #
-# - Limitation : la requête est faite année par année (plus longue si la période est large).
+# - Mode rapide : une seule requête avec la facette `published:*` renvoie la
+#   répartition par année ; la requête année par année reste le repli.
+# - Le rythme des requêtes suit les limites annoncées par Crossref.
 # -------------------------------------------------------------
 
-import requests
 import pandas as pd
 from urllib.parse import quote_plus
 from datetime import datetime
 
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun import client_http
+from commun.histogrammes import histogramme_crossref
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
+
 print("📚 Analyse de l'évolution d'un mot-clé dans la littérature scientifique via Crossref")
-print("\nℹ️  Ce script effectue une requête par année pour le mot-clé donné.")
+print("\nℹ️  Ce script compte les publications année par année pour le mot-clé donné")
+print("    (en mode rapide, une seule requête suffit pour toute la période).")
 print("    Les résultats ne sont pas cumulés, mais correspondent au total annuel.")
 print("    Utile pour observer l'évolution temporelle du mot dans les publications scientifiques.\n")
 
@@ -26,6 +34,7 @@ print("    Utile pour observer l'évolution temporelle du mot dans les publicati
 keyword = input("🔍 Mot-clé à rechercher : ")
 start_year = int(input("📅 Année de début : "))
 end_year = int(input("📅 Année de fin : "))
+use_facets = input("⚡ Mode rapide (une seule requête, facette Crossref) ? (o/n, défaut o) : ").strip().lower() != "n"
 
 # 2. Encodage du mot-clé pour URL (gère espaces et caractères spéciaux)
 encoded_keyword = quote_plus(keyword)
@@ -35,24 +44,32 @@ year_counts = {}
 
 print(f"\n📡 Envoi des requêtes à Crossref pour le mot-clé : '{keyword}'\n")
 
-# 4. Boucle année par année
-for year in range(start_year, end_year + 1):
-    url = (
-        f"https://api.crossref.org/works?"
-        f"query={encoded_keyword}&"
-        f"filter=from-pub-date:{year}-01-01,until-pub-date:{year}-12-31&rows=0"
-    )
-    
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        data = response.json()
-        count = data['message']['total-results']
+# 4. Mode rapide : toute la répartition par année en une seule requête (facette)
+histogram = histogramme_crossref(keyword, start_year, end_year) if use_facets else None
+if histogram is not None:
+    for year, count in histogram.items():
         year_counts[year] = count
         print(f"✅ {year} | {keyword} : {count} publications")
-    else:
-        print(f"⚠️  Erreur pour l'année {year} : code {response.status_code}")
-        year_counts[year] = None
+else:
+    # Boucle année par année (mode classique, ou repli si la facette échoue)
+    for year in range(start_year, end_year + 1):
+        url = (
+            f"https://api.crossref.org/works?"
+            f"query={encoded_keyword}&"
+            f"filter=from-pub-date:{year}-01-01,until-pub-date:{year}-12-31&rows=0"
+        )
+    
+        # Client partagé : connexion persistante, rythme réglé, 429 / Retry-After gérés
+        response = client_http.get(url)
+
+        if response.status_code == 200:
+            data = response.json()
+            count = data['message']['total-results']
+            year_counts[year] = count
+            print(f"✅ {year} | {keyword} : {count} publications")
+        else:
+            print(f"⚠️  Erreur pour l'année {year} : code {response.status_code}")
+            year_counts[year] = None
 
 # 5. Transformation en DataFrame
 df = pd.DataFrame([
@@ -63,9 +80,10 @@ df = pd.DataFrame([
 # 6. Génération du nom de fichier avec horodatage
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 safe_keyword = keyword.replace(" ", "_").replace(",", "_")
-filename = f"crossref_{safe_keyword}_{start_year}_{end_year}_{timestamp}.xlsx"
+filename = nom_sortie(f"crossref_{safe_keyword}_{start_year}_{end_year}_{timestamp}")
 
-# 7. Sauvegarde dans Excel
-df.to_excel(filename, index=False)
+# 7. Sauvegarde (format : variable SCRIPTORIUM_FORMAT, Excel par défaut)
+ecrire_tableau(df, filename)
 
 print(f"\n💾 Données sauvegardées dans : {filename}")
+print(MESURES.ligne())
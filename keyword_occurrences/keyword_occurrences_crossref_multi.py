@@ -2,31 +2,37 @@
 # CE QUE FAIT CE SCRIPT :
 # Date : 21-05-2025
 #   - Tu entres tous tes mots-clés/synonymes séparés par des virgules
-#   - Il interroge Crossref année par année pour chaque mot-clé
+#   - Il interroge Crossref pour chaque mot-clé : en mode rapide, une seule requête
+#     par mot-clé donne toute la répartition par année (facette `published:*`) ;
+#     sinon (ou en cas d'échec de la facette), une requête par année
 #   - Il récupère uniquement le nombre total de résultats (total-results)
 #   - Il construit un tableau où chaque ligne est une année et chaque colonne un mot-clé
-#   - Il sauvegarde le tableau dans un fichier Excel .xlsx, avec un horodatage unique pour éviter l'écrasement
+#   - Il sauvegarde le tableau dans un fichier Excel .xlsx (ou parquet, csv.gz, csv, jsonl selon la variable
+#     SCRIPTORIUM_FORMAT), avec un horodatage unique pour éviter l'écrasement
+#   - Toutes les cellules mot-clé × année sont lancées en parallèle (commun/grille.py),
+#     au rythme permis par Crossref
+#   - Les comptes déjà obtenus sont relus dans un cache local (commun/cache_comptes.py) :
+#     une relance n'interroge que les années dont le compte peut encore changer
+#   - Chaque cellule terminée est inscrite dans un journal de reprise : après un arrêt
+#     brutal, la relance propose de reprendre et ne relance que les cellules manquantes
 
-import requests
-import pandas as pd
-from urllib.parse import quote_plus
+import os
 from datetime import datetime
 
-def get_total_results_for_year(keyword, year):
-    encoded_keyword = quote_plus(keyword)
-    url = (
-        f"https://api.crossref.org/works?"
-        f"query={encoded_keyword}&"
-        f"filter=from-pub-date:{year}-01-01,until-pub-date:{year}-12-31"
-        f"&rows=0"  # Pas besoin des résultats, juste total-results
-    )
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return data['message']['total-results']
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun.cache_comptes import cache_partage
+from commun.grille import Grille
+from commun.histogrammes import verifier_histogramme
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
+
+CACHE = cache_partage()
+
+def show_result(source, keyword, year, count, origin):
+    if count is not None:
+        print(f"  {keyword} | {year} : {count} publications")
     else:
-        print(f"Erreur pour '{keyword}' en {year} : code {response.status_code}")
-        return None
+        print(f"  {keyword} | {year} : Erreur ou données manquantes")
 
 # Saisie mots-clés (séparés par des virgules)
 keywords_input = input("Entrez les mots-clés / synonymes (séparés par des virgules) : ")
@@ -34,39 +40,47 @@ keywords = [k.strip() for k in keywords_input.split(",")]
 
 start_year = int(input("Année de début : "))
 end_year = int(input("Année de fin : "))
+use_facets = input("Mode rapide : une requête par mot-clé (facette Crossref) ? (o/n, défaut o) : ").strip().lower() != "n"
+verify = use_facets and input("Vérifier quelques années par requête annuelle ? (o/n, défaut n) : ").strip().lower() == "o"
+journal_path = f"journal_crossref_multi_{start_year}_{end_year}.jsonl"
+resume = os.path.exists(journal_path) and input("🔁 Journal trouvé : reprendre l'analyse interrompue ? (o/n) : ").strip().lower() == "o"
 
 print("\nℹ️  EXPLICATIONS IMPORTANTES :")
 print("- Chaque valeur correspond au nombre total de publications contenant le mot-clé pour l'année indiquée.")
 print("- Les résultats ne sont PAS cumulés mais annuels.")
 print("- Plusieurs mots-clés sont traités en parallèle et les résultats affichés dans un tableau.\n")
 
-# Initialiser un dictionnaire avec années comme clés et dict de mots-clés/occurrences comme valeurs
-results = {year: {} for year in range(start_year, end_year + 1)}
+# Toutes les cellules mot-clé × année sont lancées ensemble (moteur de grille commun)
+grid = Grille(["crossref"], keywords, start_year, end_year, histogrammes=use_facets,
+              journal=journal_path, reprise=resume)
+grid.executer(sur_resultat=show_result)
 
-# Pour chaque mot-clé, récupérer le total par année
-for keyword in keywords:
-    print(f"\nRecherche pour mot-clé : '{keyword}'")
-    for year in range(start_year, end_year + 1):
-        count = get_total_results_for_year(keyword, year)
-        results[year][keyword] = count
-        if count is not None:
-            print(f"  {year} : {count} publications")
-        else:
-            print(f"  {year} : Erreur ou données manquantes")
+if verify:
+    for keyword in keywords:
+        histogram = {year: grid.valeurs["crossref"][year][keyword] for year in grid.annees
+                     if grid.origines.get(("crossref", keyword, year)) == "histogramme"}
+        if not histogram:
+            continue
+        gaps = verifier_histogramme(histogram, lambda year: grid.compter_direct("crossref", keyword, year))
+        for year, facet_count, year_count in gaps:
+            print(f"  ⚠️ '{keyword}' : écart en {year} : facette {facet_count}, requête annuelle {year_count}")
+        if not gaps:
+            print(f"  ✔️ '{keyword}' : facette conforme aux requêtes annuelles vérifiées")
 
-# Transformer le dictionnaire en DataFrame
 # Les années en lignes, les mots-clés en colonnes
-df = pd.DataFrame.from_dict(results, orient='index')
-df.index.name = 'Année'
-df.reset_index(inplace=True)
+df = grid.tableau("crossref")
 
 # Générer un timestamp pour le nom de fichier
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # Construire le nom du fichier avec horodatage
-filename = f"crossref_multi_keywords_{start_year}_{end_year}_{timestamp}.xlsx"
+filename = nom_sortie(f"crossref_multi_keywords_{start_year}_{end_year}_{timestamp}")
 
-# Enregistrer en Excel
-df.to_excel(filename, index=False)
+# Enregistrer (Excel par défaut, voir commun/sortie.py)
+ecrire_tableau(df, filename)
 
 print(f"\n✅ Données sauvegardées dans : {filename}")
+if grid.supprimer_journal_si_complete():
+    print(f"⚠️ Cellules en échec : journal {journal_path} conservé, relancez le script et acceptez la reprise.")
+print(CACHE.resume())
+print(MESURES.ligne())
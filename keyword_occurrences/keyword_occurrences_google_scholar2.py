@@ -7,22 +7,28 @@
 # Ce script :
 # ✔️ Demande un mot-clé et une période (année de début et de fin)
 # ✔️ Interroge Google Scholar pour estimer le nombre de publications par année
-# ✔️ Sauvegarde les résultats dans un fichier Excel (.xls)
+# ✔️ Sauvegarde les résultats dans un fichier Excel (.xlsx ; ou parquet, csv.gz, csv,
+#    jsonl selon la variable SCRIPTORIUM_FORMAT)
 # ✔️ Gère les erreurs temporaires (429 - trop de requêtes)
-# ✔️ Ajoute une pause aléatoire + rotation des User-Agent
+# ✔️ Ajoute une pause aléatoire + rotation des User-Agent (respecte Retry-After)
+# ✔️ Relit les comptes déjà obtenus dans un cache local (moins de requêtes bloquées)
 # --------------------------------------------------
 
 
-import time
 import datetime
-import xlwt
 import unicodedata
 import re as regex
 import random
-from bs4 import BeautifulSoup
-from urllib.request import Request, build_opener
 from urllib.parse import urlencode
-import urllib.error
+
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun import client_http
+from commun.cache_comptes import cache_partage
+from commun.mesures import MESURES
+from commun.scholar import nombre_resultats_reponse
+from commun.sortie import ecrire_tableau, nom_sortie
+
+CACHE = cache_partage()
 
 # Liste de User-Agents différents pour simuler plusieurs navigateurs
 USER_AGENTS = [
@@ -39,42 +45,38 @@ def sanitize_filename(text):
     text = regex.sub(r'\W+', '_', text)
     return text.strip('_')
 
-def get_num_results(search_term, year, max_retries=3, wait_seconds=5):
+def get_num_results(search_term, year, max_retries=3):
     """
     Interroge Google Scholar pour obtenir le nombre de résultats d’un mot-clé pour une année spécifique.
-    Gère les erreurs HTTP 429 (Too Many Requests) en réessayant jusqu’à `max_retries` fois.
+    Gère les erreurs HTTP 429 (Too Many Requests) en réessayant jusqu’à `max_retries` fois
+    (la pause, Retry-After compris, est imposée par le limiteur du client commun).
     """
+    en_cache = CACHE.lire("scholar", search_term, year)
+    if en_cache is not None:
+        return en_cache, True
+
     query_params = {'q': search_term, 'as_ylo': year, 'as_yhi': year}
     url = "https://scholar.google.com/scholar?as_vis=1&hl=en&as_sdt=1,5&" + urlencode(query_params)
 
     for attempt in range(1, max_retries + 1):
         try:
-            opener = build_opener()
             user_agent = random.choice(USER_AGENTS)
-            request = Request(url=url, headers={'User-Agent': user_agent})
-
-            handler = opener.open(request)
-            html = handler.read()
-            soup = BeautifulSoup(html, 'html.parser')
-            div_results = soup.find("div", {"id": "gs_ab_md"})
-
-            if div_results is not None:
-                import re
-                res = re.findall(r'(\d+).?(\d+)?\.?(\d+)?\s', div_results.text)
-                if not res:
-                    return 0, True
-                else:
-                    number = ''.join(res[0])
-                    return int(number), True
-            else:
-                return 0, False
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                print(f"   ⚠️  Erreur 429 (trop de requêtes). Tentative {attempt}/{max_retries}. Attente {wait_seconds}s...")
-                time.sleep(wait_seconds)
-            else:
-                print(f"   ❌ Erreur HTTP {e.code} : {e.reason}")
+            # Client commun (délais, limiteur) ; lecture en flux pour s'arrêter au compteur
+            response = client_http.get(url, headers={'User-Agent': user_agent}, tentatives_429=0, stream=True)
+            if response.status_code == 429:
+                response.close()
+                print(f"   ⚠️  Erreur 429 (trop de requêtes). Tentative {attempt}/{max_retries}, après une pause...")
+                continue
+            if response.status_code >= 400:
+                response.close()
+                print(f"   ❌ Erreur HTTP {response.status_code} : {response.reason}")
                 break
+            # Lecture arrêtée dès que le bloc du compteur (div#gs_ab_md) est arrivé
+            number = nombre_resultats_reponse(response)
+            if number is None:
+                return 0, False  # pas de compteur : page de blocage
+            CACHE.ecrire("scholar", search_term, year, number)
+            return number, True
         except Exception as e:
             print(f"   ❌ Erreur inattendue : {e}")
             break
@@ -82,16 +84,15 @@ def get_num_results(search_term, year, max_retries=3, wait_seconds=5):
     return None, False  # toutes les tentatives échouées
 
 def get_range(search_term, start_date, end_date, output_filename):
-    """Réalise les requêtes pour toutes les années et sauvegarde les résultats dans un fichier Excel .xls."""
-    workbook = xlwt.Workbook()
-    sheet = workbook.add_sheet("Résultats")
-    sheet.write(0, 0, "Année")
-    sheet.write(0, 1, "Nombre de publications")
+    """Réalise les requêtes pour toutes les années et sauvegarde les résultats (format selon l'extension)."""
+    import pandas as pd
+
+    lignes = []
 
     print("\n📈 Début de l’analyse par année...")
     print("ℹ️  Chaque chiffre correspond au nombre de publications contenant le mot-clé, publiées cette année-là.\n")
 
-    for i, year in enumerate(range(start_date, end_date + 1), start=1):
+    for year in range(start_date, end_date + 1):
         print(f"🔄 Requête pour l’année {year}...")
 
         num_results, success = get_num_results(search_term, year)
@@ -101,15 +102,13 @@ def get_range(search_term, start_date, end_date, output_filename):
         else:
             print(f"   ⚠️  Requête échouée ou bloquée pour {year}. Résultat : None")
 
-        sheet.write(i, 0, year)
-        sheet.write(i, 1, num_results if num_results is not None else "")
-
-        pause = round(random.uniform(1.0, 7.0), 2)
-        print(f"   ⏸️ Pause de {pause}s avant la prochaine requête...\n")
-        time.sleep(pause)
+        lignes.append((year, num_results))
+        print()
 
-    workbook.save(output_filename)
+    ecrire_tableau(pd.DataFrame(lignes, columns=["Année", "Nombre de publications"]), output_filename)
     print(f"\n💾 Données enregistrées dans le fichier : {output_filename}")
+    print(CACHE.resume())
+    print(MESURES.ligne())
     print("📌 Analyse terminée.")
 
 if __name__ == "__main__":
@@ -121,7 +120,7 @@ if __name__ == "__main__":
 Ce script :
 ✔️ Demande un mot-clé et une période (année de début et de fin)
 ✔️ Interroge Google Scholar pour estimer le nombre de publications par année
-✔️ Sauvegarde les résultats dans un fichier Excel (.xls)
+✔️ Sauvegarde les résultats dans un fichier Excel (.xlsx)
 ✔️ Gère les erreurs temporaires (429 - trop de requêtes)
 ✔️ Ajoute une pause aléatoire + rotation des User-Agent
 --------------------------------------------------
@@ -144,6 +143,6 @@ Ce script :
     now = datetime.datetime.now()
     time_str = now.strftime("%Y%m%d_%H%M%S")
     safe_term = sanitize_filename(search_term_raw)
-    output_file = f"gscholar_{safe_term}_{start_date}_{end_date}_{time_str}.xls"
+    output_file = nom_sortie(f"gscholar_{safe_term}_{start_date}_{end_date}_{time_str}")
 
     get_range(search_term, start_date, end_date, output_file)
@@ -1,52 +1,55 @@
 # Ce script interroge l'API OpenAlex pour compter le 
 # nombre de publications par mot-clé et par année.
+# Les comptes déjà obtenus sont relus dans un cache local (commun/cache_comptes.py).
+# Toute la période est comptée en une requête groupée (group_by=publication_year) ;
+# seules les années absentes des groupes sont interrogées une par une.
+# Tous les mots-clés sont traités en parallèle par le moteur de grille commun.
+# Chaque cellule terminée est inscrite dans un journal de reprise : après un
+# arrêt brutal, seules les cellules manquantes sont relancées.
 
 
-import requests
 import pandas as pd
-import time
 import datetime
+import os
 from urllib.parse import quote
 
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun.cache_comptes import cache_partage
+from commun.grille import Grille
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
+
+CACHE = cache_partage()
+
 # --------------
 # FONCTION UTILE
 # --------------
-def query_openalex(keyword, start_year, end_year, pause=1.5, max_retries=5):
+def show_result(source, keyword, year, count, origin):
+    if count is None:
+        print(f"❌ Échec pour {keyword} en {year}.")
+    elif origin == "cache":
+        print(f"🗃️ {keyword} | {year} : {count} publications (cache)")
+    else:
+        print(f"✅ {keyword} | {year} : {count} publications")
+
+def save_keyword(grid, keyword, start_year, end_year):
+    df = pd.DataFrame(grid.lignes("openalex", keyword))
+    now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_kw = quote(keyword.replace(" ", "_").lower())
+    fname = nom_sortie(f"openalex_keyword_{safe_kw}_{start_year}_{end_year}_{now}")
+    ecrire_tableau(df, fname)
+    print(f"💾 Résultats sauvegardés dans : {fname}\n")
+
+def query_openalex(keyword, start_year, end_year, group_by=True):
     """
     Interroge l'API OpenAlex pour compter le nombre de publications par mot-clé et par année.
+    Avec `group_by`, une seule requête groupée par année couvre toute la période.
     """
-    base_url = "https://api.openalex.org/works"
-    results = []
-
     print(f"\n🔍 Mot-clé : '{keyword}'")
     print("ℹ️  Chaque chiffre correspond au nombre de publications contenant le mot-clé, publiées l’année correspondante.")
-
-    for year in range(start_year, end_year + 1):
-        success = False
-        attempts = 0
-        while not success and attempts < max_retries:
-            params = {
-                "search": keyword,
-                "filter": f"from_publication_date:{year}-01-01,to_publication_date:{year}-12-31",
-                "per-page": 1
-            }
-            try:
-                response = requests.get(base_url, params=params, timeout=15)
-                response.raise_for_status()
-                data = response.json()
-                count = data.get("meta", {}).get("count", 0)
-                print(f"✅ {year} : {count} publications")
-                results.append({"Mot-clé": keyword, "Année": year, "Occurrences": count})
-                success = True
-            except requests.exceptions.RequestException as e:
-                attempts += 1
-                wait = pause * (2 ** attempts)
-                print(f"⚠️  Erreur pour '{keyword}' en {year} (Tentative {attempts}/{max_retries}) - attente {wait:.1f}s")
-                time.sleep(wait)
-        if not success:
-            print(f"❌ Échec pour {keyword} en {year} après {max_retries} tentatives.")
-            results.append({"Mot-clé": keyword, "Année": year, "Occurrences": None})
-    return results
+    grid = Grille(["openalex"], [keyword], start_year, end_year, histogrammes=group_by)
+    grid.executer(sur_resultat=show_result)
+    return grid.lignes("openalex")
 
 # -----------------
 # PROGRAMME PRINCIPAL
@@ -68,25 +71,25 @@ fichiers Excel, ainsi qu’un tableau comparatif final.
     print("\n💡 Entrez vos mots-clés séparés par une virgule (ex: informal economy, shadow economy, économie informelle)")
     raw_keywords = input("🔠 Mots-clés : ")
     keywords = [k.strip() for k in raw_keywords.split(",") if k.strip()]
+    journal_path = f"journal_openalex_{start_year}_{end_year}.jsonl"
+    resume = os.path.exists(journal_path) and input("🔁 Journal trouvé : reprendre l'analyse interrompue ? (o/n) : ").strip().lower() == "o"
 
-    all_data = []
-
-    for keyword in keywords:
-        keyword_data = query_openalex(keyword, start_year, end_year)
-        df = pd.DataFrame(keyword_data)
-        all_data.extend(keyword_data)
-
-        now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_kw = quote(keyword.replace(" ", "_").lower())
-        fname = f"openalex_keyword_{safe_kw}_{start_year}_{end_year}_{now}.xlsx"
-        df.to_excel(fname, index=False)
-        print(f"💾 Résultats sauvegardés dans : {fname}\n")
+    # Toutes les cellules mot-clé × année en parallèle (moteur de grille commun)
+    print("ℹ️  Chaque chiffre correspond au nombre de publications contenant le mot-clé, publiées l’année correspondante.\n")
+    grid = Grille(["openalex"], keywords, start_year, end_year, journal=journal_path, reprise=resume)
+    grid.executer(sur_resultat=show_result,
+                  sur_mot_cle_termine=lambda source, keyword: save_keyword(grid, keyword, start_year, end_year))
+    all_data = grid.lignes("openalex")
 
     # Création du tableau croisé
     df_all = pd.DataFrame(all_data)
     df_pivot = df_all.pivot(index="Mot-clé", columns="Année", values="Occurrences")
 
     now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    fname_final = f"openalex_tableau_comparatif_{start_year}_{end_year}_{now}.xlsx"
-    df_pivot.to_excel(fname_final)
+    fname_final = nom_sortie(f"openalex_tableau_comparatif_{start_year}_{end_year}_{now}")
+    ecrire_tableau(df_pivot, fname_final, index=True)
     print(f"📊 Tableau comparatif sauvegardé dans : {fname_final}")
+    if grid.supprimer_journal_si_complete():
+        print(f"⚠️ Cellules en échec : journal {journal_path} conservé, relancez le script et acceptez la reprise.")
+    print(CACHE.resume())
+    print(MESURES.ligne())
@@ -2,20 +2,28 @@
 # 🎯 OBJECTIF DU SCRIPT :
 # - Analyse la fréquence d’apparition de mots-clés (ou synonymes) dans
 #   la littérature scientifique via l'API Semantic Scholar.
-# - Génère un fichier Excel par mot-clé (sécurité).
-# - Gère les erreurs 429 (trop de requêtes) avec retry automatique.
+# - Génère un fichier Excel par mot-clé (sécurité) ; autre format possible
+#   via la variable SCRIPTORIUM_FORMAT (parquet, csv.gz, csv, jsonl).
+# - Gère les erreurs 429 (trop de requêtes) avec retry automatique
+#   (respecte Retry-After).
+# - Lance toutes les cellules mot-clé × année en parallèle (commun/grille.py).
+# - Inscrit chaque cellule terminée dans un journal de reprise : après un arrêt
+#   brutal, seules les cellules manquantes sont relancées.
 # - À la fin, crée un tableau global : mots-clés en lignes, années en colonnes.
 # --------------------------------------------------------------------
 
-import requests
 import pandas as pd
-import time
+import os
 from datetime import datetime
-from urllib.parse import quote_plus
+
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun.grille import Grille
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
 
 # 📝 Explication affichée à l'écran
 print("\n📘 Que fait ce script ?")
-print("- Il interroge Semantic Scholar pour chaque mot-clé et chaque année.")
+print("- Il interroge Semantic Scholar pour chaque mot-clé et chaque année (en parallèle).")
 print("- Il compte le nombre total de publications par mot-clé et par année.")
 print("- Les résultats NE SONT PAS CUMULÉS : chaque valeur est annuelle.")
 print("- Il crée un fichier Excel par mot-clé pour éviter les pertes en cas d'erreur.")
@@ -27,64 +35,39 @@ keywords = [k.strip() for k in keywords_input.split(",")]
 
 start_year = int(input("📅 Année de début : "))
 end_year = int(input("📅 Année de fin : "))
+journal_path = f"journal_semantic_{start_year}_{end_year}.jsonl"
+resume = os.path.exists(journal_path) and input("🔁 Journal trouvé : reprendre l'analyse interrompue ? (o/n) : ").strip().lower() == "o"
 
-# 🧮 Pour le tableau croisé final
-global_data = {}
-
-# 🔁 Boucle principale
-for keyword in keywords:
-    print(f"\n🔍 Mot-clé : '{keyword}'")
-    yearly_data = []
-    global_data[keyword] = {}
-
-    for year in range(start_year, end_year + 1):
-        retry_count = 0
-        max_retries = 5
-
-        while retry_count < max_retries:
-            params = {
-                "query": keyword,
-                "year": year,
-                "limit": 1,
-                "fields": "title"
-            }
-
-            response = requests.get("https://api.semanticscholar.org/graph/v1/paper/search", params=params)
-
-            if response.status_code == 200:
-                total = response.json().get("total", 0)
-                print(f"  ✅ {year} : {total} publications")
-                yearly_data.append({"Mot-clé": keyword, "Année": year, "Occurrences": total})
-                global_data[keyword][year] = total
-                time.sleep(1)
-                break  # sortie du while
-            elif response.status_code == 429:
-                retry_count += 1
-                wait_time = 5 * retry_count
-                print(f"  ⚠️  Erreur 429 pour '{keyword}' en {year} (Tentative {retry_count}) - Pause {wait_time} sec...")
-                time.sleep(wait_time)
-            else:
-                print(f"  ❌ Erreur {response.status_code} pour '{keyword}' en {year}")
-                yearly_data.append({"Mot-clé": keyword, "Année": year, "Occurrences": None})
-                global_data[keyword][year] = None
-                time.sleep(1)
-                break  # erreur autre que 429
-
-    # 💾 Sauvegarde fichier Excel individuel
-    df = pd.DataFrame(yearly_data)
+# 💾 Sauvegarde fichier Excel individuel, dès qu'un mot-clé est complet
+def save_keyword(source, keyword):
+    df = pd.DataFrame(grid.lignes(source, keyword))
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_keyword = keyword.replace(" ", "_").replace("/", "_")
-    filename = f"semantic_keyword_{safe_keyword}_{start_year}_{end_year}_{timestamp}.xlsx"
-    df.to_excel(filename, index=False)
-    print(f"  💾 Résultats sauvegardés dans : {filename}")
+    filename = nom_sortie(f"semantic_keyword_{safe_keyword}_{start_year}_{end_year}_{timestamp}")
+    ecrire_tableau(df, filename)
+    print(f"  💾 Résultats de '{keyword}' sauvegardés dans : {filename}")
+
+def show_result(source, keyword, year, total, origin):
+    if total is not None:
+        print(f"  ✅ '{keyword}' {year} : {total} publications")
+    else:
+        print(f"  ❌ '{keyword}' {year} : résultat non disponible")
+
+# 🔁 Toutes les cellules mot-clé × année en parallèle (moteur de grille commun)
+grid = Grille(["semanticscholar"], keywords, start_year, end_year, journal=journal_path, reprise=resume)
+grid.executer(sur_resultat=show_result, sur_mot_cle_termine=save_keyword)
 
 # 📊 Création tableau croisé final (keywords en lignes, années en colonnes)
-final_df = pd.DataFrame(global_data).T
+final_df = grid.tableau("semanticscholar").set_index("Année").T
 final_df.index.name = "Mot-clé"
+final_df.columns.name = None
 final_df = final_df[sorted(final_df.columns)]  # trie les années
 
 # 💾 Sauvegarde du tableau croisé global
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-final_filename = f"semantic_tableau_global_{start_year}_{end_year}_{timestamp}.xlsx"
-final_df.to_excel(final_filename)
+final_filename = nom_sortie(f"semantic_tableau_global_{start_year}_{end_year}_{timestamp}")
+ecrire_tableau(final_df, final_filename, index=True)
 print(f"\n📊 Tableau global sauvegardé dans : {final_filename}")
+print(MESURES.ligne())
+if grid.supprimer_journal_si_complete():
+    print(f"⚠️ Cellules en échec : journal {journal_path} conservé, relancez le script et acceptez la reprise.")
@@ -10,23 +10,39 @@
 #     - Les mots-clés à analyser
 # 2. Rechercher le nombre de nouvelles publications par année et par mot-clé
 # 3. Enregistrer chaque mot-clé dans son propre fichier .xlsx
-# 4. Créer un tableau global (.xlsx) avec :
+#    (autre format via la variable SCRIPTORIUM_FORMAT : parquet, csv.gz, csv, jsonl)
+# 4. Créer un tableau global (même format) avec :
 #     - Lignes = mots-clés
 #     - Colonnes = années
 #     - Valeurs = nombre de *nouvelles publications* par an
+# 5. Régler le rythme des requêtes (respecte Retry-After)
+# 6. Relire les comptes déjà obtenus dans un cache local (commun/cache_comptes.py)
+# 7. Lancer toutes les cellules mot-clé × année en parallèle (commun/grille.py),
+#    plafond de requêtes simultanées réglable ; sur 429, c'est l'hôte entier
+#    qui ralentit, pas seulement la cellule concernée
 #     
 # 
 ##################################################################
 
-import requests
 import pandas as pd
-import time
-import random
 import datetime
+import time
 from tqdm import tqdm
 
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun import client_http
+from commun.cache_comptes import cache_partage
+from commun.grille import Grille, SOURCES
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
+
+CACHE = cache_partage()
+
 # 📌 Fonction de requête API Semantic Scholar
 def get_publication_count(keyword, year, max_retries=5):
+    en_cache = CACHE.lire("semanticscholar", keyword, year)
+    if en_cache is not None:
+        return en_cache
     url = "https://api.semanticscholar.org/graph/v1/paper/search"
     params = {
         "query": keyword,
@@ -37,54 +53,49 @@ def get_publication_count(keyword, year, max_retries=5):
 
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, params=params)
+            # Une tentative par tour de boucle : sur 429, le client ralentit l'hôte (Retry-After compris)
+            response = client_http.get(url, params=params, tentatives_429=0)
             if response.status_code == 200:
-                return response.json().get("total", 0)
+                total = response.json().get("total", 0)
+                CACHE.ecrire("semanticscholar", keyword, year, total)
+                return total
             elif response.status_code == 429:
-                wait = 5 + attempt * 2
-                print(f"⚠️  Trop de requêtes (429). Pause de {wait} secondes...")
-                time.sleep(wait)
+                print("⚠️  Trop de requêtes (429). Pause avant la tentative suivante...")
             else:
                 print(f"❌ Erreur {response.status_code} pour {keyword} ({year})")
                 return None
         except Exception as e:
             print(f"⛔ Erreur : {e}")
-            time.sleep(5)
+            time.sleep(5)   # cette requête seulement, pas tout l'hôte
     return None
 
-# 🔁 Analyse de tous les mots-clés
-def analyze_keywords(keywords, start_year, end_year):
-    global_results = []
+def save_keyword_results(keyword, keyword_results, start_year, end_year):
+    df_indiv = pd.DataFrame(keyword_results)
+    filename = nom_sortie(f"semantic_keyword_{keyword.replace(' ', '_')}_{start_year}_{end_year}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    ecrire_tableau(df_indiv, filename)
+    print(f"✅ Résultats sauvegardés dans : {filename}\n")
 
-    print("\n📊 Lancement de l’analyse pour chaque mot-clé...\n")
-
-    for keyword in keywords:
-        print(f"🔍 Mot-clé : '{keyword}'")
-        keyword_results = []
+# 🔁 Analyse de tous les mots-clés (moteur de grille commun, cellules en parallèle)
+def analyze_keywords(keywords, start_year, end_year, concurrency=None):
+    """Compte toutes les cellules mot-clé × année, au plus `concurrency` requêtes en vol."""
+    grid = Grille(["semanticscholar"], keywords, start_year, end_year, concurrence=concurrency)
 
-        for year in tqdm(range(start_year, end_year + 1)):
-            count = get_publication_count(keyword, year)
-            keyword_results.append({
-                "Mot-clé": keyword,
-                "Année": year,
-                "Occurrences": count
-            })
-            time.sleep(random.uniform(1.0, 2.5))
+    print("\n📊 Lancement de l’analyse pour chaque mot-clé...\n")
 
-        # 💾 Sauvegarde individuelle
-        df_indiv = pd.DataFrame(keyword_results)
-        filename = f"semantic_keyword_{keyword.replace(' ', '_')}_{start_year}_{end_year}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        df_indiv.to_excel(filename, index=False)
-        print(f"✅ Résultats sauvegardés dans : {filename}\n")
+    with tqdm(total=len(grid.mots_cles) * len(grid.annees)) as progress:
+        def keyword_done(source, keyword):
+            progress.write(f"🔍 Mot-clé terminé : '{keyword}'")
+            # 💾 Sauvegarde individuelle dès qu'un mot-clé est complet
+            save_keyword_results(keyword, grid.lignes(source, keyword), start_year, end_year)
 
-        global_results.extend(keyword_results)
+        grid.executer(sur_resultat=lambda *cell: progress.update(1), sur_mot_cle_termine=keyword_done)
 
-    return pd.DataFrame(global_results)
+    return pd.DataFrame(grid.lignes("semanticscholar"))
 
 # 🔁 Création du tableau croisé
-def create_pivot_table(df, output_filename="semantic_summary.xlsx"):
+def create_pivot_table(df, output_filename=None):
     pivot = df.pivot_table(index="Mot-clé", columns="Année", values="Occurrences", fill_value=0)
-    pivot.to_excel(output_filename)
+    output_filename = ecrire_tableau(pivot, output_filename or nom_sortie("semantic_summary"), index=True)
     print(f"\n📈 Tableau comparatif sauvegardé dans : {output_filename}")
 
 # 🚀 Programme principal
@@ -101,8 +112,14 @@ if __name__ == "__main__":
     raw_keywords = input("📝 Entrez les mots-clés séparés par des virgules :\n👉 ")
     keywords = [kw.strip() for kw in raw_keywords.split(",") if kw.strip()]
 
+    # Plafond de requêtes simultanées
+    raw_concurrency = input(f"⚡ Requêtes simultanées (défaut {SOURCES['semanticscholar'].concurrence}) : ").strip()
+    concurrency = int(raw_concurrency) if raw_concurrency.isdigit() and int(raw_concurrency) > 0 else None
+
     # Lancer l’analyse
-    df_all = analyze_keywords(keywords, start_year, end_year)
+    df_all = analyze_keywords(keywords, start_year, end_year, concurrency)
 
     # Créer le tableau comparatif
     create_pivot_table(df_all)
+    print(CACHE.resume())
+    print(MESURES.ligne())
@@ -12,16 +12,20 @@
 # - ⚠️ Ce nombre n’est PAS un cumul, mais bien un total annuel indépendant.
 #   Il montre combien de *nouveaux articles* ont été publiés cette année avec le mot-clé.
 #
-# ✅ Le script gère les erreurs (ex: code 429 si trop de requêtes) avec des pauses.
+# ✅ Le script gère les erreurs (ex: code 429 si trop de requêtes) avec des pauses
+#    (respecte Retry-After).
 # ✅ Les résultats sont sauvegardés dans un fichier Excel nommé automatiquement.
 # --------------------------------------------------------------------
 
-import requests
 import pandas as pd
-import time
 from datetime import datetime
 from urllib.parse import quote_plus
 
+import acces_commun  # noqa: F401  (rend commun/ importable)
+from commun import client_http
+from commun.mesures import MESURES
+from commun.sortie import ecrire_tableau, nom_sortie
+
 # -------------------------------------------------------
 # 1. SAISIE DES PARAMÈTRES UTILISATEUR
 # -------------------------------------------------------
@@ -59,7 +63,8 @@ for year in range(start_year, end_year + 1):
             "fields": "title"
         }
 
-        response = requests.get(base_url, params=params)
+        # Une tentative par tour de boucle : sur 429, le client ralentit l'hôte (Retry-After compris)
+        response = client_http.get(base_url, params=params, tentatives_429=0)
 
         if response.status_code == 200:
             total = response.json().get("total", 0)
@@ -69,16 +74,12 @@ for year in range(start_year, end_year + 1):
             break
         elif response.status_code == 429:
             retry_count += 1
-            wait_time = 5 * retry_count
-            print(f"   ⚠️  Trop de requêtes (code 429). Pause {wait_time} secondes... (tentative {retry_count})")
-            time.sleep(wait_time)
+            print(f"   ⚠️  Trop de requêtes (code 429). Pause avant la tentative suivante... (tentative {retry_count})")
         else:
             print(f"   ❌ Erreur {response.status_code} pour l'année {year}. Résultat non disponible.\n")
             results.append({"Année": year, "Occurrences": None})
             break
 
-    time.sleep(1)  # Pause pour éviter surcharge API
-
 # -------------------------------------------------------
 # 4. CONVERSION EN DATAFRAME
 # -------------------------------------------------------
@@ -89,14 +90,15 @@ df = pd.DataFrame(results)
 # -------------------------------------------------------
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 safe_keyword = quote_plus(keyword.replace(" ", "_"))
-filename = f"semantic_{safe_keyword}_{start_year}_{end_year}_{timestamp}.xlsx"
-df.to_excel(filename, index=False)
+filename = nom_sortie(f"semantic_{safe_keyword}_{start_year}_{end_year}_{timestamp}")
+ecrire_tableau(df, filename)
 
 # -------------------------------------------------------
 # 6. FIN ET EXPLICATION
 # -------------------------------------------------------
 print(f"\n✅ Analyse terminée !")
 print(f"💾 Fichier sauvegardé : {filename}")
+print(MESURES.ligne())
 print("\n📈 Chaque ligne = une année. La colonne 'Occurrences' = nombre d’articles contenant le mot-clé publiés cette année-là.")
 print("👉 Ce n’est PAS un cumul, mais un indicateur de tendance annuelle.")
 print("Tu peux maintenant créer des graphiques pour observer l’évolution de l’intérêt scientifique sur ce terme.\n")
@@ -0,0 +1,128 @@
+##########################################################################
+#
+# Lanceur de lots : tous les scripts, sans questions, dans un seul processus
+# -------------------------------------------------------------------------
+#
+# Exécute un fichier de travaux (voir commun/travaux.py pour le format) :
+# comptes mots-clés × années (crossref, openalex, semanticscholar, scholar),
+# récoltes Crossref et DOI de revues. Connexions, limiteurs et cache des
+# comptes sont partagés par tous les travaux du lot.
+#
+# Un lot de comptes peut aussi se passer en options, sans fichier.
+# Rien de lourd n'est importé avant le premier travail : --help et
+# --verifier répondent aussitôt.
+#
+# Avec --file, le lot est déposé dans une file de travaux partagée
+# (commun/file_travaux.py) : des travailleurs, sur une ou plusieurs
+# machines qui partagent le dossier, se répartissent les travaux, puis
+# --fusionner regroupe les partitions.
+#
+# Exemples :
+#   python scriptorium.py travaux.json
+#   python scriptorium.py travaux.toml --format parquet --dossier resultats
+#   python scriptorium.py -k "informal economy, shadow economy" -s crossref,openalex --debut 2000 --fin 2024
+#   python scriptorium.py travaux.json --verifier
+#   python scriptorium.py travaux.json --file /partage/file.sqlite -d /partage/sorties
+#   python scriptorium.py --file /partage/file.sqlite -d /partage/sorties --travailleurs 8   (sur chaque machine)
+#   python scriptorium.py --file /partage/file.sqlite -d /partage/sorties --fusionner
+#
+##########################################################################
+
+import argparse
+import os
+import sys
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="Lanceur de lots scriptorium : comptes, récoltes Crossref et DOI de revues, sans questions.")
+    parser.add_argument("lot", nargs="?", help="fichier de travaux (.json ou .toml)")
+    parser.add_argument("-f", "--format", help="format des fichiers de sortie (xlsx, parquet, csv.gz, csv, jsonl)")
+    parser.add_argument("-d", "--dossier", help="dossier de travail et de sortie (créé au besoin)")
+    parser.add_argument("--arret-sur-erreur", action="store_true", help="arrêter le lot au premier travail en échec")
+    parser.add_argument("--verifier", action="store_true", help="vérifier le lot et afficher les travaux, sans rien lancer")
+    comptes = parser.add_argument_group("lot de comptes en ligne de commande (sans fichier)")
+    comptes.add_argument("-k", "--mots-cles", help="mots-clés séparés par des virgules")
+    comptes.add_argument("-s", "--sources", default="crossref",
+                         help="sources séparées par des virgules (crossref, openalex, semanticscholar, scholar)")
+    comptes.add_argument("--debut", type=int, help="année de début")
+    comptes.add_argument("--fin", type=int, help="année de fin (défaut : année en cours)")
+    file = parser.add_argument_group("file de travaux partagée (plusieurs processus / machines)")
+    file.add_argument("--file", help="file SQLite : le lot y est déposé au lieu d'être exécuté")
+    file.add_argument("--travailleurs", type=int, default=0, help="processus travailleurs à lancer sur cette machine")
+    file.add_argument("--fusionner", action="store_true", help="regrouper les partitions terminées dans <dossier>/fusion")
+    file.add_argument("--etat", action="store_true", help="afficher l'état de la file")
+    file.add_argument("--relancer-echecs", action="store_true", help="remettre les travaux en échec dans la file")
+    file.add_argument("--duree-bail", type=float, default=300, help="secondes sans battement de cœur avant reprise")
+    return parser
+
+
+def main_file(args, lot):
+    """Mode file partagée : dépôt du lot, travailleurs, fusion (dans cet ordre, selon les options)."""
+    from commun.file_travaux import FileTravaux, fusionner, lancer_travailleurs
+
+    file = FileTravaux(args.file, duree_bail=args.duree_bail)
+    dossier = args.dossier or (lot and lot["dossier"]) or "."
+    if lot is not None:
+        deposes, presents = file.deposer(lot)
+        print(f"📥 {deposes} travaux déposés ({presents} déjà dans la file)")
+    if args.relancer_echecs:
+        print(f"🔁 {file.relancer_echecs()} travaux en échec remis dans la file")
+    if args.travailleurs > 0:
+        print(f"🧵 {args.travailleurs} travailleurs lancés, sorties dans {os.path.abspath(dossier)}/partitions")
+        lancer_travailleurs(args.file, dossier, args.travailleurs, args.duree_bail)
+    if args.fusionner:
+        fusionner(args.file, dossier, args.format)
+    print(file.resume())
+    if args.etat:
+        for ligne in file.travaux():
+            erreur = f" : {ligne['erreur']}" if ligne["erreur"] else ""
+            print(f"   {ligne['etat']:<9} {ligne['nom']} (tentatives {ligne['tentatives']}"
+                  f"{', ' + ligne['travailleur'] if ligne['travailleur'] else ''}){erreur}")
+    return 1 if file.compter()["echec"] else 0
+
+
+def main(argv=None):
+    parser = construire_parser()
+    args = parser.parse_args(argv)
+    if args.lot and args.mots_cles or not args.file and not (args.lot or args.mots_cles):
+        parser.error("indiquer un fichier de travaux ou --mots-cles (l'un ou l'autre)")
+    if args.verifier and not (args.lot or args.mots_cles):
+        parser.error("--verifier demande un fichier de travaux ou --mots-cles")
+
+    from commun.travaux import afficher_bilan, charger_lot, executer_lot, verifier_lot
+
+    try:
+        if args.lot:
+            lot = charger_lot(args.lot)
+        elif not args.mots_cles:
+            lot = None   # file existante : rien à déposer
+        else:
+            travail = {"type": "comptes", "nom": "comptes", "mots_cles": args.mots_cles.split(","),
+                       "sources": [s.strip() for s in args.sources.split(",") if s.strip()], "debut": args.debut}
+            if args.fin is not None:
+                travail["fin"] = args.fin
+            lot = verifier_lot({"travaux": [travail]})
+        if args.format and lot is not None:
+            lot = verifier_lot(dict(lot, format=args.format))
+    except (OSError, ValueError) as e:
+        parser.error(f"lot invalide : {e}")
+
+    if args.file and not args.verifier:
+        return main_file(args, lot)
+
+    if args.verifier:
+        print(f"🗂️ {len(lot['travaux'])} travaux, format {lot['format'] or 'par défaut'}, "
+              f"dossier {lot['dossier'] or '.'} :")
+        for travail in lot["travaux"]:
+            details = {k: v for k, v in travail.items() if k not in ("nom", "type")}
+            print(f"   {travail['nom']} ({travail['type']}) : {details}")
+        return 0
+
+    bilan = executer_lot(lot, dossier=args.dossier, arret_sur_erreur=args.arret_sur_erreur)
+    afficher_bilan(bilan)
+    return 0 if all(reussi for _, reussi, _, _ in bilan) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
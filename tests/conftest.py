@@ -0,0 +1,5 @@
+# Les tests importent `commun` depuis la racine du dépôt, quel que soit le dossier de lancement.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+import pytest
+
+import crossref_scraper_v102 as scraper
+from commun.limiteur import limiteur_pour
+
+URL = "https://api.crossref.org/works"
+
+
+class _Reponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        raise scraper.requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def iter_content(self, *args, **kwargs):
+        yield b'{"message": {"next-cursor": "c2", "items": [{"DOI": "10.1/a"}]}}'
+
+    def close(self):
+        pass
+
+
+def _servir(monkeypatch, status_code):
+    appels = []
+    monkeypatch.setattr(scraper.client_http, "get", lambda *a, **k: appels.append(k) or _Reponse(status_code))
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+    return appels
+
+
+def test_erreur_4xx_sans_nouvelle_tentative(monkeypatch):
+    appels = _servir(monkeypatch, 404)
+    assert scraper.charger_page(URL, {}, "*") is None
+    assert len(appels) == 1
+
+
+def test_erreur_5xx_relancee_sans_suspendre_l_hote(monkeypatch):
+    appels = _servir(monkeypatch, 502)
+    suspendu = limiteur_pour(URL).suspendu_jusqua
+    assert scraper.charger_page(URL, {}, "*") is None
+    assert len(appels) == 60
+    assert limiteur_pour(URL).suspendu_jusqua == suspendu
+
+
+def test_erreur_du_constructeur_non_masquee(monkeypatch):
+    appels = _servir(monkeypatch, 200)
+
+    def construire(page):
+        raise TypeError("bogue")
+
+    monkeypatch.setattr(scraper.CONSTRUCTEUR, "construire", construire)
+    with pytest.raises(TypeError):
+        scraper.charger_page(URL, {}, "*")
+    assert len(appels) == 1
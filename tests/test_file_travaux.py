@@ -0,0 +1,85 @@
+# Tests de la file de travaux partagée : baux, battements de cœur, échéance et reprise.
+
+import os
+import time
+
+import pytest
+
+from commun import file_travaux, travaux
+from commun.file_travaux import FileTravaux
+
+LOT = {"format": "csv", "travaux": [{"type": "doi", "nom": "revue", "issn": ["0022-0388"]}]}
+
+
+@pytest.fixture
+def dossier(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_bail_pose_et_exclusif(dossier):
+    file = FileTravaux("file.sqlite", duree_bail=60)
+    assert file.deposer(LOT) == (1, 0)
+    assert file.deposer(LOT) == (0, 1)
+    travail = file.prendre("a")
+    assert travail["nom"] == "revue" and travail["tentative"] == 1
+    assert file.prendre("b") is None
+    assert file.compter()["en_cours"] == 1
+
+
+def test_battement_prolonge_le_bail(dossier):
+    file = FileTravaux("file.sqlite", duree_bail=0.3)
+    file.deposer(LOT)
+    travail = file.prendre("a")
+    for _ in range(3):
+        time.sleep(0.15)
+        assert file.prolonger(travail["id"], "a")
+    assert file.prendre("b") is None
+    assert not file.prolonger(travail["id"], "b")
+
+
+def test_bail_echu_repris_et_resultat_perdu(dossier):
+    file = FileTravaux("file.sqlite", duree_bail=0.1)
+    file.deposer(LOT)
+    premier = file.prendre("a")
+    time.sleep(0.2)
+    second = file.prendre("b")
+    assert second["id"] == premier["id"] and second["tentative"] == 2
+    assert not file.prolonger(premier["id"], "a")
+    assert not file.terminer(premier["id"], "a", ["x.csv"])
+    assert file.terminer(second["id"], "b", ["y.csv"])
+    assert file.compter()["termine"] == 1
+
+
+def test_echec_apres_max_tentatives(dossier):
+    file = FileTravaux("file.sqlite", duree_bail=0.05, max_tentatives=2)
+    file.deposer(LOT)
+    for travailleur in ("a", "b"):
+        assert file.prendre(travailleur) is not None
+        time.sleep(0.1)
+    assert file.prendre("c") is None
+    assert file.compter()["echec"] == 1
+
+
+def test_battement_apres_changement_de_dossier(dossier, monkeypatch):
+    # Le travail s'exécute dans sa partition : un chemin de file relatif ne doit pas en dépendre
+    file = FileTravaux("file.sqlite", duree_bail=0.3)
+    file.deposer(LOT)
+    travail = file.prendre("a")
+    os.makedirs("partition")
+    monkeypatch.chdir(dossier / "partition")
+    assert file.prolonger(travail["id"], "a")
+    assert not os.path.exists("file.sqlite")
+
+
+def test_travailleur_garde_son_bail_pendant_un_long_travail(dossier, monkeypatch):
+    def travail_long(travail, format_sortie=None):
+        time.sleep(0.8)   # plus long que le bail : seuls les battements de cœur le protègent
+        return ["sortie.csv"]
+
+    monkeypatch.setitem(travaux.EXECUTEURS, "doi", travail_long)
+    FileTravaux("file.sqlite").deposer(LOT)
+    assert file_travaux.travailler("file.sqlite", "out", duree_bail=0.3) == 1
+    ligne = FileTravaux("file.sqlite").travaux()[0]
+    assert ligne["etat"] == "termine" and ligne["tentatives"] == 1
+    assert not os.path.exists(dossier / "out" / "partitions" / "revue" / "file.sqlite")
@@ -0,0 +1,33 @@
+import pytest
+
+from commun.flux_json import PageCrossref
+
+
+class _Reponse:
+    def __init__(self, corps):
+        self.corps = corps
+        self.fermee = False
+
+    def iter_content(self, chunk_size=None):
+        for i in range(0, len(self.corps), 8):
+            yield self.corps[i:i + 8]
+
+    def close(self):
+        self.fermee = True
+
+
+def test_page_lue_puis_reponse_fermee():
+    reponse = _Reponse(b'{"message": {"next-cursor": "c2", "items": [{"DOI": "10.1/a", "x": 1}]}}')
+    page = PageCrossref.depuis_reponse(reponse)
+
+    assert list(page) == [{"DOI": "10.1/a"}]
+    assert page.next_cursor == "c2"
+    assert reponse.fermee
+
+
+def test_reponse_fermee_si_page_tronquee():
+    reponse = _Reponse(b'{"message": {"items": [{"DOI": "10.1/a"}, {"DOI": "10.')
+
+    with pytest.raises(ValueError):
+        list(PageCrossref.depuis_reponse(reponse))
+    assert reponse.fermee
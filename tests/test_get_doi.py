@@ -0,0 +1,56 @@
+import tempfile
+
+import pytest
+
+import get_doi
+from commun.pipeline import PageChargee
+
+
+def test_sans_issn():
+    with pytest.raises(ValueError):
+        get_doi.recuperer_dois(" ", "")
+
+
+def test_flux_interrompu_marque_incomplet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pages = {"*": PageChargee([("10.1/a", "2001-01-01T00:00:00Z"), ("10.1/b", "2000-01-01T00:00:00Z")], "c2", 5)}
+    monkeypatch.setattr(get_doi, "get_dois_flux_unique", lambda issns, curseur: pages.get(curseur))
+    monkeypatch.setattr(get_doi, "get_journal_metadata", lambda issn: ("Revue", "Éditeur", [issn]))
+
+    assert get_doi.recuperer_dois("0022-0388", "", format_tableau="csv") is None
+
+    (texte,) = tmp_path.glob("*_incomplet.txt")
+    contenu = texte.read_text().splitlines()
+    assert contenu[0].startswith("Récolte incomplète")
+    assert contenu[-2:] == ["10.1/b", "10.1/a"]
+    assert len(list(tmp_path.glob("*_incomplet.csv"))) == 1
+
+
+def _pages_par_issn(suite):
+    """get_dois factice : une page de DOI, puis `suite` (page vide ou échec)."""
+    def get_dois(url, cursor="*"):
+        if cursor == "*":
+            return [("10.1/a", "2001-01-01T00:00:00Z")], "Revue", "Éditeur", ["0022-0388"], "c2"
+        return suite
+    return get_dois
+
+
+def test_mode_par_issn_echec_marque_incomplet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(get_doi, "get_dois", _pages_par_issn(None))
+
+    assert get_doi.recuperer_dois("0022-0388", "", mode_rapide=False, format_tableau="csv") is None
+    assert len(list(tmp_path.glob("*_incomplet.txt"))) == 1
+
+
+def test_mode_par_issn_complet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    temporaire = tmp_path / "tmp"
+    temporaire.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temporaire))
+    monkeypatch.setattr(get_doi, "get_dois", _pages_par_issn(([], "", "Éditeur inconnu", [], None)))
+
+    texte, tableau = get_doi.recuperer_dois("0022-0388", "", mode_rapide=False, format_tableau="csv")
+    assert not texte.endswith("_incomplet.txt")
+    assert (tmp_path / texte).read_text().splitlines()[-1] == "10.1/a"
+    assert not any(temporaire.glob("index_doi_*"))   # index propre à la récolte, supprimé
@@ -0,0 +1,15 @@
+from commun.grille import Grille
+
+
+def test_journal_garde_tant_qu_il_reste_des_echecs(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text("", encoding="utf-8")
+    grille = Grille(["crossref"], ["informal economy"], 2000, 2001, cache=object(), journal=str(journal))
+    grille.valeurs["crossref"][2000]["informal economy"] = 12
+
+    assert grille.supprimer_journal_si_complete() == [("crossref", "informal economy", 2001)]
+    assert journal.exists()
+
+    grille.valeurs["crossref"][2001]["informal economy"] = 15
+    assert grille.supprimer_journal_si_complete() == []
+    assert not journal.exists()
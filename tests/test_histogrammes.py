@@ -0,0 +1,44 @@
+# Tests des histogrammes en une requête : une erreur réseau ou une réponse illisible
+# renvoie None (repli année par année), sans interrompre la grille.
+
+import requests
+
+from commun import histogrammes
+
+
+class _Reponse:
+    status_code = 200
+
+    def __init__(self, donnees):
+        self._donnees = donnees
+
+    def json(self):
+        if isinstance(self._donnees, Exception):
+            raise self._donnees
+        return self._donnees
+
+
+def _get_qui_echoue(*args, **kwargs):
+    raise requests.exceptions.ConnectionError("refusé")
+
+
+def test_crossref_erreur_reseau(monkeypatch):
+    monkeypatch.setattr(histogrammes.client_http, "get", _get_qui_echoue)
+    assert histogrammes.histogramme_crossref("a", 2000, 2001) is None
+
+
+def test_crossref_reponse_illisible(monkeypatch):
+    for donnees in (ValueError("pas du JSON"), {"status": "ok"}):
+        monkeypatch.setattr(histogrammes.client_http, "get", lambda *a, d=donnees, **k: _Reponse(d))
+        assert histogrammes.histogramme_crossref("a", 2000, 2001) is None
+
+
+def test_openalex_erreur_reseau(monkeypatch):
+    monkeypatch.setattr(histogrammes.client_http, "get", _get_qui_echoue)
+    assert histogrammes.histogramme_openalex("a", 2000, 2001) is None
+
+
+def test_openalex_reponse_illisible(monkeypatch):
+    for donnees in (ValueError("pas du JSON"), {"group_by": [None]}):
+        monkeypatch.setattr(histogrammes.client_http, "get", lambda *a, d=donnees, **k: _Reponse(d))
+        assert histogrammes.histogramme_openalex("a", 2000, 2001) is None
@@ -0,0 +1,32 @@
+from commun.journal import JournalGrille
+
+
+def test_reprise_apres_ligne_tronquee(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    journal = JournalGrille(chemin, reprise=False)
+    journal.ecrire("crossref", "informal economy", 2000, 12)
+    journal.ecrire("crossref", "informal economy", 2001, 15)
+    journal.fermer()
+    with open(chemin, "a", encoding="utf-8") as f:
+        f.write('{"source": "crossref", "mot_cle": "informal eco')   # arrêt brutal en pleine écriture
+
+    journal = JournalGrille(chemin)
+    assert len(journal.cellules) == 2
+    journal.ecrire("crossref", "informal economy", 2002, 20)
+    journal.fermer()
+
+    cellules = JournalGrille(chemin).charger()
+    assert cellules == {("crossref", "informal economy", 2000): 12,
+                        ("crossref", "informal economy", 2001): 15,
+                        ("crossref", "informal economy", 2002): 20}
+
+
+def test_reprise_journal_tronque_des_la_premiere_ligne(tmp_path):
+    chemin = tmp_path / "journal.jsonl"
+    chemin.write_text('{"source": "openalex", "mot', encoding="utf-8")
+
+    journal = JournalGrille(str(chemin))
+    journal.ecrire("openalex", "shadow economy", 2010, 7)
+    journal.fermer()
+
+    assert JournalGrille(str(chemin)).charger() == {("openalex", "shadow economy", 2010): 7}
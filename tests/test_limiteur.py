@@ -0,0 +1,23 @@
+from commun.limiteur import Limiteur
+
+EN_TETES = {"X-Rate-Limit-Limit": "50", "X-Rate-Limit-Interval": "1s"}
+
+
+def test_en_tetes_fixent_le_plafond_sans_annuler_un_429():
+    limiteur = Limiteur(40)
+    limiteur.signaler_429(pause=0)
+    assert limiteur.debit == 20
+
+    limiteur.mettre_a_jour(EN_TETES)
+    assert limiteur.debit_initial == 50
+    assert limiteur.debit == 22   # remontée de 10 %, pas de retour direct au plafond
+
+    for _ in range(20):
+        limiteur.mettre_a_jour(EN_TETES)
+    assert limiteur.debit == 50
+
+
+def test_plafond_abaisse_par_les_en_tetes():
+    limiteur = Limiteur(50)
+    limiteur.mettre_a_jour({"X-Rate-Limit-Limit": "10", "X-Rate-Limit-Interval": "1s"})
+    assert limiteur.debit == limiteur.debit_initial == 10
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from commun import partition
+from commun.partition import RecolteFragmentee
+
+
+class _Magasin:
+    def __init__(self):
+        self._etat = {"debut": "2000-01-01", "fin": "2000-12-31", "curseur": "*", "terminee": False,
+                      "lignes": 0, "attendues": 10}
+
+    def etat(self, cle):
+        return self._etat
+
+
+class _Reponse:
+    def __init__(self, status_code=200, corps=b'{"message": {"items": [{"DOI": ', pendant_lecture=None):
+        self.status_code = status_code
+        self.corps = corps   # JSON coupé par défaut
+        self.pendant_lecture = pendant_lecture
+        self.fermee = False
+
+    def iter_content(self, *args, **kwargs):
+        if self.pendant_lecture:
+            self.pendant_lecture()
+        yield self.corps
+
+    def json(self):
+        return json.loads(b"".join(self.iter_content()))
+
+    def close(self):
+        self.fermee = True
+
+
+@pytest.fixture
+def recolte(monkeypatch):
+    monkeypatch.setattr(partition, "PAUSE_TENTATIVE", 0)
+    return RecolteFragmentee({"query.bibliographic": "informal economy"}, _Magasin(), extraire_ligne=dict,
+                             nb_travailleurs=1)
+
+
+def _servir(monkeypatch, reponse):
+    appels = []
+    monkeypatch.setattr(partition.client_http, "get", lambda *a, **k: appels.append(k) or reponse)
+    return appels
+
+
+def test_page_illisible_relancee_peu_de_fois(recolte, monkeypatch):
+    reponse = _Reponse()
+    appels = _servir(monkeypatch, reponse)
+
+    recolte._recolter_fenetre("2000-01-01_2000-12-31")
+
+    assert len(appels) == partition.MAX_TENTATIVES_LECTURE
+    assert reponse.fermee
+
+
+def test_erreur_4xx_sans_nouvelle_tentative(recolte, monkeypatch):
+    appels = _servir(monkeypatch, _Reponse(status_code=400))
+
+    recolte._recolter_fenetre("2000-01-01_2000-12-31")
+
+    assert len(appels) == 1
+
+
+def test_erreur_5xx_relancee_sans_suspendre_l_hote(recolte, monkeypatch):
+    monkeypatch.setattr(partition, "MAX_TENTATIVES", 3)
+    appels = _servir(monkeypatch, _Reponse(status_code=503))
+    suspendu = recolte.limiteur.suspendu_jusqua
+
+    recolte._recolter_fenetre("2000-01-01_2000-12-31")
+
+    assert len(appels) == 3
+    assert recolte.limiteur.suspendu_jusqua == suspendu
+
+
+def test_budget_tenu_pendant_la_lecture_du_corps(recolte, monkeypatch):
+    libre = []
+    _servir(monkeypatch, _Reponse(corps=b'{"message": {"total-results": 7}}',
+                                  pendant_lecture=lambda: libre.append(recolte.budget._semaphore.acquire(blocking=False))))
+
+    assert recolte.compter(partition.DATE_DEBUT, partition.DATE_DEBUT) == 7
+    assert libre == [False]
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from commun.scholar import extraire_nombre_resultats, lire_nombre
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "scholar")
+
+
+@pytest.mark.parametrize("page, attendu", [
+    ("en_about.html", 1230000),
+    ("en_page2.html", 18400),
+    ("en_annee.html", 150),   # le bloc affiche aussi une année, plus grande que le compte
+    ("fr_espaces.html", 12300),
+    ("de_points.html", 1230000),
+    ("en_zero.html", 0),
+    ("blocage_captcha.html", None),
+])
+def test_pages_enregistrees(page, attendu):
+    with open(os.path.join(FIXTURES, page), "rb") as f:
+        assert extraire_nombre_resultats(f.read()) == attendu
+
+
+def test_formule_du_compteur_prioritaire():
+    assert lire_nombre("Page 12 of about 7 results") == 7
+    assert lire_nombre("Environ 2 300 résultats (0,04 s) depuis 2020") == 2300
@@ -0,0 +1,30 @@
+import importlib
+
+import commun.sortie
+
+
+def _recharger(monkeypatch, valeur):
+    if valeur is None:
+        monkeypatch.delenv("SCRIPTORIUM_FORMAT", raising=False)
+    else:
+        monkeypatch.setenv("SCRIPTORIUM_FORMAT", valeur)
+    return importlib.reload(commun.sortie)
+
+
+def test_format_environnement_valide(monkeypatch):
+    sortie = _recharger(monkeypatch, ".Parquet")
+    assert sortie.FORMAT_PAR_DEFAUT == "parquet"
+    assert sortie.nom_sortie("notices") == "notices.parquet"
+    _recharger(monkeypatch, None)
+
+
+def test_format_environnement_inconnu_retombe_sur_xlsx(monkeypatch, capsys):
+    sortie = _recharger(monkeypatch, "xslx")
+    assert sortie.FORMAT_PAR_DEFAUT == "xlsx"
+    assert "xslx" in capsys.readouterr().out
+    assert sortie.nom_sortie("notices") == "notices.xlsx"
+    _recharger(monkeypatch, None)
+
+
+def test_format_environnement_absent(monkeypatch):
+    assert _recharger(monkeypatch, None).FORMAT_PAR_DEFAUT == "xlsx"